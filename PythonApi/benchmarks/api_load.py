@@ -0,0 +1,210 @@
+"""Drive the API with a weighted read/write mix, per catalog size, and store the results as JSON.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.api_load [--sizes 1000 10000 100000] [--mix get=40,page=20,...]
+                                  [--concurrency 8] [--duration 10] [--serve | --url URL] [--fast-json]
+
+By default requests go to ``main.app`` in process through httpx's ASGI
+transport, against a catalog built directly in the store. With --serve a
+local uvicorn process is started for each size, and with --url an already
+running server is used. Both are seeded through the batch endpoint, and
+--url needs a server with an empty or sample catalog. Each of --concurrency
+clients sends requests back to back for --duration seconds. Results go to
+benchmarks/results/ (or --output) and can be compared between commits with
+``python -m benchmarks.compare``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import build_catalog, latency_summary, write_results
+from pagination import encode_cursor
+
+DEFAULT_MIX = "get=40,page=20,filter=10,sort=5,search=5,update=10,adjust=10"
+# Products sent per seeding request, the batch endpoint's limit
+SEED_BATCH = 10_000
+
+
+# One request of an operation: method, URL and JSON body
+Request = Tuple[str, str, Optional[dict]]
+
+
+def _requests(ids: List[int], n: int, rng: random.Random) -> Dict[str, Callable[[], Request]]:
+    """Operation name -> function returning (method, url, json body) for one request"""
+    return {
+        "get": lambda: ("GET", f"/api/products/{rng.choice(ids)}", None),
+        "page": lambda: ("GET", f"/api/products?limit=100&after={encode_cursor(rng.choice(ids))}", None),
+        "filter": lambda: ("GET", "/api/products?status=active&max_price=500&limit=100", None),
+        "sort": lambda: ("GET", "/api/products?sort=-price&limit=100", None),
+        "search": lambda: ("GET", f"/api/products/search?q={rng.randrange(n)}&limit=20", None),
+        "list": lambda: ("GET", "/api/products", None),
+        "update": lambda: ("PUT", f"/api/products/{rng.choice(ids)}", {"stock": rng.randint(0, 500)}),
+        "adjust": lambda: ("POST", f"/api/products/{rng.choice(ids)}/stock/adjust",
+                           {"delta": rng.choice((-1, 1)), "fail_if_negative": False}),
+        "create": lambda: ("POST", "/api/products", {
+            "name": "Load test", "sku": f"LOAD-{rng.getrandbits(64):016x}", "stock": 1, "price": 1.0,
+            "category_id": 1, "status": "active",
+        }),
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight)
+    unknown = set(weights) - set(_requests([1], 1, random.Random()))
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+async def _seed_over_http(client: httpx.AsyncClient, n: int, categories: int, seed: int) -> List[int]:
+    """Create ``categories`` categories and ``n`` products like build_catalog does, through the API"""
+    rng = random.Random(seed)
+    category_ids = []
+    for i in range(categories):
+        response = await client.post("/api/categories", json={"name": f"Category {i}"})
+        category_ids.append(response.json()["id"])
+    statuses = ["active", "inactive", "discontinued", "out_of_stock"]
+    ids = []
+    for start in range(0, n, SEED_BATCH):
+        batch = [{
+            "name": f"Product {i}", "sku": f"BENCH-{i:08d}", "stock": rng.randint(0, 500),
+            "price": round(rng.uniform(1, 2000), 2), "category_id": rng.choice(category_ids),
+            "status": rng.choice(statuses),
+        } for i in range(start, min(n, start + SEED_BATCH))]
+        response = await client.post("/api/products/batch", json=batch, timeout=None)
+        ids.extend(result["id"] for result in response.json() if result["success"])
+    return ids
+
+
+async def _load(client: httpx.AsyncClient, ids: List[int], n: int, weights: Dict[str, int],
+                concurrency: int, duration: float, seed: int) -> dict:
+    names = list(weights)
+    timings = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    deadline = time.perf_counter() + duration
+
+    async def worker(slot: int):
+        rng = random.Random(seed * 1000 + slot)
+        requests = _requests(ids, n, rng)
+        choices = rng.choices(names, [weights[name] for name in names], k=100_000)
+        position = 0
+        while time.perf_counter() < deadline:
+            name = choices[position % len(choices)]
+            position += 1
+            method, url, body = requests[name]()
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body, timeout=None)
+            timings[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(slot) for slot in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    operations = {name: {**latency_summary(timings[name], elapsed), "errors": errors[name]} for name in names}
+    everything = [timing for name in names for timing in timings[name]]
+    return {"total": {**latency_summary(everything, elapsed), "errors": sum(errors.values())},
+            "operations": operations}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(fast_json: bool):
+    port = _free_port()
+    env = {**os.environ, "INVENTORY_STORAGE_BACKEND": "memory", "INVENTORY_FAST_JSON": str(fast_json).lower()}
+    env.pop("INVENTORY_DATA_DIR", None)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/api/categories")
+            return process, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("uvicorn did not start")
+
+
+async def run_size(n: int, args, weights: Dict[str, int]) -> dict:
+    process = None
+    url: Optional[str] = args.url
+    if args.serve:
+        process, url = _start_server(args.fast_json)
+    try:
+        start = time.perf_counter()
+        if url is None:
+            import fast_json
+            import main as api
+            from response_cache import ResponseCache
+            api.product_db = build_catalog(n, args.categories, seed=args.seed)
+            api.response_cache = ResponseCache()
+            api.fast_json = fast_json if args.fast_json else None
+            ids = list(api.product_db.products)
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://api")
+        else:
+            client = httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=args.concurrency))
+            ids = await _seed_over_http(client, n, args.categories, args.seed)
+        seed_seconds = time.perf_counter() - start
+        try:
+            result = await _load(client, ids, n, weights, args.concurrency, args.duration, args.seed)
+        finally:
+            await client.aclose()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return {"size": n, "seed_seconds": seed_seconds, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--categories", type=int, default=100)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation=weight pairs (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients sending requests at the same time")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per catalog size")
+    parser.add_argument("--seed", type=int, default=42)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--serve", action="store_true", help="start a local uvicorn server for each size")
+    target.add_argument("--url", help="base URL of a running server to load instead")
+    parser.add_argument("--fast-json", action="store_true", help="turn on the orjson response path")
+    parser.add_argument("--output", help="JSON file to write instead of benchmarks/results/")
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+    if args.url and len(args.sizes) > 1:
+        raise SystemExit("--url loads one running server; give a single --sizes value")
+
+    runs = []
+    for n in args.sizes:
+        run = asyncio.run(run_size(n, args, weights))
+        runs.append(run)
+        total = run["total"]
+        print(f"{n:,} products (seeded in {run['seed_seconds']:.1f} s): {total['per_second']:,.0f} requests/s, "
+              f"p50 {total['p50_ms']:.2f} ms, p99 {total['p99_ms']:.2f} ms, {total['errors']} errors")
+        for name, summary in run["operations"].items():
+            print(f"  {name:<8} {summary['per_second']:>9,.0f}/s  p50 {summary['p50_ms']:>8.2f} ms  "
+                  f"p90 {summary['p90_ms']:>8.2f} ms  p99 {summary['p99_ms']:>8.2f} ms")
+    path = write_results("api_load", vars(args), runs, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare item throughput of single-item endpoints with the batch endpoints.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.batch_api [--items 10000] [--batch-size 1000] [--durable]
+
+Requests go through FastAPI's TestClient, so the numbers include validation,
+routing and serialization but not the network. With --durable the store is
+durable and every log write is fsynced, which is where group commit matters most.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import main as api
+from product_database import ProductDatabase
+
+
+def _products(prefix: str, count: int) -> list:
+    return [
+        {"name": f"Product {i}", "sku": f"{prefix}-{i:08d}", "stock": i % 500, "price": 9.99,
+         "category_id": 1 + i % 6, "status": "active"}
+        for i in range(count)
+    ]
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _report(label: str, count: int, elapsed: float):
+    print(f"{label:<28} {elapsed:8.2f} s  {count / elapsed:>12,.0f} items/s")
+
+
+def _run(client: TestClient, items: int, batch_size: int):
+    single = _products("SINGLE", items)
+    start = time.perf_counter()
+    ids = [client.post("/api/products", json=product).json()["id"] for product in single]
+    _report("create, one per request", items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for product_id in ids:
+        client.put(f"/api/products/{product_id}", json={"stock": 1})
+    _report("update, one per request", items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for product_id in ids:
+        client.delete(f"/api/products/{product_id}")
+    _report("delete, one per request", items, time.perf_counter() - start)
+
+    batched = _products("BATCH", items)
+    ids = []
+    start = time.perf_counter()
+    for chunk in _chunks(batched, batch_size):
+        ids.extend(result["id"] for result in client.post("/api/products/batch", json=chunk).json())
+    _report(f"create, batches of {batch_size}", items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for chunk in _chunks(ids, batch_size):
+        client.put("/api/products/batch", json=[{"id": i, "command": {"stock": 1}} for i in chunk])
+    _report(f"update, batches of {batch_size}", items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for chunk in _chunks(ids, batch_size):
+        client.post("/api/products/batch/delete", json=chunk)
+    _report(f"delete, batches of {batch_size}", items, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--durable", action="store_true", help="log every write to a temporary directory (fsync every record)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="product-batch-") if args.durable else None
+    try:
+        api.product_db = ProductDatabase.open_durable(directory, snapshot_every=0) if directory else ProductDatabase()
+        _run(TestClient(api.app), args.items, args.batch_size)
+        api.product_db.close()
+    finally:
+        if directory:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare a full scan against the category index for GET /api/categories/{id}/products.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.category_index [--sizes 10000 100000 1000000]
+"""
+import argparse
+import random
+
+from benchmarks.common import build_catalog, measure
+
+# Average number of products per category, kept constant so that only the
+# catalog size changes between runs
+PRODUCTS_PER_CATEGORY = 50
+
+
+def run(size: int, lookups: int):
+    db = build_catalog(size, max(1, size // PRODUCTS_PER_CATEGORY))
+    category_ids = [category.id for category in db.get_all_categories()]
+    rng = random.Random(0)
+    targets = [rng.choice(category_ids) for _ in range(lookups)]
+
+    def scan():
+        for category_id in targets:
+            [p for p in db.products.values() if p.category_id == category_id]
+
+    def indexed():
+        for category_id in targets:
+            db.get_products_by_category(category_id)
+
+    scan_time, _ = measure(scan, 1)
+    index_time, _ = measure(indexed, 1)
+    scan_us = scan_time / lookups * 1e6
+    index_us = index_time / lookups * 1e6
+    print(f"{size:>10,} products | scan {scan_us:>12,.1f} us | index {index_us:>8,.1f} us | "
+          f"speedup {scan_us / index_us:>10,.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure the change feed with thousands of idle subscribers on one event loop.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.change_feed [--subscribers 10000] [--events 200]
+
+Each subscriber is a ChangeHub.stream generator driven by its own task,
+as uvicorn drives one per connection; the SSE bytes are dropped instead
+of sent. The benchmark reports the memory each idle subscriber takes, how
+long a publish holds up the writer thread, and how long the loop takes to
+hand one event to every subscriber.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from change_feed import ChangeHub
+
+
+async def _consume(stream, received: list):
+    async for chunk in stream:
+        if not chunk.startswith(b":"):
+            received.append(time.perf_counter())
+
+
+async def run(subscribers: int, events: int):
+    hub = ChangeHub(heartbeat=3600)
+    received = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [asyncio.create_task(_consume(hub.stream(), received)) for _ in range(subscribers)]
+    # Let every task subscribe and send its ready event
+    while hub.subscriber_count < subscribers or len(received) < subscribers:
+        await asyncio.sleep(0.01)
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / subscribers
+    tracemalloc.stop()
+    print(f"{subscribers} idle subscribers: {per_subscriber / 1024:.1f} KiB each")
+
+    publish_times, fan_out_times = [], []
+    for product_id in range(events):
+        received.clear()
+        start = time.perf_counter()
+        # Publish from a worker thread, as the store's sync write handlers do
+        publish_times.append(await asyncio.to_thread(_timed_publish, hub, product_id))
+        while len(received) < subscribers:
+            await asyncio.sleep(0)
+        fan_out_times.append(max(received) - start)
+    print(f"publish on the writer thread: median {statistics.median(publish_times) * 1e6:.1f} us")
+    print(f"event reaches all subscribers: median {statistics.median(fan_out_times) * 1e3:.2f} ms, "
+          f"{statistics.median(fan_out_times) / subscribers * 1e6:.2f} us per subscriber")
+
+    hub.close()
+    await asyncio.gather(*tasks)
+
+
+def _timed_publish(hub: ChangeHub, product_id: int) -> float:
+    start = time.perf_counter()
+    hub.publish("delete", "product", product_id)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measure cold start of main:app: import time, first request and first OpenAPI document.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.cold_start [--runs 10] [--openapi-file openapi.json] [--no-docs]
+
+Each run starts a fresh interpreter that imports ``main``, sends one
+product request and then one ``/openapi.json`` request through httpx's ASGI
+transport. --openapi-file and --no-docs set INVENTORY_OPENAPI_FILE and
+INVENTORY_DOCS=false for the child. Medians over --runs are printed; run it
+once per configuration (or per commit) to compare them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+import asyncio, json, httpx
+
+async def requests():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://api") as client:
+        before = time.perf_counter()
+        assert (await client.get("/api/categories")).status_code == 200
+        middle = time.perf_counter()
+        assert (await client.get("/openapi.json")).status_code == 200
+        return middle - before, time.perf_counter() - middle
+
+first_request, first_openapi = asyncio.run(requests())
+print(json.dumps({"import_ms": (imported - start) * 1e3, "first_request_ms": first_request * 1e3,
+                  "first_openapi_ms": first_openapi * 1e3}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - start) * 1e3
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--openapi-file", help="serve this prebuilt document (INVENTORY_OPENAPI_FILE)")
+    parser.add_argument("--no-docs", action="store_true", help="turn off /swagger and /redoc (INVENTORY_DOCS=false)")
+    args = parser.parse_args()
+
+    env = {**os.environ, "INVENTORY_STORAGE_BACKEND": "memory"}
+    env.pop("INVENTORY_DATA_DIR", None)
+    if args.openapi_file:
+        env["INVENTORY_OPENAPI_FILE"] = args.openapi_file
+    if args.no_docs:
+        env["INVENTORY_DOCS"] = "false"
+    runs = [run_once(env) for _ in range(args.runs)]
+    for key in ("import_ms", "first_request_ms", "first_openapi_ms", "process_ms"):
+        values = [run[key] for run in runs]
+        print(f"{key:<18} median {statistics.median(values):>8.1f}  min {min(values):>8.1f}  max {max(values):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
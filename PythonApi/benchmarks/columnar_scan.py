@@ -0,0 +1,66 @@
+"""Compare filtered inventory statistics with and without the NumPy columnar mirror.
+
+Run from the PythonApi directory (needs numpy):
+
+    python -m benchmarks.columnar_scan [--products 1000000]
+
+Each query is what ``GET /api/stats`` runs for its filters: without the
+mirror the store aggregates the matches its sorted indexes find, with it
+one vectorized pass over the arrays. A plain scan of every product object
+is the baseline both are checked against.
+"""
+import argparse
+import math
+
+from benchmarks.common import build_catalog, measure, traced
+from inventory_stats import StockTotals
+from product_columns import ProductColumns
+from product_database import ProductDatabase, _matches
+from product_models import ProductStatus
+
+# /api/stats without filters reads the running totals and needs neither
+QUERIES = {
+    "in stock": {"min_stock": 1},
+    "price <= 20": {"max_price": 20.0},
+    "discontinued": {"status": ProductStatus.DISCONTINUED},
+    "active, 100 <= price <= 110": {"min_price": 100.0, "max_price": 110.0, "status": ProductStatus.ACTIVE},
+}
+
+
+def _scan_stock_value(db: ProductDatabase, filters: dict) -> float:
+    totals = StockTotals()
+    for product in db.products.values():
+        if _matches(product, **filters):
+            totals.add(product)
+    return totals.total_stock_value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    objects_bytes, db = traced(lambda: build_catalog(args.products, max(1, args.products // 50)))
+    columns_bytes, columns = traced(lambda: ProductColumns.from_products(list(db.products.values())))
+    print(f"{args.products:,} products: object store {objects_bytes / 1e6:,.0f} MB, "
+          f"columnar mirror {columns_bytes / 1e6:,.0f} MB (arrays {columns.nbytes / 1e6:,.0f} MB)")
+
+    # Same products, aggregated through the mirror
+    columnar_db = ProductDatabase(seed_sample_data=False)
+    columnar_db.products = db.products
+    columnar_db._columns = columns
+
+    for label, filters in QUERIES.items():
+        scan_time, expected = measure(lambda: _scan_stock_value(db, filters), args.repeat)
+        index_time, by_index = measure(lambda: db.get_inventory_stats(**filters), args.repeat)
+        columnar_time, by_columns = measure(lambda: columnar_db.get_inventory_stats(**filters), args.repeat)
+        assert by_index.product_count == by_columns.product_count
+        for result in (by_index, by_columns):
+            assert math.isclose(result.total_stock_value, round(expected, 2), rel_tol=1e-9, abs_tol=0.01)
+        print(f"{label:<30} scan {scan_time * 1e3:>9,.1f} ms | indexes {index_time * 1e3:>9,.1f} ms | "
+              f"columnar {columnar_time * 1e3:>8,.2f} ms | {by_columns.product_count:,} products")
+
+
+if __name__ == "__main__":
+    main()
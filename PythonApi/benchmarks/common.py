@@ -0,0 +1,108 @@
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from product_database import ProductDatabase
+from product_models import CreateCategoryCommand, CreateProductCommand, ProductStatus
+
+
+def build_catalog(n_products: int, n_categories: int, seed: int = 42,
+                  db: Optional[ProductDatabase] = None) -> ProductDatabase:
+    """Add ``n_products`` spread over ``n_categories`` new categories to ``db`` (or a fresh database)"""
+    rng = random.Random(seed)
+    db = db if db is not None else ProductDatabase()
+    category_ids = [
+        db.create_category(CreateCategoryCommand(name=f"Category {i}")).id
+        for i in range(n_categories)
+    ]
+    statuses = list(ProductStatus)
+    for i in range(n_products):
+        db.create_product(CreateProductCommand.model_construct(
+            name=f"Product {i}",
+            sku=f"BENCH-{i:08d}",
+            stock=rng.randint(0, 500),
+            price=round(rng.uniform(1, 2000), 2),
+            category_id=rng.choice(category_ids),
+            status=rng.choice(statuses),
+            description=None,
+        ))
+    return db
+
+
+def measure(func: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    """Run ``func`` ``repeat`` times and return (mean seconds per call, last result)"""
+    result = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def traced(func: Callable[[], object]) -> Tuple[int, object]:
+    """Run ``func`` under tracemalloc and return (bytes still allocated when it returns, result)"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+# Where write_results stores files unless it is given a path
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def latency_summary(timings: List[float], elapsed: float) -> Dict[str, float]:
+    """Throughput over ``elapsed`` seconds and latency percentiles in ms of one operation's timings"""
+    timings = sorted(timings)
+
+    def percentile(fraction: float) -> float:
+        return timings[min(len(timings) - 1, int(len(timings) * fraction))] * 1e3 if timings else 0.0
+
+    return {
+        "count": len(timings),
+        "per_second": len(timings) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": timings[-1] * 1e3 if timings else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name: str, params: dict, runs: List[dict], output: Optional[str] = None) -> str:
+    """Store one suite run as JSON, tagged with the commit and interpreter, and return the path.
+
+    Files written by two commits can be compared with ``python -m benchmarks.compare``.
+    """
+    commit = _git_commit()
+    started = datetime.datetime.now(datetime.timezone.utc)
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{started:%Y%m%dT%H%M%S}-{commit or 'nogit'}.json")
+    document = {
+        "benchmark": name,
+        "commit": commit,
+        "created": started.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "runs": runs,
+    }
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2)
+    return output
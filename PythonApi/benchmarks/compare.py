@@ -0,0 +1,66 @@
+"""Compare two result files of store_suite or api_load, for example from two commits.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 10]
+
+Every operation measured at the same catalog size in both files is listed
+with its throughput and p50/p99 latency change. An operation whose
+throughput drops, or whose p99 grows, by more than --threshold percent is
+marked as a regression, and the exit status is then 1.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def _operations(path: str) -> Tuple[dict, Dict[Tuple[int, str], dict]]:
+    with open(path, encoding="utf-8") as file:
+        document = json.load(file)
+    operations = {}
+    for run in document["runs"]:
+        for name, summary in run["operations"].items():
+            operations[run["size"], name] = summary
+    return document, operations
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change reported as a regression")
+    args = parser.parse_args()
+
+    baseline, before = _operations(args.baseline)
+    candidate, after = _operations(args.candidate)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        raise SystemExit(f"Cannot compare {baseline['benchmark']} results with {candidate['benchmark']} results")
+    print(f"{baseline['benchmark']}: {baseline['commit']} ({baseline['created']}) -> "
+          f"{candidate['commit']} ({candidate['created']})")
+
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        throughput = _change(old["per_second"], new["per_second"])
+        p50 = _change(old["p50_ms"], new["p50_ms"])
+        p99 = _change(old["p99_ms"], new["p99_ms"])
+        regressed = throughput < -args.threshold or p99 > args.threshold
+        regressions += regressed
+        size, name = key
+        print(f"{size:>10,} {name:<16} {new['per_second']:>12,.0f}/s {throughput:>+7.1f}%  "
+              f"p50 {new['p50_ms']:>9.3f} ms {p50:>+7.1f}%  p99 {new['p99_ms']:>9.3f} ms {p99:>+7.1f}%"
+              f"{'  REGRESSION' if regressed else ''}")
+    missing = sorted(before.keys() ^ after.keys())
+    if missing:
+        print(f"Measured in only one file: {', '.join(f'{name} at {size:,}' for size, name in missing)}")
+    print(f"{regressions} regression(s) beyond {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure lock-free read throughput with and without writer threads running.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.concurrent_reads [--products 100000] [--readers 2] [--writers 1]
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.common import build_catalog
+from product_models import CreateProductCommand, ProductStatus, UpdateProductCommand
+
+READS = {
+    "get by id": lambda db, rng, ids: db.get_product_by_id(rng.choice(ids)),
+    "page of 100": lambda db, rng, ids: db.get_products_page(100, rng.choice(ids)),
+    "top 50 by price": lambda db, rng, ids: db.get_products_sorted("price", 50, descending=True),
+    "active, price <= 100": lambda db, rng, ids: db.get_products_page(100, status=ProductStatus.ACTIVE, max_price=100.0),
+    "stats": lambda db, rng, ids: db.get_inventory_stats(),
+}
+
+
+def _run(db, ids, category_ids, read, readers: int, writers: int, seconds: float):
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0] * writers
+
+    def reader(slot: int):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            read(db, rng, ids)
+            reads[slot] += 1
+
+    def writer(slot: int):
+        rng = random.Random(1000 + slot)
+        serial = 0
+        while not stop.is_set():
+            if rng.random() < 0.8:
+                db.update_product(rng.choice(ids), UpdateProductCommand(
+                    stock=rng.randint(0, 500), price=round(rng.uniform(1, 2000), 2)
+                ))
+            else:
+                serial += 1
+                product = db.create_product(CreateProductCommand.model_construct(
+                    name=f"Churn {slot}-{serial}", sku=f"CHURN-{slot}-{serial}", stock=1, price=1.0,
+                    category_id=rng.choice(category_ids), status=ProductStatus.ACTIVE, description=None
+                ))
+                db.delete_product(product.id)
+            writes[slot] += 1
+
+    threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    threads += [threading.Thread(target=writer, args=(slot,)) for slot in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds, sum(writes) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    db = build_catalog(args.products, max(1, args.products // 50))
+    ids = list(db.products)
+    category_ids = [category.id for category in db.get_all_categories()]
+    print(f"{args.products:,} products, {args.readers} reader thread(s)")
+
+    for label, read in READS.items():
+        alone, _ = _run(db, ids, category_ids, read, args.readers, 0, args.seconds)
+        shared, writes = _run(db, ids, category_ids, read, args.readers, args.writers, args.seconds)
+        print(f"{label:<22} reads alone {alone:>10,.0f}/s | with {args.writers} writer(s) {shared:>10,.0f}/s "
+              f"while writing {writes:>8,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
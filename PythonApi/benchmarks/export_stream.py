@@ -0,0 +1,64 @@
+"""Compare the streaming catalog export with building the full product list response.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.export_stream [--products 1000000]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.common import build_catalog
+from catalog_export import iter_csv, iter_ndjson
+
+
+def _full_list(db):
+    # What GET /api/products did before the response cache: one body built in memory
+    return json.dumps(jsonable_encoder(db.get_all_products()), separators=(",", ":")).encode("utf-8")
+
+
+def _stream(encode):
+    def run(db):
+        first = None
+        total = 0
+        start = time.perf_counter()
+        for chunk in encode(db):
+            if first is None:
+                first = time.perf_counter() - start
+            total += len(chunk)
+        return first, total
+    return run
+
+
+def _measure(label: str, func, db):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(db)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if isinstance(result, tuple):
+        first, size = result
+    else:
+        first, size = elapsed, len(result)
+    print(f"{label:<22} total {elapsed:7.2f} s | first byte {first * 1e3:9.1f} ms | "
+          f"peak {peak / 1e6:8.1f} MB | {size / 1e6:,.0f} MB out")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    db = build_catalog(args.products, max(1, args.products // 50))
+    print(f"{args.products:,} products")
+    _measure("full list response", _full_list, db)
+    _measure("export ndjson", _stream(iter_ndjson), db)
+    _measure("export csv", _stream(iter_csv), db)
+
+
+if __name__ == "__main__":
+    main()
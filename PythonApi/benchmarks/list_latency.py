@@ -0,0 +1,75 @@
+"""Compare list endpoint latency with response_model validation and with the orjson fast path.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.list_latency [--products 10000] [--requests 200]
+
+Requests go through FastAPI's TestClient against one catalog, first with
+the default encoding and then with INVENTORY_FAST_JSON's path switched on.
+The full list is measured on a cache miss: the response cache is cleared
+before each request.
+"""
+import argparse
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+import fast_json
+import main as api
+from benchmarks.common import build_catalog
+from pagination import encode_cursor
+from response_cache import ResponseCache
+
+ENDPOINTS = {
+    "full list (cache miss)": "/api/products",
+    "status=active, price<=500": "/api/products?status=active&max_price=500",
+    "page of 100": "/api/products?limit=100&after={cursor}",
+    "page of 1000": "/api/products?limit=1000&after={cursor}",
+    "top 100 by -price": "/api/products?sort=-price&limit=100",
+    "category, page of 1000": "/api/categories/{category_id}/products?limit=1000",
+    "search, 100 results": "/api/products/search?q=product&limit=100",
+}
+
+
+def _percentiles(client: TestClient, url: str, requests: int, clear_cache: bool):
+    timings = []
+    for _ in range(requests):
+        if clear_cache:
+            api.response_cache.clear()
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    api.product_db = build_catalog(args.products, max(1, args.products // 1000))
+    api.response_cache = ResponseCache()
+    client = TestClient(api.app)
+    # A cursor from the middle of the catalog, and the largest category
+    cursor = encode_cursor(args.products // 2)
+    category_id = max(api.product_db.get_all_categories(),
+                      key=lambda c: len(api.product_db.get_products_by_category(c.id))).id
+
+    print(f"{args.products:,} products, {args.requests} requests each; p50 / p99 in ms")
+    for label, url in ENDPOINTS.items():
+        url = url.format(cursor=cursor, category_id=category_id)
+        clear_cache = "cache miss" in label
+        api.fast_json = None
+        validated = _percentiles(client, url, args.requests, clear_cache)
+        api.fast_json = fast_json
+        fast = _percentiles(client, url, args.requests, clear_cache)
+        print(f"{label:<26} response_model {validated[0] * 1e3:>7.2f} / {validated[1] * 1e3:>7.2f} | "
+              f"fast path {fast[0] * 1e3:>7.2f} / {fast[1] * 1e3:>7.2f} | p50 x{validated[0] / fast[0]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
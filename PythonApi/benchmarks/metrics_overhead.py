@@ -0,0 +1,59 @@
+"""Measure what recording request metrics adds to one request.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.metrics_overhead [--requests 200000]
+
+A minimal ASGI app that sends an empty 200 response is called on the event
+loop as it is and wrapped by RequestMetrics.wrap, as instrument wraps every
+route. The difference is the cost of recording, without routing or handler
+work to hide it. For the cost against whole requests, compare
+``INVENTORY_METRICS=false`` and ``true`` runs of ``python -m benchmarks.api_load``.
+"""
+import argparse
+import asyncio
+import time
+
+from metrics import RequestMetrics
+
+SCOPE = {"type": "http"}
+
+
+async def _empty_response(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+async def _per_call(app, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(SCOPE, _receive, _send)
+    return (time.perf_counter() - start) / requests
+
+
+async def run(requests: int):
+    recorded = RequestMetrics().wrap("Benchmark", _empty_response)
+    for _ in range(3):
+        bare = await _per_call(_empty_response, requests)
+        wrapped = await _per_call(recorded, requests)
+        print(f"bare app {bare * 1e6:6.2f} us  recorded {wrapped * 1e6:6.2f} us  "
+              f"recording adds {(wrapped - bare) * 1e6:5.2f} us per request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure full-text product search against the inverted index.
+
+Names and descriptions are drawn from a Zipf-distributed vocabulary, so some
+terms match a large share of the catalog and most match only a few products.
+Run from the PythonApi directory:
+
+    python -m benchmarks.product_search [--products 1000000]
+"""
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks.common import measure
+from product_database import ProductDatabase
+from product_models import CreateCategoryCommand, CreateProductCommand, ProductStatus
+
+VOCABULARY_SIZE = 20_000
+
+
+def _vocabulary(rng: random.Random):
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "dor", "lin", "mex", "tra", "qui"]
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def build_text_catalog(n_products: int, seed: int = 42):
+    rng = random.Random(seed)
+    words = _vocabulary(rng)
+    rng.shuffle(words)
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    db = ProductDatabase(seed_sample_data=False)
+    category_ids = [db.create_category(CreateCategoryCommand(name=f"Category {i}")).id for i in range(100)]
+    statuses = list(ProductStatus)
+    for i in range(n_products):
+        text = rng.choices(words, cum_weights=cumulative, k=11)
+        db.create_product(CreateProductCommand.model_construct(
+            name=" ".join(text[:3]),
+            sku=f"SEARCH-{i:08d}",
+            stock=rng.randint(0, 500),
+            price=round(rng.uniform(1, 2000), 2),
+            category_id=rng.choice(category_ids),
+            status=rng.choice(statuses),
+            description=" ".join(text[3:]),
+        ))
+    return db, words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db, words = build_text_catalog(args.products)
+    print(f"Built {args.products:,} products with {db._search_index.term_count:,} indexed terms "
+          f"in {time.perf_counter() - start:.1f} s")
+
+    queries = {
+        "rare term": words[5000],
+        "mid-frequency term": words[200],
+        "common term": words[10],
+        "most common term": words[0],
+        "common + rare": f"{words[0]} {words[5000]}",
+        "two common terms": f"{words[0]} {words[1]}",
+        "three mid terms": f"{words[50]} {words[60]} {words[70]}",
+    }
+    for label, query in queries.items():
+        seconds, (page, next_after) = measure(lambda: db.search_products(query, args.limit), args.repeat)
+        matches = len(db._search_index._postings.get(query.split()[0], ()))
+        print(f"{label:<20} {seconds * 1e3:>8.2f} ms | first term in {matches:>9,} products | "
+              f"{len(page)} results{' (more)' if next_after else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare full scans with the sorted price/stock/status indexes for filtered product lists.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.range_filters [--products 1000000]
+"""
+import argparse
+import time
+
+from benchmarks.common import build_catalog, measure
+from product_database import _matches
+from product_models import ProductStatus, UpdateProductCommand
+
+QUERIES = {
+    "10 <= price <= 11": {"min_price": 10.0, "max_price": 11.0},
+    "price <= 20": {"max_price": 20.0},
+    "stock = 0": {"max_stock": 0},
+    "discontinued, stock >= 490": {"status": ProductStatus.DISCONTINUED, "min_stock": 490},
+    "price >= 1000, stock <= 100": {"min_price": 1000.0, "max_stock": 100},
+    # Broad ranges: pages walk id order instead of sorting the range
+    "stock >= 1": {"min_stock": 1},
+    "price <= 10000": {"max_price": 10000.0},
+}
+PAGES = 20
+
+
+def _walk_pages(db, filters: dict) -> int:
+    """Read the first PAGES pages of 100 one after the other, as a client following the cursor"""
+    after = None
+    for _ in range(PAGES):
+        page, after = db.get_products_page(100, after, **filters)
+        if after is None:
+            break
+    return after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = build_catalog(args.products, max(1, args.products // 50))
+    print(f"Built {args.products:,} products in {time.perf_counter() - start:.1f} s")
+
+    for label, filters in QUERIES.items():
+        scan_time, expected = measure(
+            lambda: sorted((p for p in db.products.values() if _matches(p, **filters)), key=lambda p: p.id),
+            args.repeat
+        )
+        index_time, result = measure(lambda: db.find_products(**filters), args.repeat)
+        assert [p.id for p in result] == [p.id for p in expected]
+        page_time, _ = measure(lambda: db.get_products_page(100, **filters), args.repeat)
+        walk_time, _ = measure(lambda: _walk_pages(db, filters), args.repeat)
+        print(f"{label:<30} scan {scan_time * 1e3:>8,.1f} ms | index {index_time * 1e3:>8,.2f} ms | "
+              f"first page of 100 {page_time * 1e3:>7,.2f} ms | {PAGES} pages {walk_time * 1e3:>7,.2f} ms | "
+              f"{len(result):>9,} rows")
+
+    # Each price change moves one entry of the price index
+    product_ids = list(db.products)[:10_000]
+    start = time.perf_counter()
+    for i, product_id in enumerate(product_ids):
+        db.update_product(product_id, UpdateProductCommand(price=float(i % 2000)))
+    elapsed = time.perf_counter() - start
+    print(f"price updates: {len(product_ids) / elapsed:,.0f}/s ({elapsed / len(product_ids) * 1e6:.1f} us each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measure memory per product: pydantic models vs. the compact records the store keeps.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.record_memory [--products 1000000]
+"""
+import argparse
+import random
+
+from benchmarks.common import build_catalog, traced
+from product_models import Product, ProductStatus
+from product_records import ProductRecord
+
+
+def _rows(count: int):
+    """The same field values build_catalog generates, without a store around them"""
+    rng = random.Random(42)
+    statuses = list(ProductStatus)
+    for i in range(count):
+        yield (i + 1, f"Product {i}", f"BENCH-{i:08d}", rng.randint(0, 500), round(rng.uniform(1, 2000), 2),
+               rng.randint(1, 1000), rng.choice(statuses), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.products
+
+    models_bytes, models = traced(lambda: [
+        Product(id=row[0], name=row[1], sku=row[2], stock=row[3], price=row[4], category_id=row[5],
+                status=row[6], description=row[7])
+        for row in _rows(n)
+    ])
+    del models
+    records_bytes, records = traced(lambda: [ProductRecord(*row) for row in _rows(n)])
+    del records
+    store_bytes, _ = traced(lambda: build_catalog(n, max(1, n // 50)))
+
+    print(f"{n:,} products, bytes per product (field values included)")
+    print(f"pydantic Product  {models_bytes / n:>8,.0f}")
+    print(f"ProductRecord     {records_bytes / n:>8,.0f}")
+    print(f"whole store       {store_bytes / n:>8,.0f}  ({store_bytes / 1e6:,.0f} MB, records plus every index)")
+
+
+if __name__ == "__main__":
+    main()
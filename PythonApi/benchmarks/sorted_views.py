@@ -0,0 +1,56 @@
+"""Compare sorting the catalog per request with paging through the maintained ordered views.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.sorted_views [--products 1000000]
+"""
+import argparse
+import time
+
+from benchmarks.common import build_catalog, measure
+from product_database import _matches
+from product_models import ProductStatus
+
+QUERIES = {
+    "top 50 by -price": ("price", True, {}),
+    "lowest 50 by stock": ("stock", False, {}),
+    "first 50 by name": ("name", False, {}),
+    "active, top 50 by -price": ("price", True, {"status": ProductStatus.ACTIVE}),
+    "stock <= 5, 50 by name": ("name", False, {"max_stock": 5}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = build_catalog(args.products, max(1, args.products // 50))
+    print(f"Built {args.products:,} products in {time.perf_counter() - start:.1f} s")
+
+    for label, (sort, descending, filters) in QUERIES.items():
+        def full_sort():
+            matches = [p for p in db.products.values() if _matches(p, **filters)]
+            matches.sort(key=lambda p: (getattr(p, sort), p.id), reverse=descending)
+            return matches[:args.limit]
+
+        sort_time, expected = measure(full_sort, args.repeat)
+        view_time, (page, after) = measure(
+            lambda: db.get_products_sorted(sort, args.limit, descending=descending, **filters), args.repeat
+        )
+        assert [p.id for p in page] == [p.id for p in expected]
+        # The hundredth page resumes from a cursor instead of skipping rows
+        for _ in range(98):
+            after = db.get_products_sorted(sort, args.limit, after, descending=descending, **filters)[1]
+        deep_time, _ = measure(
+            lambda: db.get_products_sorted(sort, args.limit, after, descending=descending, **filters), args.repeat
+        )
+        print(f"{label:<28} full sort {sort_time * 1e3:>8,.1f} ms | ordered view {view_time * 1e3:>6,.2f} ms | "
+              f"page 100 {deep_time * 1e3:>6,.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
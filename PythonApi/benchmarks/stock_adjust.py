@@ -0,0 +1,78 @@
+"""Compare read-modify-write stock updates with atomic adjustments on one hot SKU.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.stock_adjust [--threads 8] [--units 20000]
+"""
+import argparse
+import sys
+import threading
+import time
+
+from product_database import ProductDatabase
+from product_models import (
+    CreateCategoryCommand, CreateProductCommand, InsufficientStockError, ProductStatus, UpdateProductCommand
+)
+
+
+def _hot_product(units: int):
+    db = ProductDatabase(seed_sample_data=False)
+    category_id = db.create_category(CreateCategoryCommand(name="Hot")).id
+    product = db.create_product(CreateProductCommand(
+        name="Hot item", sku="HOT-001", stock=units, price=10.0, category_id=category_id, status=ProductStatus.ACTIVE
+    ))
+    return db, product.id
+
+
+def read_modify_write(db: ProductDatabase, product_id: int) -> bool:
+    """What a client does through GET and PUT: read the stock, then write it back one lower"""
+    stock = db.get_product_by_id(product_id).stock
+    if stock <= 0:
+        return False
+    db.update_product(product_id, UpdateProductCommand(stock=stock - 1))
+    return True
+
+
+def atomic_adjust(db: ProductDatabase, product_id: int) -> bool:
+    try:
+        db.adjust_stock(product_id, -1)
+    except InsufficientStockError:
+        return False
+    return True
+
+
+def _run(sell, threads: int, units: int):
+    db, product_id = _hot_product(units)
+    sold = [0] * threads
+
+    def buyer(slot: int):
+        while sell(db, product_id):
+            sold[slot] += 1
+
+    workers = [threading.Thread(target=buyer, args=(slot,)) for slot in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return sum(sold), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--units", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # Switch threads often, as a busy server would, so the races actually happen
+    sys.setswitchinterval(1e-5)
+    print(f"{args.units:,} units of one SKU, {args.threads} buyer threads")
+    for label, sell in (("read-modify-write", read_modify_write), ("atomic adjust", atomic_adjust)):
+        sold, elapsed = _run(sell, args.threads, args.units)
+        print(f"{label:<18} sold {sold:>8,} ({sold - args.units:>+7,} oversold) "
+              f"in {elapsed:.2f} s, {sold / elapsed:>9,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
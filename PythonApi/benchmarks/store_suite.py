@@ -0,0 +1,90 @@
+"""Benchmark ProductDatabase operations directly, per catalog size, and store the results as JSON.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.store_suite [--sizes 1000 10000 100000 1000000] [--operations 2000]
+
+Each operation is timed call by call, so the report has latency percentiles
+as well as throughput. Results go to benchmarks/results/ (or --output) and
+can be compared between commits with ``python -m benchmarks.compare``.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import build_catalog, latency_summary, write_results
+from product_models import CreateProductCommand, ProductStatus, UpdateProductCommand
+
+
+def _operations(db, n: int, rng: random.Random) -> dict:
+    """Operation name -> callable taking a call number, each drawing its arguments from ``rng``"""
+    ids = list(db.products)
+    category_ids = [category.id for category in db.get_all_categories()]
+    created = []
+
+    def create(i):
+        created.append(db.create_product(CreateProductCommand.model_construct(
+            name=f"Suite {i}", sku=f"SUITE-{i:08d}", stock=1, price=1.0,
+            category_id=rng.choice(category_ids), status=ProductStatus.ACTIVE, description=None
+        )).id)
+
+    def delete(i):
+        db.delete_product(created.pop())
+
+    return {
+        "get by id": lambda i: db.get_product_by_id(rng.choice(ids)),
+        "get by sku": lambda i: db.get_product_by_sku(f"BENCH-{rng.randrange(n):08d}"),
+        "page of 100": lambda i: db.get_products_page(100, rng.choice(ids)),
+        "filtered page": lambda i: db.get_products_page(100, status=ProductStatus.ACTIVE, max_price=500.0),
+        "sorted page": lambda i: db.get_products_sorted("price", 100, descending=True),
+        "search": lambda i: db.search_products(str(rng.randrange(n)), 20),
+        "category stats": lambda i: db.get_inventory_stats(rng.choice(category_ids)),
+        "update stock": lambda i: db.update_product(rng.choice(ids), UpdateProductCommand(stock=rng.randint(0, 500))),
+        "update price": lambda i: db.update_product(
+            rng.choice(ids), UpdateProductCommand(price=round(rng.uniform(1, 2000), 2))),
+        "adjust stock": lambda i: db.adjust_stock(rng.choice(ids), rng.choice((-1, 1)), fail_if_negative=False),
+        # Creates run before deletes, which remove what they created
+        "create": create,
+        "delete": delete,
+    }
+
+
+def run_size(n: int, operations: int, seed: int) -> dict:
+    start = time.perf_counter()
+    db = build_catalog(n, max(1, n // 50), seed=seed)
+    build_seconds = time.perf_counter() - start
+    results = {}
+    for name, operation in _operations(db, n, random.Random(seed)).items():
+        timings = []
+        clock = time.perf_counter
+        started = clock()
+        for i in range(operations):
+            before = clock()
+            operation(i)
+            timings.append(clock() - before)
+        results[name] = latency_summary(timings, clock() - started)
+    return {"size": n, "build_seconds": build_seconds, "operations": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--operations", type=int, default=2000, help="calls timed per operation and size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON file to write instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    runs = []
+    for n in args.sizes:
+        run = run_size(n, args.operations, args.seed)
+        runs.append(run)
+        print(f"{n:,} products (built in {run['build_seconds']:.1f} s)")
+        for name, summary in run["operations"].items():
+            print(f"  {name:<16} {summary['per_second']:>12,.0f}/s  p50 {summary['p50_ms']:>8.3f} ms  "
+                  f"p99 {summary['p99_ms']:>8.3f} ms")
+    path = write_results("store_suite", vars(args), runs, args.output)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Time seeding a store with a synthetic catalog, in bulk and through the create path.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.synthetic_seed [--sizes 10000 100000 1000000] [--categories 100] [--create-limit 100000]
+
+"bulk" is what INVENTORY_SEED=synthetic does: generate ProductRecords and
+load them with ProductDatabase.load_catalog, which builds every index in one
+pass. "create" adds the same products one at a time as validated
+CreateProductCommands through create_product, as a client or an import
+would. The create path is skipped above --create-limit products. "sqlite"
+seeds a new SQLite file.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from catalog_generator import generate_catalog
+from product_database import ProductDatabase
+from product_models import CreateCategoryCommand, CreateProductCommand
+from sqlite_database import SqliteProductDatabase
+
+
+def bulk(n: int, categories: int):
+    start = time.perf_counter()
+    db = ProductDatabase(seed_sample_data=False)
+    db.seed_catalog("synthetic", n, categories)
+    return time.perf_counter() - start, db
+
+
+def create(n: int, categories: int) -> float:
+    generated_categories, products = generate_catalog(n, categories)
+    start = time.perf_counter()
+    db = ProductDatabase(seed_sample_data=False)
+    for category in generated_categories:
+        db.create_category(CreateCategoryCommand(name=category.name, description=category.description))
+    for product in products:
+        db.create_product(CreateProductCommand(
+            name=product.name, sku=product.sku, stock=product.stock, price=product.price,
+            category_id=product.category_id, status=product.status, description=product.description,
+        ))
+    return time.perf_counter() - start
+
+
+def sqlite(n: int, categories: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        db = SqliteProductDatabase(os.path.join(directory, "seed.db"), seed="synthetic",
+                                   seed_products=n, seed_categories=categories)
+        elapsed = time.perf_counter() - start
+        db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--categories", type=int, default=100)
+    parser.add_argument("--create-limit", type=int, default=100_000, help="largest size timed through create_product")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        seconds, db = bulk(n, args.categories)
+        statuses = {status.value: len(ids) for status, ids in db._status_index.items()}
+        del db
+        gc.collect()
+        print(f"{n:>10,} products  bulk {seconds:>7.2f} s  ({n / seconds:,.0f}/s)  statuses {statuses}")
+        if n <= args.create_limit:
+            seconds = create(n, args.categories)
+            print(f"{'':>20}create {seconds:>7.2f} s  ({n / seconds:,.0f}/s)")
+            gc.collect()
+        seconds = sqlite(n, args.categories)
+        print(f"{'':>20}sqlite {seconds:>7.2f} s  ({n / seconds:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
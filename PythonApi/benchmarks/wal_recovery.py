@@ -0,0 +1,64 @@
+"""Measure write-ahead log throughput, snapshot cost and restart time of a durable ProductDatabase.
+
+Run from the PythonApi directory:
+
+    python -m benchmarks.wal_recovery [--products 1000000] [--tail 100000]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import build_catalog
+from product_database import ProductDatabase
+from product_models import UpdateProductCommand
+
+
+def _directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=100_000, help="updates left in the log after the snapshot")
+    parser.add_argument("--fsync-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="product-wal-")
+    try:
+        db = ProductDatabase.open_durable(directory, fsync_every=args.fsync_every, snapshot_every=0)
+        start = time.perf_counter()
+        build_catalog(args.products, max(1, args.products // 50), db=db)
+        elapsed = time.perf_counter() - start
+        print(f"create {args.products:,} products (logged, fsync every {args.fsync_every}): "
+              f"{elapsed:.2f} s ({args.products / elapsed:,.0f} creates/s)")
+
+        start = time.perf_counter()
+        db.snapshot()
+        print(f"snapshot: {time.perf_counter() - start:.2f} s, {_directory_size(directory) / 1e6:,.1f} MB")
+
+        rng = random.Random(1)
+        ids = [product.id for product in db.get_all_products()]
+        start = time.perf_counter()
+        for _ in range(args.tail):
+            db.update_product(rng.choice(ids), UpdateProductCommand(stock=rng.randint(0, 500)))
+        elapsed = time.perf_counter() - start
+        print(f"{args.tail:,} logged updates: {elapsed:.2f} s ({args.tail / elapsed:,.0f} updates/s)")
+        db.close()
+        del db
+
+        start = time.perf_counter()
+        restored = ProductDatabase.open_durable(directory)
+        elapsed = time.perf_counter() - start
+        print(f"restart (snapshot + {args.tail:,} log records): {elapsed:.2f} s, "
+              f"{len(restored.get_all_products()):,} products")
+        restored.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
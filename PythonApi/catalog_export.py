@@ -0,0 +1,51 @@
+import csv
+import io
+from typing import Iterator, List
+
+from product_models import ProductStatus
+from product_records import ProductRecord
+
+# Column order of CSV exports, also accepted by the importer
+CSV_FIELDS = ["id", "name", "sku", "stock", "price", "category_id", "status", "description"]
+
+# Products fetched from the store and encoded per chunk of the response
+EXPORT_CHUNK_SIZE = 1000
+
+
+def iter_product_chunks(db, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[ProductRecord]]:
+    """Yield every product in id order, ``chunk_size`` at a time.
+
+    Each chunk is a keyset page, so only one chunk is held at a time and
+    writes made during the export never shift or repeat rows.
+    """
+    after = None
+    while True:
+        page, after = db.get_products_page(chunk_size, after)
+        if page:
+            yield page
+        if after is None:
+            return
+
+
+def iter_ndjson(db, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode the catalog as newline-delimited JSON, one product per line"""
+    for page in iter_product_chunks(db, chunk_size):
+        yield b"".join(product.to_model().model_dump_json().encode("utf-8") + b"\n" for product in page)
+
+
+def iter_csv(db, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode the catalog as CSV with a header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    # The header goes out before the first page is read
+    writer.writerow(CSV_FIELDS)
+    yield buffer.getvalue().encode("utf-8")
+    for page in iter_product_chunks(db, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for p in page:
+            writer.writerow([
+                p.id, p.name, p.sku, p.stock, p.price, p.category_id, ProductStatus(p.status).value,
+                "" if p.description is None else p.description,
+            ])
+        yield buffer.getvalue().encode("utf-8")
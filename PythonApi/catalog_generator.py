@@ -0,0 +1,100 @@
+"""Synthetic catalogs for capacity tests: N products over M categories with realistic spreads.
+
+Category sizes follow a Zipf-like curve, so a few categories are large and
+most are small. Each category has its own typical price, and product prices
+are spread log-normally around it and end in .99. Stock is log-normal, with
+a share of products sold out. Active products with no stock are out of
+stock, as stock adjustments would leave them. The same seed always gives the
+same catalog. Products are built as ProductRecord objects directly, without
+pydantic, so a million of them take seconds.
+"""
+import math
+import random
+from typing import List, Tuple
+
+from product_models import ProductCategory, ProductStatus, status_for_stock
+from product_records import ProductRecord
+
+DEPARTMENTS = [
+    ("Electronics", "ELEC"), ("Clothing", "CLOTH"), ("Books", "BOOK"), ("Home & Garden", "HOME"),
+    ("Sports & Outdoors", "SPORT"), ("Food & Beverage", "FOOD"), ("Toys", "TOY"), ("Beauty", "BEAUTY"),
+    ("Automotive", "AUTO"), ("Office", "OFFICE"), ("Pet Supplies", "PET"), ("Tools", "TOOL"),
+]
+ADJECTIVES = [
+    "Classic", "Compact", "Deluxe", "Eco", "Essential", "Everyday", "Heavy-Duty", "Lightweight", "Modern",
+    "Portable", "Premium", "Pro", "Rugged", "Slim", "Smart", "Soft", "Ultra", "Vintage", "Wireless", "Organic",
+]
+MATERIALS = [
+    "Aluminum", "Bamboo", "Canvas", "Ceramic", "Cotton", "Glass", "Leather", "Linen", "Nylon", "Oak",
+    "Plastic", "Rubber", "Silicone", "Steel", "Wool",
+]
+NOUNS = [
+    "Backpack", "Blender", "Bottle", "Cable", "Chair", "Charger", "Desk", "Drill", "Headphones", "Jacket",
+    "Kettle", "Lamp", "Mat", "Mug", "Notebook", "Organizer", "Pan", "Pillow", "Speaker", "Tent", "Towel",
+    "Watch", "Wallet", "Sneakers",
+]
+USES = ["home", "travel", "the office", "outdoor use", "everyday use", "gifts", "kids", "professionals"]
+
+# Zipf exponent of the category sizes; 0 spreads products evenly
+CATEGORY_SKEW = 1.0
+# Share of products with no stock, and of products with a description
+SOLD_OUT_SHARE = 0.08
+DESCRIBED_SHARE = 0.7
+# Statuses drawn before stock is applied; active products with no stock go out of stock
+STATUS_WEIGHTS = {ProductStatus.ACTIVE: 0.92, ProductStatus.INACTIVE: 0.05, ProductStatus.DISCONTINUED: 0.03}
+
+
+def generate_catalog(product_count: int, category_count: int,
+                     seed: int = 42) -> Tuple[List[ProductCategory], List[ProductRecord]]:
+    """Categories with ids 1..category_count and products with ids 1..product_count"""
+    if category_count < 1 and product_count:
+        raise ValueError("A synthetic catalog with products needs at least one category")
+    rng = random.Random(seed)
+    categories = []
+    median_prices = [0.0]
+    sku_prefixes = [""]
+    for category_id in range(1, category_count + 1):
+        department, prefix = DEPARTMENTS[(category_id - 1) % len(DEPARTMENTS)]
+        noun = rng.choice(NOUNS)
+        categories.append(ProductCategory(
+            id=category_id, name=f"{department}: {noun}s {category_id}",
+            description=f"{noun}s and accessories from the {department.lower()} department",
+        ))
+        # Typical prices from about 5 to 500
+        median_prices.append(math.exp(rng.uniform(math.log(5), math.log(500))))
+        sku_prefixes.append(prefix)
+
+    cumulative, total = [], 0.0
+    for rank in range(1, category_count + 1):
+        total += 1 / rank ** CATEGORY_SKEW
+        cumulative.append(total)
+    # Largest categories get random ids rather than the lowest ones
+    category_ids = list(range(1, category_count + 1))
+    rng.shuffle(category_ids)
+    product_categories = rng.choices(category_ids, cum_weights=cumulative, k=product_count)
+    statuses = rng.choices(list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values()), k=product_count)
+
+    # Words are drawn for the whole catalog at once, which is much cheaper than per product
+    adjectives = rng.choices(ADJECTIVES, k=product_count)
+    materials = rng.choices(MATERIALS, k=product_count)
+    nouns = rng.choices(NOUNS, k=product_count)
+    models = rng.choices(range(100, 1000), k=product_count)
+    uses = rng.choices(USES, k=product_count)
+
+    random_value, lognormal = rng.random, rng.lognormvariate
+    products = []
+    for index in range(product_count):
+        product_id = index + 1
+        category_id = product_categories[index]
+        price = math.floor(median_prices[category_id] * lognormal(0, 0.5)) + 0.99
+        stock = 0 if random_value() < SOLD_OUT_SHARE else min(int(lognormal(3.5, 1.1)) + 1, 100_000)
+        adjective, material, noun = adjectives[index], materials[index], nouns[index]
+        description = None
+        if random_value() < DESCRIBED_SHARE:
+            description = f"{adjective} {noun.lower()} made of {material.lower()}, ideal for {uses[index]}"
+        products.append(ProductRecord(
+            product_id, f"{adjective} {material} {noun} {models[index]}",
+            f"{sku_prefixes[category_id]}-{product_id:08d}", stock, price, category_id,
+            status_for_stock(statuses[index], stock), description,
+        ))
+    return categories, products
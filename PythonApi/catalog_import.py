@@ -0,0 +1,266 @@
+import csv
+import json
+import logging
+import re
+from typing import Callable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from catalog_export import CSV_FIELDS
+from product_models import CreateProductCommand, ImportReport, ImportRowError
+
+logger = logging.getLogger(__name__)
+
+# Validated rows inserted per create_products call
+IMPORT_CHUNK_SIZE = 1000
+# Row errors listed in the report; further failures are only counted
+MAX_REPORTED_ERRORS = 1000
+# Lines one CSV record may span. A stray quote would otherwise swallow the rest of the file into one record
+MAX_CSV_RECORD_LINES = 100
+# Bytes one line may take. Without a line break the pending tail would otherwise grow with the whole upload
+MAX_LINE_BYTES = 1024 * 1024
+# Line endings accepted in uploads; neither byte occurs inside a multi-byte UTF-8 sequence
+LINE_END = re.compile(rb"\r\n|\r|\n")
+
+# Columns a CSV upload must have; id is ignored if present
+REQUIRED_CSV_FIELDS = [field for field in CSV_FIELDS if field not in ("id", "description")]
+
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+class InvalidImportError(ValueError):
+    """Raised when an upload cannot be imported at all, e.g. a CSV without the required columns"""
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+class ProductImporter:
+    """Incremental NDJSON/CSV product import.
+
+    Bytes are pushed in with feed() as they arrive and only the current
+    line and up to ``chunk_size`` validated rows are held at a time. Lines
+    end with LF, CRLF or a lone CR; a line longer than ``max_line_bytes``
+    fails as a row and is skipped up to its end. Each row
+    is validated against CreateProductCommand; full chunks go to
+    ``db.create_products``, which checks category ids and SKUs. Rows are
+    numbered by the line they start on, the CSV header being line 1.
+
+    A CSV record whose quoted field is still open after ``max_record_lines``
+    lines, or at the end of the upload, fails at the line that opened it;
+    the lines after that one are parsed again as records of their own.
+    """
+
+    def __init__(self, db, format: str, chunk_size: int = IMPORT_CHUNK_SIZE,
+                 max_errors: int = MAX_REPORTED_ERRORS, max_record_lines: int = MAX_CSV_RECORD_LINES,
+                 max_line_bytes: int = MAX_LINE_BYTES, on_progress: Optional[Callable[[ImportReport], None]] = None):
+        if format not in ("ndjson", "csv"):
+            raise InvalidImportError(f"Unsupported import format '{format}'")
+        self.db = db
+        self.format = format
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.max_record_lines = max_record_lines
+        self.max_line_bytes = max_line_bytes
+        self.on_progress = on_progress
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[ImportRowError] = []
+        # Pieces of the line not yet terminated, and their total size
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        # The last piece ended with CR, so an LF starting the next one completes a CRLF
+        self._after_cr = False
+        # Dropping the rest of a line that exceeded max_line_bytes
+        self._skipping = False
+        self._line = 0
+        self._started = False
+        self._header: Optional[List[str]] = None
+        # (line number, text) of a CSV record whose quoted field spans several lines, and its quote count
+        self._record: List[Tuple[int, str]] = []
+        self._record_quotes = 0
+        self._pending: List[Tuple[int, CreateProductCommand]] = []
+
+    def feed(self, data: bytes):
+        """Process the complete lines in ``data``; a trailing partial line waits for the next call"""
+        if not self._started:
+            data = b"".join(self._buffer) + data
+            self._buffer = []
+            if len(data) < len(UTF8_BOM) and UTF8_BOM.startswith(data):
+                self._buffer = [data]
+                return
+            self._started = True
+            if data.startswith(UTF8_BOM):
+                data = data[len(UTF8_BOM):]
+        if not data:
+            return
+        if self._after_cr and data.startswith(b"\n"):
+            data = data[1:]
+        self._after_cr = data.endswith(b"\r")
+        # Only the new bytes are split; the buffered pieces hold no line end
+        *lines, tail = LINE_END.split(data)
+        if lines:
+            if self._skipping:
+                self._skipping = False
+                lines = lines[1:]
+            else:
+                self._buffer.append(lines[0])
+                lines[0] = b"".join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            for line in lines:
+                # Fails the same whether the line arrived whole or in pieces
+                if len(line) > self.max_line_bytes:
+                    self._skip_long_line()
+                else:
+                    self._process_line(line)
+        if tail and not self._skipping:
+            self._buffer.append(tail)
+            self._buffered += len(tail)
+            if self._buffered > self.max_line_bytes:
+                self._buffer = []
+                self._buffered = 0
+                self._skipping = True
+                self._skip_long_line()
+
+    def finish(self) -> ImportReport:
+        """Process any unterminated last line, insert the remaining rows and return the report"""
+        if self._buffer:
+            self._process_line(b"".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        while self._record:
+            self._abandon_record("Unterminated quoted field")
+        self._flush()
+        return self.report()
+
+    def report(self) -> ImportReport:
+        return ImportReport(
+            rows=self.rows, created=self.created, failed=self.failed,
+            errors=sorted(self.errors, key=lambda error: error.line),
+            errors_truncated=self.failed > len(self.errors)
+        )
+
+    def _process_line(self, raw: bytes):
+        self._line += 1
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            if self._header is None and self.format == "csv":
+                raise InvalidImportError("CSV header is not valid UTF-8")
+            self.rows += 1
+            self._record_error(self._line, "Invalid UTF-8")
+            return
+        if self.format == "ndjson":
+            if text.strip():
+                self.rows += 1
+                self._parse_json(self._line, text)
+        else:
+            self._process_csv_line(self._line, text)
+
+    def _skip_long_line(self):
+        """Fail the line that grew past max_line_bytes, along with a CSV record left open before it"""
+        self._line += 1
+        if self.format == "csv":
+            if self._header is None:
+                raise InvalidImportError(f"CSV header is longer than {self.max_line_bytes} bytes")
+            while self._record:
+                self._abandon_record("Unterminated quoted field")
+        self.rows += 1
+        self._record_error(self._line, f"Line is longer than {self.max_line_bytes} bytes")
+
+    def _process_csv_line(self, line: int, text: str):
+        if not self._record:
+            if not text.strip():
+                return
+            self._record_quotes = 0
+        self._record.append((line, text))
+        # RFC 4180 doubles quotes inside fields, so an odd count means a quoted
+        # field continues on the next line. Counted per line, so a long record is not rescanned
+        self._record_quotes += text.count('"')
+        if self._record_quotes % 2:
+            if len(self._record) >= self.max_record_lines:
+                self._abandon_record(f"Quoted field not closed within {self.max_record_lines} lines")
+            return
+        record, self._record = self._record, []
+        self._process_csv_record(record[0][0], "\n".join(text for _, text in record))
+
+    def _abandon_record(self, detail: str):
+        """Fail the record at the line that opened its quote and parse the lines after it again"""
+        (line, _), *rest = self._record
+        self._record = []
+        if self._header is None:
+            raise InvalidImportError("CSV header has an unterminated quoted field")
+        self.rows += 1
+        self._record_error(line, detail)
+        for line, text in rest:
+            self._process_csv_line(line, text)
+
+    def _process_csv_record(self, line: int, record: str):
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as exc:
+            if self._header is None:
+                raise InvalidImportError(f"CSV header is not valid CSV: {exc}")
+            self.rows += 1
+            self._record_error(line, f"Invalid CSV: {exc}")
+            return
+        if self._header is None:
+            self._header = [value.strip() for value in values]
+            missing = [field for field in REQUIRED_CSV_FIELDS if field not in self._header]
+            if missing:
+                raise InvalidImportError(f"CSV header is missing columns: {', '.join(missing)}")
+            return
+        self.rows += 1
+        if len(values) != len(self._header):
+            self._record_error(line, f"Expected {len(self._header)} columns, found {len(values)}")
+            return
+        row = dict(zip(self._header, values))
+        row.pop("id", None)
+        if not row.get("description"):
+            row["description"] = None
+        self._validate(line, row)
+
+    def _parse_json(self, line: int, text: str):
+        try:
+            row = json.loads(text)
+        except ValueError:
+            self._record_error(line, "Invalid JSON")
+            return
+        if not isinstance(row, dict):
+            self._record_error(line, "Expected a JSON object")
+            return
+        self._validate(line, row)
+
+    def _validate(self, line: int, row: dict):
+        try:
+            command = CreateProductCommand.model_validate(row)
+        except ValidationError as exc:
+            self._record_error(line, _describe(exc))
+            return
+        self._pending.append((line, command))
+        if len(self._pending) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        results = self.db.create_products([command for _, command in self._pending])
+        for (line, _), result in zip(self._pending, results):
+            if isinstance(result, Exception):
+                self._record_error(line, str(result))
+            else:
+                self.created += 1
+        self._pending = []
+        logger.info("Import progress: %d rows, %d created, %d failed", self.rows, self.created, self.failed)
+        if self.on_progress is not None:
+            self.on_progress(self.report())
+
+    def _record_error(self, line: int, detail: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ImportRowError(line=line, detail=detail))
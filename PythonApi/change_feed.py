@@ -0,0 +1,268 @@
+"""In-process broadcast of store changes, streamed to clients as Server-Sent Events.
+
+The in-memory store publishes one ChangeEvent per mutation to its
+ChangeHub while it holds its write lock, so sequence numbers follow the
+order of the writes. An event is a create (with the new product or
+category), an update (with the fields that changed) or a delete. The hub
+keeps the latest ``history`` events, so a client that reconnects with the
+last sequence number it saw (SSE's Last-Event-ID) gets what it missed.
+
+Subscribers are grouped by event loop. A publish, from whichever thread
+wrote, queues the event for each loop and wakes the loop at most once,
+and the loop then hands the event to each of its subscribers. An idle
+subscriber is a coroutine waiting on an asyncio.Event with a small buffer,
+so thousands of them fit on one loop. Keep-alives come from one timer per
+loop rather than a timeout per subscriber. Each event is encoded once,
+however many subscribers it goes to.
+
+A subscriber's buffer holds at most ``buffer`` events. One that falls
+further behind, for example because its client reads too slowly, is
+dropped rather than slowing down the writers. Its stream ends with an
+``overflow`` event, and the client reconnects with Last-Event-ID. If the
+events it missed have left the history, the stream starts with a
+``reset`` event: the client has to reload what it shows, then follow the
+feed from there.
+"""
+import asyncio
+import json
+import secrets
+import threading
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from product_records import PRODUCT_FIELDS, ProductRecord
+
+# Events kept for clients that reconnect, and events buffered per subscriber before it is dropped
+DEFAULT_HISTORY = 10_000
+DEFAULT_BUFFER = 1_000
+# Seconds between keep-alive comments on an idle stream, so proxies keep the connection open
+HEARTBEAT_SECONDS = 15.0
+
+
+class ChangeEvent:
+    __slots__ = ("epoch", "seq", "type", "entity", "id", "data", "_encoded")
+
+    def __init__(self, epoch: str, seq: int, type: str, entity: str, id: int, data: Optional[dict]):
+        self.epoch = epoch
+        self.seq = seq
+        self.type = type
+        self.entity = entity
+        self.id = id
+        self.data = data
+        self._encoded: Optional[bytes] = None
+
+    def to_dict(self) -> dict:
+        event = {"seq": self.seq, "type": self.type, "entity": self.entity, "id": self.id}
+        if self.type == "update":
+            event["changes"] = self.data
+        elif self.type == "create":
+            event[self.entity] = self.data
+        return event
+
+    def encode(self) -> bytes:
+        """The event as one SSE message, encoded on first use and shared by every subscriber"""
+        if self._encoded is None:
+            self._encoded = sse_message(self.type, self.to_dict(), f"{self.epoch}:{self.seq}")
+        return self._encoded
+
+
+def sse_message(event: str, data: dict, event_id: Optional[str] = None) -> bytes:
+    message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+    return (f"id: {event_id}\n{message}" if event_id is not None else message).encode()
+
+
+def changed_fields(previous: ProductRecord, product: ProductRecord) -> dict:
+    return {field: getattr(product, field) for field in PRODUCT_FIELDS
+            if getattr(previous, field) != getattr(product, field)}
+
+
+class Subscription:
+    """One subscriber's buffer of events, filled and read on its event loop"""
+
+    def __init__(self, buffer: int):
+        self.buffer = buffer
+        self.events: deque = deque()
+        self.ready = asyncio.Event()
+        # Set when the buffer overflowed or the hub closed; the stream then ends
+        self.overflowed = False
+        self.closed = False
+        # Set by the loop's keep-alive timer
+        self.keep_alive = False
+
+    def deliver(self, events: List[ChangeEvent]):
+        if self.overflowed or self.closed:
+            return
+        self.events.extend(events)
+        if len(self.events) > self.buffer:
+            self.overflowed = True
+            self.events.clear()
+        self.ready.set()
+
+    async def next_events(self) -> List[ChangeEvent]:
+        """The events buffered so far, waiting for one; [] when woken for a keep-alive"""
+        if not (self.events or self.overflowed or self.closed or self.keep_alive):
+            await self.ready.wait()
+        self.ready.clear()
+        self.keep_alive = False
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+
+class _LoopSubscribers:
+    """Subscribers on one event loop, and the events waiting to be handed to them"""
+
+    __slots__ = ("loop", "subscriptions", "pending", "scheduled", "timer")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.subscriptions: Set[Subscription] = set()
+        self.pending: List[ChangeEvent] = []
+        self.scheduled = False
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class ChangeHub:
+    """Sequence-numbered change events with a bounded history, fanned out to subscribers"""
+
+    def __init__(self, history: int = DEFAULT_HISTORY, buffer: int = DEFAULT_BUFFER,
+                 heartbeat: float = HEARTBEAT_SECONDS):
+        self.buffer = buffer
+        self.heartbeat = heartbeat
+        # Event ids are "<epoch>:<seq>"; sequences restart with the process, the epoch tells them apart
+        self.epoch = secrets.token_hex(4)
+        self.sequence = 0
+        self._history: deque = deque(maxlen=history)
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopSubscribers] = {}
+        # Guards the sequence, the history and the subscriber lists; publishers and loops both take it
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(group.subscriptions) for group in self._loops.values())
+
+    def publish(self, type: str, entity: str, entity_id: int, data: Optional[dict] = None) -> ChangeEvent:
+        with self._lock:
+            self.sequence += 1
+            event = ChangeEvent(self.epoch, self.sequence, type, entity, entity_id, data)
+            self._history.append(event)
+            wake = []
+            for group in self._loops.values():
+                group.pending.append(event)
+                if not group.scheduled:
+                    group.scheduled = True
+                    wake.append(group)
+        for group in wake:
+            try:
+                group.loop.call_soon_threadsafe(self._flush, group)
+            except RuntimeError:
+                # The loop was closed without its subscribers unsubscribing
+                self._drop_loop(group)
+        return event
+
+    def _flush(self, group: _LoopSubscribers):
+        with self._lock:
+            events, group.pending, group.scheduled = group.pending, [], False
+            subscriptions = list(group.subscriptions)
+        for subscription in subscriptions:
+            subscription.deliver(events)
+
+    def _keep_alive(self, group: _LoopSubscribers):
+        """Wake every subscriber on the loop to send a keep-alive, then schedule the next round"""
+        for subscription in list(group.subscriptions):
+            subscription.keep_alive = True
+            subscription.ready.set()
+        group.timer = group.loop.call_later(self.heartbeat, self._keep_alive, group)
+
+    def _drop_loop(self, group: _LoopSubscribers):
+        with self._lock:
+            if self._loops.get(group.loop) is group:
+                del self._loops[group.loop]
+
+    def _resume_after(self, last_event_id: str) -> Optional[int]:
+        """Sequence number in an event id of this hub, or None for another process's id or garbage"""
+        epoch, _, seq = last_event_id.partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[Subscription, Optional[List[ChangeEvent]], int]:
+        """Register a subscriber on the running loop.
+
+        Returns (subscription, missed, sequence). ``missed`` holds the events
+        after ``last_event_id``, or is None when they cannot all be replayed:
+        the id is from another process or they have left the history. Events
+        after ``sequence`` reach the subscription.
+        """
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(self.buffer)
+        with self._lock:
+            group = self._loops.get(loop)
+            if group is None:
+                group = self._loops[loop] = _LoopSubscribers(loop)
+                group.timer = loop.call_later(self.heartbeat, self._keep_alive, group)
+            group.subscriptions.add(subscription)
+            missed = []
+            if last_event_id is not None:
+                after = self._resume_after(last_event_id)
+                oldest = self._history[0].seq if self._history else self.sequence + 1
+                if after is None or not oldest - 1 <= after <= self.sequence:
+                    missed = None
+                else:
+                    missed = [event for event in self._history if event.seq > after]
+            return subscription, missed, self.sequence
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber; called on the subscriber's loop"""
+        with self._lock:
+            for loop, group in list(self._loops.items()):
+                group.subscriptions.discard(subscription)
+                if not group.subscriptions:
+                    del self._loops[loop]
+                    group.timer.cancel()
+
+    def close(self):
+        """End every stream, for example on shutdown"""
+        with self._lock:
+            groups = list(self._loops.values())
+        for group in groups:
+            def close_all(group=group):
+                for subscription in list(group.subscriptions):
+                    subscription.closed = True
+                    subscription.ready.set()
+            try:
+                group.loop.call_soon_threadsafe(close_all)
+            except RuntimeError:
+                self._drop_loop(group)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """SSE messages: the events after ``last_event_id``, then live events until the client goes away.
+
+        A new client first gets a ``ready`` event, and a client whose missed
+        events cannot be replayed a ``reset`` event; both carry the id to
+        resume from once the client has loaded the current state.
+        """
+        subscription, missed, last = self.subscribe(last_event_id)
+        try:
+            if last_event_id is None or missed is None:
+                yield sse_message("ready" if missed is not None else "reset", {"seq": last}, f"{self.epoch}:{last}")
+            else:
+                for event in missed:
+                    yield event.encode()
+            while True:
+                events = await subscription.next_events()
+                for event in events:
+                    # Events published before this subscription can still be handed to it; they
+                    # were replayed above or predate the client's starting point
+                    if event.seq > last:
+                        yield event.encode()
+                        last = event.seq
+                if subscription.overflowed:
+                    yield sse_message("overflow", {"seq": last})
+                    return
+                if subscription.closed:
+                    return
+                if not events:
+                    yield b": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,35 @@
+"""Opt-in JSON encoding of store records with orjson (INVENTORY_FAST_JSON=true).
+
+Routes declare ``response_model`` so the OpenAPI schema describes their
+bodies, and FastAPI therefore validates every returned object into that
+model and dumps it again. The stores already hand out validated records, so
+with this path on the product routes return a ``FastJSONResponse`` instead,
+which FastAPI sends as is. The bytes are the same as the pydantic encoding.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from product_records import ProductRecord
+
+
+def _default(value: Any):
+    if isinstance(value, ProductRecord):
+        return value.to_dict()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content``, which may hold product records and pydantic models, as compact JSON"""
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson without validating the content"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
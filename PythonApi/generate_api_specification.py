@@ -9,4 +9,4 @@ with open('openapi.json', 'w') as f:
         openapi_version=app.openapi_version,
         description=app.description,
         routes=app.routes
-    ), f)
\ No newline at end of file
+    ), f, indent=2)
\ No newline at end of file
@@ -0,0 +1,62 @@
+# import_catalog.py
+"""Stream a CSV or NDJSON product file to a running API's import endpoint.
+
+    python import_catalog.py products.csv [--url http://localhost:8000] [--format csv]
+
+The file is sent in chunks, so files larger than memory can be imported.
+Upload progress is printed to stderr and the import report to stdout.
+"""
+
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+CHUNK_SIZE = 1 << 20
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _read_chunks(path: str, total: int):
+    sent = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sent += len(chunk)
+            print(f"\rsent {sent / 1e6:,.1f} / {total / 1e6:,.1f} MB", end="", file=sys.stderr, flush=True)
+            yield chunk
+    print(file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import products from a CSV or NDJSON file")
+    parser.add_argument("path")
+    parser.add_argument("--url", default=os.environ.get("INVENTORY_API_URL", "http://localhost:8000"))
+    parser.add_argument("--format", choices=sorted(CONTENT_TYPES),
+                        help="file format (default: from the file extension)")
+    args = parser.parse_args()
+
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    total = os.path.getsize(args.path)
+    request = urllib.request.Request(
+        f"{args.url.rstrip('/')}/api/products/import?format={file_format}",
+        data=_read_chunks(args.path, total),
+        headers={"Content-Type": CONTENT_TYPES[file_format], "Content-Length": str(total)},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            report = json.load(response)
+    except urllib.error.HTTPError as exc:
+        sys.exit(f"import failed: {exc.code} {exc.read().decode('utf-8', 'replace')}")
+
+    print(f"{report['rows']:,} rows: {report['created']:,} created, {report['failed']:,} failed")
+    for error in report["errors"]:
+        print(f"  line {error['line']}: {error['detail']}")
+    if report["errors_truncated"]:
+        print(f"  ... {report['failed'] - len(report['errors']):,} more errors not listed")
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
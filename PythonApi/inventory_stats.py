@@ -0,0 +1,52 @@
+from typing import Dict, Optional
+
+from product_models import InventoryStats, ProductStatus
+from product_records import ProductRecord
+
+STATUSES = list(ProductStatus)
+
+
+class StockTotals:
+    """Running totals over a set of products, adjusted in O(1) per change"""
+
+    __slots__ = ("product_count", "total_stock", "total_stock_value", "status_counts")
+
+    def __init__(self):
+        self.product_count = 0
+        self.total_stock = 0
+        self.total_stock_value = 0.0
+        self.status_counts: Dict[ProductStatus, int] = dict.fromkeys(STATUSES, 0)
+
+    def copy(self) -> "StockTotals":
+        totals = StockTotals()
+        totals.product_count = self.product_count
+        totals.total_stock = self.total_stock
+        totals.total_stock_value = self.total_stock_value
+        totals.status_counts = dict(self.status_counts)
+        return totals
+
+    def add(self, product: ProductRecord):
+        self.product_count += 1
+        self.total_stock += product.stock
+        self.total_stock_value += product.price * product.stock
+        self.status_counts[ProductStatus(product.status)] += 1
+
+    def remove(self, product: ProductRecord):
+        self.product_count -= 1
+        self.total_stock -= product.stock
+        self.status_counts[ProductStatus(product.status)] -= 1
+        if self.product_count:
+            self.total_stock_value -= product.price * product.stock
+        else:
+            # Start from an exact zero so rounding error cannot build up forever
+            self.total_stock_value = 0.0
+
+    def to_model(self, category_id: Optional[int] = None) -> InventoryStats:
+        return InventoryStats(
+            category_id=category_id,
+            product_count=self.product_count,
+            total_stock=self.total_stock,
+            # Adding and subtracting float products leaves noise below a cent
+            total_stock_value=round(self.total_stock_value, 2),
+            status_counts=dict(self.status_counts),
+        )
@@ -1,21 +1,89 @@
-from fastapi import FastAPI, HTTPException
+import functools
+import json
+import math
+from contextlib import asynccontextmanager
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from typing import List
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
+from typing import Callable, List, Literal, Optional, Tuple, Union
+from pydantic import TypeAdapter
 from product_models import (
-    Product, ProductCategory, CreateProductCommand, UpdateProductCommand,
-    CreateCategoryCommand, UpdateCategoryCommand
+    Product, ProductCategory, ProductStatus, CreateProductCommand, UpdateProductCommand,
+    CreateCategoryCommand, UpdateCategoryCommand, UpdateProductBatchItem, BatchItemResult, InventoryStats,
+    ResponseCacheStats, ImportReport, StockAdjustment, StockAdjustmentBatchItem, InvalidCategoryError,
+    ProductNotFoundError, SkuNotFoundError, InsufficientStockError, StockOutOfRangeError
 )
-from product_database import product_db
+from product_database import DuplicateSkuError, product_db
+from pagination import InvalidCursorError, decode_id_cursor, decode_score_cursor, decode_value_cursor, encode_cursor
+from response_cache import ResponseCache
+from settings import settings
+import metrics
+
+# With INVENTORY_FAST_JSON set, product routes hand store records straight to orjson
+# (see fast_json) instead of having FastAPI validate them against response_model
+fast_json = None
+if settings.fast_json:
+    import fast_json
+
+# Encoded bodies of the full list responses, keyed like the version counters
+response_cache = ResponseCache(settings.response_cache_bytes)
+# Serializers for cached list bodies; the routes keep response_model for the OpenAPI schema.
+# The stores hand out ProductRecord objects, which validate into Product by attribute
+PRODUCT_LIST = TypeAdapter(List[Product])
+CATEGORY_LIST = TypeAdapter(List[ProductCategory])
+
+# Upper bound on the page size clients may request with ?limit=
+MAX_PAGE_SIZE = 1000
+# Value type held in the cursor of each sort field
+SORT_CURSOR_TYPES = {"price": (int, float), "stock": int, "name": str}
+# Page size of search results when no limit is given, and the longest query accepted
+DEFAULT_SEARCH_LIMIT = 20
+MAX_QUERY_LENGTH = 200
+# Upper bound on the number of items in one batch request
+MAX_BATCH_SIZE = 10_000
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # End change feed streams that are still open
+    if product_db.changes is not None:
+        product_db.changes.close()
+    # Flush the write-ahead log (or close SQLite connections) on shutdown
+    product_db.close()
+
 
 app = FastAPI(
     title="Product Inventory API", 
     description="Product Inventory Management API with CRUD operations for products and categories",
     version="v1", 
-    docs_url="/swagger", 
-    redoc_url="/redoc"
+    # INVENTORY_DOCS=false drops the interactive docs; /openapi.json is still served
+    docs_url="/swagger" if settings.docs else None,
+    redoc_url="/redoc" if settings.docs else None,
+    lifespan=lifespan
 )
 
+
+def _prebuilt_openapi(path: str) -> Callable[[], dict]:
+    """app.openapi replacement that serves the document generate_api_specification.py wrote.
+
+    FastAPI otherwise builds the schema from every route on the first request
+    for it; the file is only read and parsed, once.
+    """
+    def openapi() -> dict:
+        if app.openapi_schema is None:
+            with open(path, encoding="utf-8") as file:
+                app.openapi_schema = json.load(file)
+        return app.openapi_schema
+    return openapi
+
+
+if settings.openapi_file:
+    app.openapi = _prebuilt_openapi(settings.openapi_file)
+
 # Configure CORS to allow all origins
 app.add_middleware(
     CORSMiddleware,
@@ -23,59 +91,403 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "ETag"],  # Let browsers read the pagination cursor and ETags
 )
 
-# Send interactive user to swagger page by default
+def _finite(value):
+    """``value`` with NaN and infinite floats, which JSON cannot carry, replaced by their names"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_finite(item) for item in value]
+    return value
+
+
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request: Request, exc: RequestValidationError):
+    """FastAPI's 422 response, safe for rejected NaN and infinite prices, which it echoes back"""
+    return JSONResponse(status_code=422, content={"detail": _finite(jsonable_encoder(exc.errors()))})
+
+
+# Send interactive user to swagger page by default, or to the schema when the docs are off
 @app.get("/")
 async def redirect_to_swagger():
-    return RedirectResponse(url="/swagger")
+    return RedirectResponse(url=app.docs_url or app.openapi_url)
+
+
+def _store_endpoint(writes: bool = False):
+    """Run a sync handler on the event loop while the store answers from memory, and in the
+    threadpool when its calls can block: reads on the SQLite store, writes on either durable store.
+
+    The check is made per request, so it follows whichever store ``product_db`` is.
+    """
+    def decorate(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        async def endpoint(*args, **kwargs):
+            if product_db.blocking_writes if writes else product_db.blocking_reads:
+                return await run_in_threadpool(handler, *args, **kwargs)
+            return handler(*args, **kwargs)
+        return endpoint
+    return decorate
+
+
+def _decode_after(after: Optional[str]) -> Optional[int]:
+    if after is None:
+        return None
+    try:
+        return decode_id_cursor(after)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _decode_score_after(after: Optional[str]) -> Optional[Tuple[float, int]]:
+    if after is None:
+        return None
+    try:
+        return decode_score_cursor(after)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _set_next_cursor(response: Response, next_after: Optional[Union[int, tuple]]):
+    if next_after is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_after)
+
+
+def _etag(key: str, entity_id: Optional[int] = None) -> str:
+    return f'"{product_db.epoch}-{product_db.get_version(key, entity_id)}"'
+
+
+def _not_modified(request: Request, response: Response, key: str, entity_id: Optional[int] = None,
+                  exists: Optional[Callable[[], bool]] = None) -> Optional[Response]:
+    """Set the ETag for ``key`` and return a 304 response if the client already has it.
+
+    The version is read before any data, so a write that lands in between
+    only makes the ETag older than the body and the next request refetches.
+    Routes for a single resource pass ``exists``, asked only before a 304: a
+    missing resource gets its 404 even for ``If-None-Match: *``, which only
+    matches a current representation, or for an ETag that was never issued.
+    """
+    etag = _etag(key, entity_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if (etag in candidates or "*" in candidates) and (exists is None or exists()):
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _category_exists(category_id: int) -> Callable[[], bool]:
+    return lambda: product_db.get_category_by_id(category_id) is not None
+
+
+def _encode_products(products) -> bytes:
+    """Encode store records as a JSON list of Product models"""
+    if fast_json is not None:
+        return fast_json.dumps(products)
+    return PRODUCT_LIST.dump_json(PRODUCT_LIST.validate_python(products))
+
+
+def _products_json(response: Response, content):
+    """Return store records for response_model to validate, or on the fast path a response
+    already encoded from them that carries the headers set on ``response``"""
+    if fast_json is None:
+        return content
+    return fast_json.FastJSONResponse(content, headers=dict(response.headers))
+
+
+def _cache_tag(key: tuple) -> str:
+    """Current ETag of a cache key: ("products", [sort]), ("categories",) or ("category_products", id)"""
+    return _etag(key[0], key[1] if key[0] == "category_products" else None)
+
+
+def _cached_json(response: Response, key: tuple, build: Callable[[], bytes]) -> Response:
+    """Serve the encoded body cached for ``key`` under the response's ETag, encoding it on a miss"""
+    etag = response.headers["ETag"]
+    response_cache.drop_stale(product_db.get_version(), _cache_tag)
+    body = response_cache.get_or_build(key, etag, build)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+# Status code reported for each per-item error of a batch request
+BATCH_ERROR_STATUS = {
+    DuplicateSkuError: 409,
+    InvalidCategoryError: 400,
+    ProductNotFoundError: 404,
+    SkuNotFoundError: 404,
+    InsufficientStockError: 409,
+    StockOutOfRangeError: 400,
+}
+
+
+def _batch_result(index: int, outcome, product_id: Optional[int] = None) -> BatchItemResult:
+    if isinstance(outcome, Exception):
+        return BatchItemResult(index=index, success=False, status_code=BATCH_ERROR_STATUS[type(outcome)],
+                               id=product_id, detail=str(outcome))
+    return BatchItemResult(index=index, success=True, status_code=200, id=outcome.id, product=outcome)
 
 
 # Product endpoints
 @app.get("/api/products", response_model=List[Product], tags=["Products"], operation_id="GetProducts")
-async def get_products():
-    """Get all products"""
-    return product_db.get_all_products()
+@_store_endpoint()
+def get_products(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of products to return"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    min_price: Optional[float] = Query(None, allow_inf_nan=False, description="Only products priced at least this much"),
+    max_price: Optional[float] = Query(None, allow_inf_nan=False, description="Only products priced at most this much"),
+    min_stock: Optional[int] = Query(None, description="Only products with at least this many units in stock"),
+    max_stock: Optional[int] = Query(None, description="Only products with at most this many units in stock"),
+    status: Optional[ProductStatus] = Query(None, description="Only products with this status"),
+    sort: Optional[Literal["price", "-price", "stock", "-stock", "name", "-name"]] = Query(
+        None, description="Order by this field and then id, descending with a leading '-'; id order by default"
+    ),
+):
+    """Get all products, or one page of products when limit is given, optionally filtered and sorted"""
+    if not_modified := _not_modified(request, response, "products"):
+        return not_modified
+    filters = dict(min_price=min_price, max_price=max_price, min_stock=min_stock, max_stock=max_stock, status=status)
+    filtered = any(value is not None for value in filters.values())
+    if sort is not None:
+        return _get_products_sorted(response, sort, limit, after, filtered, filters)
+    if limit is None and after is None:
+        if filtered:
+            return _products_json(response, product_db.find_products(**filters))
+        return _cached_json(response, ("products",), lambda: _encode_products(product_db.get_all_products()))
+    products, next_after = product_db.get_products_page(limit or MAX_PAGE_SIZE, _decode_after(after), **filters)
+    _set_next_cursor(response, next_after)
+    return _products_json(response, products)
+
+
+@app.get("/api/products/search", response_model=List[Product], tags=["Products"], operation_id="SearchProducts")
+@_store_endpoint()
+def search_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=MAX_QUERY_LENGTH, description="Words to look for in product names and descriptions"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of products to return"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+):
+    """Find products whose name or description contains every word of q, most relevant first"""
+    if not_modified := _not_modified(request, response, "products"):
+        return not_modified
+    products, next_after = product_db.search_products(q, limit, _decode_score_after(after))
+    _set_next_cursor(response, next_after)
+    return _products_json(response, products)
+
+
+def _get_products_sorted(response: Response, sort: str, limit: Optional[int], after: Optional[str],
+                         filtered: bool, filters: dict):
+    field, descending = sort.lstrip("-"), sort.startswith("-")
+    if limit is None and after is None:
+        if filtered:
+            products = product_db.get_products_sorted(field, descending=descending, **filters)[0]
+            return _products_json(response, products)
+        return _cached_json(
+            response, ("products", sort),
+            lambda: _encode_products(product_db.get_products_sorted(field, descending=descending)[0])
+        )
+    position = None
+    if after is not None:
+        try:
+            position = decode_value_cursor(after, SORT_CURSOR_TYPES[field])
+        except InvalidCursorError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    products, next_after = product_db.get_products_sorted(
+        field, limit or MAX_PAGE_SIZE, position, descending=descending, **filters
+    )
+    _set_next_cursor(response, next_after)
+    return _products_json(response, products)
+
+
+# Media type of each export format
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@app.get(
+    "/api/products/export", response_class=StreamingResponse, tags=["Products"], operation_id="ExportProducts",
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}, "description": "The catalog, streamed"}},
+)
+def export_products(format: Literal["ndjson", "csv"] = Query("ndjson", description="Export file format")):
+    """Stream every product in id order as NDJSON or CSV"""
+    # Export and import load on first use, keeping them and csv off the startup path
+    from catalog_export import iter_csv, iter_ndjson
+    encode = iter_ndjson if format == "ndjson" else iter_csv
+    return StreamingResponse(
+        encode(product_db), media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
+
+
+@app.post(
+    "/api/products/import", response_model=ImportReport, tags=["Products"], operation_id="ImportProducts",
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/x-ndjson": {"schema": {"type": "string"}},
+        "text/csv": {"schema": {"type": "string"}},
+    }}},
+)
+async def import_products(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Format of the request body"),
+):
+    """Create products from an NDJSON or CSV request body, streamed and inserted in batches"""
+    from catalog_import import InvalidImportError, ProductImporter
+    importer = ProductImporter(product_db, format)
+    try:
+        async for chunk in request.stream():
+            # Parsing, validation and inserts run off the event loop
+            await run_in_threadpool(importer.feed, chunk)
+        return await run_in_threadpool(importer.finish)
+    except InvalidImportError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/api/products/by-sku/{sku}", response_model=Product, tags=["Products"], operation_id="GetProductBySku")
+@_store_endpoint()
+def get_product_by_sku(sku: str, request: Request, response: Response):
+    """Get a product by SKU"""
+    if not_modified := _not_modified(
+        request, response, "products", exists=lambda: product_db.get_product_by_sku(sku) is not None
+    ):
+        return not_modified
+    product = product_db.get_product_by_sku(sku)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return _products_json(response, product)
+
+
+@app.post("/api/products/batch", response_model=List[BatchItemResult], tags=["Products"], operation_id="CreateProductsBatch")
+@_store_endpoint(writes=True)
+def create_products_batch(commands: List[CreateProductCommand] = Body(..., max_length=MAX_BATCH_SIZE)):
+    """Create several products in one request; each item reports its own status"""
+    outcomes = product_db.create_products(commands)
+    return [_batch_result(index, outcome) for index, outcome in enumerate(outcomes)]
+
+
+@app.put("/api/products/batch", response_model=List[BatchItemResult], tags=["Products"], operation_id="UpdateProductsBatch")
+@_store_endpoint(writes=True)
+def update_products_batch(items: List[UpdateProductBatchItem] = Body(..., max_length=MAX_BATCH_SIZE)):
+    """Update several products in one request; each item reports its own status"""
+    outcomes = product_db.update_products([(item.id, item.command) for item in items])
+    return [_batch_result(index, outcome, item.id) for index, (item, outcome) in enumerate(zip(items, outcomes))]
+
+
+@app.post("/api/products/batch/delete", response_model=List[BatchItemResult], tags=["Products"], operation_id="DeleteProductsBatch")
+@_store_endpoint(writes=True)
+def delete_products_batch(product_ids: List[int] = Body(..., max_length=MAX_BATCH_SIZE)):
+    """Delete several products by id in one request; each item reports its own status"""
+    deleted = product_db.delete_products(product_ids)
+    return [
+        BatchItemResult(index=index, success=True, status_code=200, id=product_id) if found else
+        BatchItemResult(index=index, success=False, status_code=404, id=product_id, detail="Product not found")
+        for index, (product_id, found) in enumerate(zip(product_ids, deleted))
+    ]
+
+
+@app.post("/api/products/batch/stock/adjust", response_model=List[BatchItemResult], tags=["Products"], operation_id="AdjustStockBatch")
+@_store_endpoint(writes=True)
+def adjust_stock_batch(items: List[StockAdjustmentBatchItem] = Body(..., max_length=MAX_BATCH_SIZE)):
+    """Adjust the stock of several products by SKU in one request; each item reports its own status"""
+    outcomes = product_db.adjust_stocks([(item.sku, item.delta, item.fail_if_negative) for item in items])
+    return [
+        _batch_result(index, outcome, getattr(outcome, "product_id", None))
+        for index, outcome in enumerate(outcomes)
+    ]
 
 
 @app.get("/api/products/{product_id}", response_model=Product, tags=["Products"], operation_id="GetProduct")
-async def get_product(product_id: int):
+@_store_endpoint()
+def get_product(product_id: int, request: Request, response: Response):
     """Get a product by ID"""
+    if not_modified := _not_modified(
+        request, response, "product", product_id, lambda: product_db.get_product_by_id(product_id) is not None
+    ):
+        return not_modified
     product = product_db.get_product_by_id(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return _products_json(response, product)
 
 
 @app.get("/api/categories/{category_id}/products", response_model=List[Product], tags=["Products"], operation_id="GetProductsByCategory")
-async def get_products_by_category(category_id: int):
-    """Get all products in a category"""
+@_store_endpoint()
+def get_products_by_category(
+    category_id: int,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of products to return"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+):
+    """Get all products in a category, or one page of them ordered by id when limit is given"""
+    if not_modified := _not_modified(request, response, "category_products", category_id, _category_exists(category_id)):
+        return not_modified
     category = product_db.get_category_by_id(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    return product_db.get_products_by_category(category_id)
+    if limit is None and after is None:
+        return _cached_json(
+            response, ("category_products", category_id),
+            lambda: _encode_products(product_db.get_products_by_category(category_id))
+        )
+    products, next_after = product_db.get_products_page(
+        limit or MAX_PAGE_SIZE, _decode_after(after), category_id=category_id
+    )
+    _set_next_cursor(response, next_after)
+    return _products_json(response, products)
 
 
 @app.post("/api/products", response_model=Product, tags=["Products"], operation_id="CreateProduct")
-async def create_product(command: CreateProductCommand):
+@_store_endpoint(writes=True)
+def create_product(command: CreateProductCommand):
     """Create a new product"""
-    product = product_db.create_product(command)
+    try:
+        product = product_db.create_product(command)
+    except DuplicateSkuError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     if not product:
         raise HTTPException(status_code=400, detail="Invalid category ID")
     return product
 
 
 @app.put("/api/products/{product_id}", response_model=Product, tags=["Products"], operation_id="UpdateProduct")
-async def update_product(product_id: int, command: UpdateProductCommand):
+@_store_endpoint(writes=True)
+def update_product(product_id: int, command: UpdateProductCommand):
     """Update a product"""
-    product = product_db.update_product(product_id, command)
+    try:
+        product = product_db.update_product(product_id, command)
+    except DuplicateSkuError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found or invalid category ID")
     return product
 
 
+@app.post("/api/products/{product_id}/stock/adjust", response_model=Product, tags=["Products"], operation_id="AdjustStock")
+@_store_endpoint(writes=True)
+def adjust_stock(product_id: int, adjustment: StockAdjustment):
+    """Add a signed delta to a product's stock atomically"""
+    try:
+        product = product_db.adjust_stock(product_id, adjustment.delta, adjustment.fail_if_negative)
+    except InsufficientStockError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except StockOutOfRangeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+
 @app.delete("/api/products/{product_id}", tags=["Products"], operation_id="DeleteProduct")
-async def delete_product(product_id: int):
+@_store_endpoint(writes=True)
+def delete_product(product_id: int):
     """Delete a product"""
     success = product_db.delete_product(product_id)
     if not success:
@@ -85,28 +497,47 @@ async def delete_product(product_id: int):
 
 # Category endpoints
 @app.get("/api/categories", response_model=List[ProductCategory], tags=["Categories"], operation_id="GetCategories")
-async def get_categories():
+@_store_endpoint()
+def get_categories(request: Request, response: Response):
     """Get all categories"""
-    return product_db.get_all_categories()
+    if not_modified := _not_modified(request, response, "categories"):
+        return not_modified
+    return _cached_json(response, ("categories",), lambda: CATEGORY_LIST.dump_json(product_db.get_all_categories()))
 
 
 @app.get("/api/categories/{category_id}", response_model=ProductCategory, tags=["Categories"], operation_id="GetCategory")
-async def get_category(category_id: int):
+@_store_endpoint()
+def get_category(category_id: int, request: Request, response: Response):
     """Get a category by ID"""
+    if not_modified := _not_modified(request, response, "category", category_id, _category_exists(category_id)):
+        return not_modified
     category = product_db.get_category_by_id(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
 
+@app.get("/api/categories/{category_id}/stats", response_model=InventoryStats, tags=["Categories"], operation_id="GetCategoryStats")
+@_store_endpoint()
+def get_category_stats(category_id: int, request: Request, response: Response):
+    """Get product count, units in stock, stock value and status counts for a category"""
+    if not_modified := _not_modified(request, response, "category_products", category_id, _category_exists(category_id)):
+        return not_modified
+    if not product_db.get_category_by_id(category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    return product_db.get_inventory_stats(category_id)
+
+
 @app.post("/api/categories", response_model=ProductCategory, tags=["Categories"], operation_id="CreateCategory")
-async def create_category(command: CreateCategoryCommand):
+@_store_endpoint(writes=True)
+def create_category(command: CreateCategoryCommand):
     """Create a new category"""
     return product_db.create_category(command)
 
 
 @app.put("/api/categories/{category_id}", response_model=ProductCategory, tags=["Categories"], operation_id="UpdateCategory")
-async def update_category(category_id: int, command: UpdateCategoryCommand):
+@_store_endpoint(writes=True)
+def update_category(category_id: int, command: UpdateCategoryCommand):
     """Update a category"""
     category = product_db.update_category(category_id, command)
     if not category:
@@ -115,9 +546,82 @@ async def update_category(category_id: int, command: UpdateCategoryCommand):
 
 
 @app.delete("/api/categories/{category_id}", tags=["Categories"], operation_id="DeleteCategory")
-async def delete_category(category_id: int):
+@_store_endpoint(writes=True)
+def delete_category(category_id: int):
     """Delete a category"""
     success = product_db.delete_category(category_id)
     if not success:
         raise HTTPException(status_code=404, detail="Category not found")
     return {"message": "Category deleted successfully"}
+
+
+# Inventory statistics
+@app.get("/api/stats", response_model=InventoryStats, tags=["Stats"], operation_id="GetInventoryStats")
+@_store_endpoint()
+def get_inventory_stats(
+    request: Request,
+    response: Response,
+    min_price: Optional[float] = Query(None, allow_inf_nan=False, description="Only products priced at least this much"),
+    max_price: Optional[float] = Query(None, allow_inf_nan=False, description="Only products priced at most this much"),
+    min_stock: Optional[int] = Query(None, description="Only products with at least this many units in stock"),
+    max_stock: Optional[int] = Query(None, description="Only products with at most this many units in stock"),
+    status: Optional[ProductStatus] = Query(None, description="Only products with this status"),
+):
+    """Get product count, units in stock, stock value and status counts for the whole catalog,
+    or for the products matching the same filters as the product list"""
+    if not_modified := _not_modified(request, response, "products"):
+        return not_modified
+    return product_db.get_inventory_stats(
+        min_price=min_price, max_price=max_price, min_stock=min_stock, max_stock=max_stock, status=status
+    )
+
+
+@app.get("/api/stats/cache", response_model=ResponseCacheStats, tags=["Stats"], operation_id="GetResponseCacheStats")
+async def get_response_cache_stats():
+    """Get hit and miss counters of the encoded response cache"""
+    return response_cache.stats()
+
+
+# Change feed
+@app.get(
+    "/api/changes", response_class=StreamingResponse, tags=["Changes"], operation_id="StreamChanges",
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Change events as Server-Sent Events"},
+        501: {"description": "The store has no change feed"},
+    },
+)
+async def stream_changes(
+    last_event_id: Optional[str] = Header(None, description="Id of the last event received, to resume after it")
+):
+    """Follow product and category creates, updates and deletes as they happen"""
+    if product_db.changes is None:
+        raise HTTPException(status_code=501, detail="The change feed needs the in-memory store")
+    return StreamingResponse(
+        product_db.changes.stream(last_event_id), media_type="text/event-stream",
+        # Proxies must pass each event on as it comes rather than buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Per-operation request metrics, recorded by wrappers around every route (see metrics)
+request_metrics = metrics.RequestMetrics()
+
+if settings.metrics:
+    # Kept out of the OpenAPI schema: it is for the scraper, not for API clients
+    @app.get("/metrics", include_in_schema=False, operation_id="GetMetrics")
+    def get_metrics():
+        """Request metrics, store gauges and response cache figures in the Prometheus text format"""
+        return Response(
+            metrics.render(request_metrics, product_db.get_store_metrics(), response_cache.stats()),
+            media_type=metrics.CONTENT_TYPE
+        )
+
+    # After the last route, so every route is wrapped
+    metrics.instrument(app, request_metrics)
+
+# Opt-in request profiles (see profiling); nothing is wrapped unless they are configured
+if settings.profile_dir and (settings.profile_token or settings.profile_sample_rate > 0):
+    from profiling import RequestProfiler
+    RequestProfiler(
+        settings.profile_dir, settings.profile_token, settings.profile_sample_rate, settings.profile_keep
+    ).instrument(app)
@@ -0,0 +1,180 @@
+"""Request metrics per operation and store gauges, in the Prometheus text format.
+
+``instrument`` wraps the ASGI app of every route, so each request is
+recorded under the operation id of the route it matched (``GetProducts``,
+``UpdateProduct``, ...). It counts requests, client errors (4xx), server
+errors (5xx or an unhandled exception) and requests in flight, and fills a
+latency histogram. The operation is known before the handler starts, so the
+in-flight gauge is per operation too. Requests that match no route are not
+recorded.
+
+Recording takes no lock. Each thread writes only its own shard of the
+counters, and a scrape of /metrics adds the shards up. Route wrappers run on
+the event loop thread, where nothing interleaves between two awaits, so a
+shard is never written by two requests at once.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List
+
+from starlette.routing import Route
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Upper bounds of the latency histogram buckets, in seconds; a +Inf bucket follows
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Help text of the store gauges, by the names get_store_metrics returns
+STORE_GAUGES = {
+    "products": "Products in the store",
+    "categories": "Categories in the store",
+    "version": "Store version, advanced by every mutation",
+    "sku_index_entries": "Entries of the SKU index",
+    "price_index_entries": "Entries of the price index",
+    "stock_index_entries": "Entries of the stock index",
+    "name_index_entries": "Entries of the name index",
+    "search_index_terms": "Distinct terms of the full-text index",
+    "search_index_documents": "Products in the full-text index",
+    "change_feed_subscribers": "Clients following the change feed",
+}
+
+
+class _OperationStats:
+    __slots__ = ("started", "finished", "client_errors", "server_errors", "buckets", "seconds")
+
+    def __init__(self):
+        self.started = 0
+        self.finished = 0
+        self.client_errors = 0
+        self.server_errors = 0
+        # Requests per latency bucket, not cumulative; the last one is +Inf
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.seconds = 0.0
+
+
+class RequestMetrics:
+    """Per-operation request counters, kept in one shard per thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[str, _OperationStats]] = []
+        # Only taken when a thread records its first request, and by snapshots
+        self._shards_lock = threading.Lock()
+
+    def _stats(self, operation_id: str) -> _OperationStats:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        stats = shard.get(operation_id)
+        if stats is None:
+            stats = shard[operation_id] = _OperationStats()
+        return stats
+
+    def wrap(self, operation_id: str, app: ASGIApp) -> ASGIApp:
+        """``app`` recording every HTTP request it serves under ``operation_id``"""
+        clock = time.perf_counter
+
+        async def recorded(scope: Scope, receive: Receive, send: Send):
+            if scope["type"] != "http":
+                await app(scope, receive, send)
+                return
+            stats = self._stats(operation_id)
+            stats.started += 1
+            status = 500
+
+            async def send_with_status(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                await send(message)
+
+            start = clock()
+            try:
+                await app(scope, receive, send_with_status)
+            except BaseException:
+                status = 500
+                raise
+            finally:
+                elapsed = clock() - start
+                stats.finished += 1
+                if status >= 500:
+                    stats.server_errors += 1
+                elif status >= 400:
+                    stats.client_errors += 1
+                stats.buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+                stats.seconds += elapsed
+
+        return recorded
+
+    def snapshot(self) -> Dict[str, _OperationStats]:
+        """Totals over every thread, by operation id"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        totals: Dict[str, _OperationStats] = {}
+        for shard in shards:
+            for operation_id, stats in list(shard.items()):
+                total = totals.get(operation_id)
+                if total is None:
+                    total = totals[operation_id] = _OperationStats()
+                total.started += stats.started
+                total.finished += stats.finished
+                total.client_errors += stats.client_errors
+                total.server_errors += stats.server_errors
+                total.buckets = [a + b for a, b in zip(total.buckets, stats.buckets)]
+                total.seconds += stats.seconds
+        return totals
+
+
+def instrument(app, metrics: RequestMetrics):
+    """Record every route of ``app`` in ``metrics``; call it after the last route is added"""
+    for route in app.routes:
+        if isinstance(route, Route):
+            route.app = metrics.wrap(getattr(route, "operation_id", None) or route.name, route.app)
+
+
+def _family(lines: List[str], name: str, kind: str, help_text: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render(metrics: RequestMetrics, store: Dict[str, float], cache: Dict[str, float]) -> str:
+    """The request metrics, store gauges and response cache figures as Prometheus text"""
+    operations = sorted(metrics.snapshot().items())
+    lines: List[str] = []
+    _family(lines, "inventory_http_requests_total", "counter", "Requests completed, by operation")
+    for operation_id, stats in operations:
+        lines.append(f'inventory_http_requests_total{{operation_id="{operation_id}"}} {stats.finished}')
+    _family(lines, "inventory_http_errors_total", "counter",
+            "Requests answered with a 4xx (client) or 5xx (server) status, by operation")
+    for operation_id, stats in operations:
+        lines.append(f'inventory_http_errors_total{{operation_id="{operation_id}",kind="client"}} {stats.client_errors}')
+        lines.append(f'inventory_http_errors_total{{operation_id="{operation_id}",kind="server"}} {stats.server_errors}')
+    _family(lines, "inventory_http_requests_in_flight", "gauge", "Requests being handled, by operation")
+    for operation_id, stats in operations:
+        lines.append(f'inventory_http_requests_in_flight{{operation_id="{operation_id}"}} '
+                     f'{stats.started - stats.finished}')
+    _family(lines, "inventory_http_request_duration_seconds", "histogram", "Request latency, by operation")
+    for operation_id, stats in operations:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats.buckets):
+            cumulative += count
+            lines.append(f'inventory_http_request_duration_seconds_bucket{{operation_id="{operation_id}",'
+                         f'le="{bound}"}} {cumulative}')
+        lines.append(f'inventory_http_request_duration_seconds_sum{{operation_id="{operation_id}"}} {stats.seconds!r}')
+        lines.append(f'inventory_http_request_duration_seconds_count{{operation_id="{operation_id}"}} {cumulative}')
+    for name, value in store.items():
+        _family(lines, f"inventory_store_{name}", "gauge", STORE_GAUGES.get(name, name.replace("_", " ")))
+        lines.append(f"inventory_store_{name} {value}")
+    _family(lines, "inventory_response_cache_lookups_total", "counter", "Response cache lookups, by result")
+    lines.append(f'inventory_response_cache_lookups_total{{result="hit"}} {cache["hits"]}')
+    lines.append(f'inventory_response_cache_lookups_total{{result="miss"}} {cache["misses"]}')
+    _family(lines, "inventory_response_cache_evictions_total", "counter", "Cached bodies evicted to stay within the byte limit")
+    lines.append(f"inventory_response_cache_evictions_total {cache['evictions']}")
+    _family(lines, "inventory_response_cache_entries", "gauge", "Encoded list bodies held by the response cache")
+    lines.append(f"inventory_response_cache_entries {cache['entries']}")
+    _family(lines, "inventory_response_cache_bytes", "gauge", "Bytes of the encoded list bodies in the cache")
+    lines.append(f"inventory_response_cache_bytes {cache['bytes']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,46 @@
+import base64
+import json
+from typing import Any, Tuple, Union
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client supplies a cursor that was not issued by this API"""
+
+
+def encode_cursor(position: Any) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor string"""
+    payload = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Decode a cursor produced by encode_cursor back into its keyset position"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """Decode a cursor that holds a single entity id"""
+    position = decode_cursor(cursor)
+    if not isinstance(position, int) or isinstance(position, bool):
+        raise InvalidCursorError("Invalid cursor")
+    return position
+
+
+def decode_value_cursor(cursor: str, value_type: Union[type, Tuple[type, ...]]) -> Tuple[Any, int]:
+    """Decode a cursor that holds a (sort value, entity id) position whose value is a ``value_type``"""
+    position = decode_cursor(cursor)
+    if (not isinstance(position, list) or len(position) != 2
+            or not isinstance(position[0], value_type) or isinstance(position[0], bool)
+            or not isinstance(position[1], int) or isinstance(position[1], bool)):
+        raise InvalidCursorError("Invalid cursor")
+    return position[0], position[1]
+
+
+def decode_score_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor that holds a (relevance score, entity id) position"""
+    score, entity_id = decode_value_cursor(cursor, (int, float))
+    return float(score), entity_id
@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from inventory_stats import StockTotals
+from product_models import ProductStatus
+from product_records import ProductRecord
+
+# Statuses are stored as small integer codes, in enum declaration order
+STATUS_CODES: Dict[ProductStatus, int] = {status: code for code, status in enumerate(ProductStatus)}
+
+INITIAL_CAPACITY = 1024
+
+
+class ProductColumns:
+    """Columnar mirror of the numeric product fields, one NumPy array per field.
+
+    Rows are kept dense: a deleted product's row is filled with the last row,
+    so row order is arbitrary. The mirror holds no strings; it answers
+    filtered aggregates, such as the stock value of every product under $20,
+    with vectorized operations.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.size = 0
+        self._rows: Dict[int, int] = {}
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity: int):
+        old_size = self.size
+        ids = np.empty(capacity, dtype=np.int64)
+        price = np.empty(capacity, dtype=np.float64)
+        stock = np.empty(capacity, dtype=np.int64)
+        category_id = np.empty(capacity, dtype=np.int64)
+        status = np.empty(capacity, dtype=np.int8)
+        if old_size:
+            ids[:old_size] = self.ids[:old_size]
+            price[:old_size] = self.price[:old_size]
+            stock[:old_size] = self.stock[:old_size]
+            category_id[:old_size] = self.category_id[:old_size]
+            status[:old_size] = self.status[:old_size]
+        self.ids, self.price, self.stock, self.category_id, self.status = ids, price, stock, category_id, status
+
+    @classmethod
+    def from_products(cls, products: List[ProductRecord]) -> "ProductColumns":
+        """Build the mirror in one pass per column"""
+        count = len(products)
+        columns = cls(capacity=max(count * 2, INITIAL_CAPACITY))
+        columns.ids[:count] = np.fromiter((p.id for p in products), dtype=np.int64, count=count)
+        columns.price[:count] = np.fromiter((p.price for p in products), dtype=np.float64, count=count)
+        columns.stock[:count] = np.fromiter((p.stock for p in products), dtype=np.int64, count=count)
+        columns.category_id[:count] = np.fromiter((p.category_id for p in products), dtype=np.int64, count=count)
+        columns.status[:count] = np.fromiter((STATUS_CODES[p.status] for p in products), dtype=np.int8, count=count)
+        columns.size = count
+        columns._rows = {product_id: row for row, product_id in enumerate(columns.ids[:count].tolist())}
+        return columns
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays (excluding the id -> row map)"""
+        return self.ids.nbytes + self.price.nbytes + self.stock.nbytes + self.category_id.nbytes + self.status.nbytes
+
+    def put(self, product: ProductRecord):
+        """Insert or overwrite the row for ``product``"""
+        row = self._rows.get(product.id)
+        if row is None:
+            if self.size == len(self.ids):
+                self._allocate(len(self.ids) * 2)
+            row = self.size
+            self.size += 1
+            self._rows[product.id] = row
+            self.ids[row] = product.id
+        self.price[row] = product.price
+        self.stock[row] = product.stock
+        self.category_id[row] = product.category_id
+        self.status[row] = STATUS_CODES[ProductStatus(product.status)]
+
+    def remove(self, product_id: int):
+        row = self._rows.pop(product_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            for column in (self.ids, self.price, self.stock, self.category_id, self.status):
+                column[row] = column[last]
+            self._rows[int(self.ids[row])] = row
+        self.size = last
+
+    def mask(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+             category_id: Optional[int] = None, status: Optional[ProductStatus] = None,
+             min_stock: Optional[int] = None, max_stock: Optional[int] = None) -> np.ndarray:
+        """Boolean mask over the live rows matching every given condition"""
+        size = self.size
+        mask = np.ones(size, dtype=bool)
+        if min_price is not None:
+            mask &= self.price[:size] >= min_price
+        if max_price is not None:
+            mask &= self.price[:size] <= max_price
+        if category_id is not None:
+            mask &= self.category_id[:size] == category_id
+        if status is not None:
+            mask &= self.status[:size] == STATUS_CODES[ProductStatus(status)]
+        if min_stock is not None:
+            mask &= self.stock[:size] >= min_stock
+        if max_stock is not None:
+            mask &= self.stock[:size] <= max_stock
+        return mask
+
+    def totals(self, mask: np.ndarray) -> StockTotals:
+        """Count, units in stock, stock value and status counts of the rows in ``mask``"""
+        size = self.size
+        stock = self.stock[:size][mask]
+        totals = StockTotals()
+        totals.product_count = int(stock.size)
+        # Stock goes up to 2**63 - 1, where an int64 sum could wrap; such sums are taken in Python
+        if stock.size * float(np.abs(stock.astype(np.float64)).max(initial=0)) < 2**62:
+            totals.total_stock = int(stock.sum())
+        else:
+            totals.total_stock = sum(stock.tolist())
+        totals.total_stock_value = float(np.dot(self.price[:size][mask], stock))
+        counts = np.bincount(self.status[:size][mask], minlength=len(STATUS_CODES))
+        totals.status_counts = {status: int(counts[code]) for status, code in STATUS_CODES.items()}
+        return totals
@@ -1,27 +1,249 @@
-from typing import List, Dict, Optional
-from product_models import Product, ProductCategory, ProductStatus, CreateProductCommand, UpdateProductCommand, CreateCategoryCommand, UpdateCategoryCommand
+import gc
+import heapq
+import math
+import secrets
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Any, List, Dict, Optional, Tuple, Union
+from product_models import (
+    ProductCategory, ProductStatus, CreateProductCommand, UpdateProductCommand, CreateCategoryCommand, UpdateCategoryCommand,
+    InventoryStats, DuplicateSkuError, InvalidCategoryError, ProductNotFoundError, SkuNotFoundError,
+    InsufficientStockError, StockOutOfRangeError, INT64_MIN, INT64_MAX, status_for_stock
+)
+from change_feed import ChangeHub, changed_fields
+from inventory_stats import StockTotals
+from product_records import ProductRecord
+from range_index import RangeIndex
+from search_index import SearchIndex
+from sorted_lists import iter_values_after
+from product_wal import (
+    ProductJournal, OP_PUT_CATEGORY, OP_DELETE_CATEGORY, OP_PUT_PRODUCT, OP_DELETE_PRODUCT,
+    encode_put_category, encode_delete_category, encode_put_product, encode_delete_product
+)
+from sample_data import SAMPLE_CATEGORIES, SAMPLE_PRODUCTS
+from settings import Settings, settings
 
 
 class ProductDatabase:
-    def __init__(self):
+    """In-memory product store.
+
+    Products are held as compact ProductRecord objects (see product_records);
+    the pydantic models are only built by the API layer.
+
+    Writers are serialized by a lock; readers take no lock and never wait for
+    a writer. Products and categories are never changed once stored: an
+    update stores a new object in place of the old one, so a reader holds
+    either the old record or the new one and never a partly updated record.
+    Running totals are replaced the same way. Sorted indexes are changed in
+    place and read in chunks that resume from the last entry rather than a
+    position (see sorted_lists), and every id read from an index is checked
+    against the product it names before it is returned.
+    """
+
+    # Reads never touch the disk; see blocking_writes and main._store_endpoint
+    blocking_reads = False
+
+    def __init__(self, seed_sample_data: bool = True, columnar: bool = False):
         self.categories: Dict[int, ProductCategory] = {}
-        self.products: Dict[int, Product] = {}
+        self.products: Dict[int, ProductRecord] = {}
+        # Product ids in ascending order, used for keyset pagination. Ids are
+        # handed out monotonically so creates append; deleted ids stay in place
+        # and are skipped on read until the list is compacted.
+        self._product_ids: List[int] = []
+        # Secondary index: category id -> ascending ids of the products in it
+        self._category_index: Dict[int, List[int]] = {}
+        # Unique index: SKU -> product id
+        self._sku_index: Dict[str, int] = {}
+        # Secondary index: status -> ascending ids of the products with it
+        self._status_index: Dict[ProductStatus, List[int]] = {}
+        # Range indexes: product ids ordered by price, stock and name. They also
+        # serve as the ordered views behind sorted listings
+        self._price_index = RangeIndex()
+        self._stock_index = RangeIndex()
+        self._name_index = RangeIndex()
+        # Inverted index over product names and descriptions for full-text search
+        self._search_index = SearchIndex()
+        # Running totals for the stats endpoints, overall and per category id
+        self._totals = StockTotals()
+        self._category_totals: Dict[int, StockTotals] = {}
         self.next_category_id = 1
         self.next_product_id = 1
-        self._initialize_sample_data()
+        # Monotonic version counters. ``version`` counts every mutation of the
+        # store; the other maps record the store version at which a list
+        # ("products", "categories") or an entity last changed. The epoch tells
+        # this instance's counters apart from those of earlier processes.
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+        self._versions: Dict[str, int] = {}
+        self._entity_versions: Dict[str, Dict[int, int]] = {"product": {}, "category": {}, "category_products": {}}
+        # Optional NumPy mirror of the numeric fields for vectorized scans
+        self._columns = None
+        if columnar:
+            from product_columns import ProductColumns
+            self._columns = ProductColumns()
+        # Serializes writers, including the id counters; readers never take it
+        self._lock = threading.RLock()
+        # Write-ahead log, only present for databases opened with open_durable
+        self._journal: Optional[ProductJournal] = None
+        # Change events of the create, update and delete calls, for the change feed. Seeding,
+        # bulk loads and log replay do not publish
+        self.changes = ChangeHub()
+        if seed_sample_data:
+            self._initialize_sample_data()
+
+    @classmethod
+    def open_durable(cls, directory: str, fsync_every: int = 1, snapshot_every: int = 100_000,
+                     columnar: bool = False, seed: str = "sample", seed_products: int = 100_000,
+                     seed_categories: int = 100, seed_random: int = 42) -> "ProductDatabase":
+        """Open a database whose state is kept in ``directory`` by a write-ahead log and snapshots.
+
+        The latest snapshot is loaded and the log written after it is replayed.
+        An empty directory is seeded as ``seed`` says (see seed_catalog) and
+        snapshotted, so the next start recovers it instead.
+        """
+        db = cls(seed_sample_data=False, columnar=columnar)
+        journal = ProductJournal(directory, fsync_every=fsync_every, snapshot_every=snapshot_every)
+        with _gc_paused():
+            recovered = journal.recover(db._load_snapshot, db._apply_journal_record)
+        db._journal = journal
+        if not recovered:
+            db.seed_catalog(seed, seed_products, seed_categories, seed_random)
+            db.snapshot()
+        return db
+
+    def seed_catalog(self, mode: str = "sample", products: int = 100_000, categories: int = 100,
+                     random_seed: int = 42):
+        """Fill an empty store: "none" leaves it empty, "sample" adds the sample data and
+        "synthetic" a generated catalog of ``products`` over ``categories`` (see catalog_generator)"""
+        if mode == "sample":
+            with self._lock:
+                self._initialize_sample_data()
+        elif mode == "synthetic":
+            from catalog_generator import generate_catalog
+            with _gc_paused():
+                self.load_catalog(*generate_catalog(products, categories, seed=random_seed))
+        elif mode != "none":
+            raise ValueError(f"Unknown seed mode: {mode!r}")
+
+    def load_catalog(self, categories: List[ProductCategory], products: List[ProductRecord]):
+        """Load a whole catalog into an empty store, building every index in one pass.
+
+        The records are taken as they are: nothing is validated and nothing is
+        written to the log, so the caller vouches for unique ids and SKUs and
+        existing categories, and a durable store should be snapshotted after.
+        """
+        with self._lock:
+            if self.products or self.categories:
+                raise ValueError("load_catalog needs an empty store")
+            with _gc_paused():
+                self._load_snapshot(
+                    categories, products,
+                    max((category.id for category in categories), default=0) + 1,
+                    max((product.id for product in products), default=0) + 1,
+                )
+            self.version += 1
+            self._versions["products"] = self._versions["categories"] = self.version
+
+    def _load_snapshot(self, categories: List[ProductCategory], products: List[ProductRecord],
+                       next_category_id: int, next_product_id: int):
+        self.categories = {category.id: category for category in categories}
+        self.products = {product.id: product for product in products}
+        self.next_category_id = next_category_id
+        self.next_product_id = next_product_id
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        """Build every secondary index from scratch in one pass over the products"""
+        self._product_ids = sorted(self.products)
+        self._category_index = {}
+        self._sku_index = {}
+        self._status_index = {}
+        totals = StockTotals()
+        category_totals: Dict[int, StockTotals] = {}
+        for product_id in self._product_ids:
+            product = self.products[product_id]
+            self._category_index.setdefault(product.category_id, []).append(product_id)
+            self._status_index.setdefault(product.status, []).append(product_id)
+            self._sku_index[product.sku] = product_id
+            totals.add(product)
+            category = category_totals.get(product.category_id)
+            if category is None:
+                category = category_totals[product.category_id] = StockTotals()
+            category.add(product)
+        self._totals = totals
+        self._category_totals = category_totals
+        self._price_index = RangeIndex.from_pairs((p.price, p.id) for p in self.products.values())
+        self._stock_index = RangeIndex.from_pairs((p.stock, p.id) for p in self.products.values())
+        self._name_index = RangeIndex.from_pairs((p.name, p.id) for p in self.products.values())
+        self._search_index = SearchIndex.from_products(list(self.products.values()))
+        if self._columns is not None:
+            from product_columns import ProductColumns
+            self._columns = ProductColumns.from_products(list(self.products.values()))
+
+    def _apply_journal_record(self, op: int, value):
+        if op == OP_PUT_PRODUCT:
+            previous = self.products.get(value.id)
+            if previous is None:
+                self._add_product(value)
+            else:
+                self.products[value.id] = value
+                self._reindex_product(previous, value)
+            self.next_product_id = max(self.next_product_id, value.id + 1)
+        elif op == OP_DELETE_PRODUCT:
+            if value in self.products:
+                self._remove_product(value)
+        elif op == OP_PUT_CATEGORY:
+            self.categories[value.id] = value
+            self.next_category_id = max(self.next_category_id, value.id + 1)
+            self._touch_category(value.id)
+        elif op == OP_DELETE_CATEGORY:
+            self.categories.pop(value, None)
+            self._touch_category(value)
+
+    # Writers append to the log while they hold the lock, so it keeps the order of the writes,
+    # and wait for the fsync after releasing it, so writers do not queue behind the disk
+    def _journal_write(self, payload: bytes) -> Optional[int]:
+        return self._journal_write_many([payload])
+
+    def _journal_write_many(self, payloads: List[bytes]) -> Optional[int]:
+        """Append records to the log; returns the position to pass to _journal_sync"""
+        if self._journal is None or not payloads:
+            return None
+        position = self._journal.append_many(payloads)
+        if self._journal.snapshot_due:
+            self.snapshot(background=True)
+        return position
+
+    def _journal_sync(self, position: Optional[int]):
+        journal = self._journal
+        if position is not None and journal is not None:
+            journal.sync_to(position)
+
+    @property
+    def blocking_writes(self) -> bool:
+        """Whether writes wait for the disk (see main._store_endpoint)"""
+        return self._journal is not None
+
+    def snapshot(self, background: bool = False):
+        """Write a snapshot of the store so the write-ahead log can be truncated"""
+        if self._journal is None:
+            return
+        with self._lock:
+            self._journal.snapshot(
+                list(self.categories.values()), list(self.products.values()),
+                self.next_category_id, self.next_product_id, background=background
+            )
+
+    def close(self):
+        """Flush the write-ahead log to disk and release it"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
 
     def _initialize_sample_data(self):
-        # Sample categories
-        sample_categories = [
-            {"name": "Electronics", "description": "Electronic devices and accessories"},
-            {"name": "Clothing", "description": "Apparel and fashion items"},
-            {"name": "Books", "description": "Books and educational materials"},
-            {"name": "Home & Garden", "description": "Home improvement and gardening supplies"},
-            {"name": "Sports & Outdoors", "description": "Sports equipment and outdoor gear"},
-            {"name": "Food & Beverage", "description": "Food items and beverages"}
-        ]
-        
-        for category_data in sample_categories:
+        for category_data in SAMPLE_CATEGORIES:
             category = ProductCategory(
                 id=self.next_category_id,
                 name=category_data["name"],
@@ -30,49 +252,155 @@ class ProductDatabase:
             self.categories[self.next_category_id] = category
             self.next_category_id += 1
 
-        # Sample products
-        sample_products = [
-            {"name": "Smartphone", "sku": "ELEC-001", "stock": 50, "price": 699.99, "category_id": 1, "status": ProductStatus.ACTIVE, "description": "Latest smartphone with advanced features"},
-            {"name": "Laptop", "sku": "ELEC-002", "stock": 25, "price": 1299.99, "category_id": 1, "status": ProductStatus.ACTIVE, "description": "High-performance laptop for work and gaming"},
-            {"name": "Wireless Headphones", "sku": "ELEC-003", "stock": 100, "price": 199.99, "category_id": 1, "status": ProductStatus.ACTIVE, "description": "Noise-canceling wireless headphones"},
-            {"name": "Smart Watch", "sku": "ELEC-004", "stock": 0, "price": 299.99, "category_id": 1, "status": ProductStatus.OUT_OF_STOCK, "description": "Fitness tracking smartwatch"},
-            
-            {"name": "T-Shirt", "sku": "CLOTH-001", "stock": 200, "price": 19.99, "category_id": 2, "status": ProductStatus.ACTIVE, "description": "Comfortable cotton t-shirt"},
-            {"name": "Jeans", "sku": "CLOTH-002", "stock": 75, "price": 59.99, "category_id": 2, "status": ProductStatus.ACTIVE, "description": "Classic blue jeans"},
-            {"name": "Sneakers", "sku": "CLOTH-003", "stock": 30, "price": 89.99, "category_id": 2, "status": ProductStatus.ACTIVE, "description": "Comfortable running sneakers"},
-            {"name": "Winter Jacket", "sku": "CLOTH-004", "stock": 15, "price": 149.99, "category_id": 2, "status": ProductStatus.INACTIVE, "description": "Warm winter jacket"},
-            
-            {"name": "Programming Book", "sku": "BOOK-001", "stock": 40, "price": 49.99, "category_id": 3, "status": ProductStatus.ACTIVE, "description": "Learn Python programming"},
-            {"name": "Novel", "sku": "BOOK-002", "stock": 60, "price": 14.99, "category_id": 3, "status": ProductStatus.ACTIVE, "description": "Bestselling fiction novel"},
-            {"name": "Cookbook", "sku": "BOOK-003", "stock": 35, "price": 29.99, "category_id": 3, "status": ProductStatus.ACTIVE, "description": "Healthy cooking recipes"},
-            {"name": "History Book", "sku": "BOOK-004", "stock": 20, "price": 39.99, "category_id": 3, "status": ProductStatus.DISCONTINUED, "description": "World history textbook"},
-            
-            {"name": "Garden Hose", "sku": "HOME-001", "stock": 25, "price": 39.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "50ft expandable garden hose"},
-            {"name": "Plant Pot", "sku": "HOME-002", "stock": 80, "price": 12.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "Ceramic plant pot with drainage"},
-            {"name": "Tool Set", "sku": "HOME-003", "stock": 15, "price": 79.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "Complete home repair tool set"},
-            {"name": "Lawn Mower", "sku": "HOME-004", "stock": 5, "price": 299.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "Electric lawn mower"},
-            
-            {"name": "Basketball", "sku": "SPORT-001", "stock": 30, "price": 24.99, "category_id": 5, "status": ProductStatus.ACTIVE, "description": "Official size basketball"},
-            {"name": "Camping Tent", "sku": "SPORT-002", "stock": 12, "price": 149.99, "category_id": 5, "status": ProductStatus.ACTIVE, "description": "4-person camping tent"},
-            
-            {"name": "Coffee Beans", "sku": "FOOD-001", "stock": 100, "price": 15.99, "category_id": 6, "status": ProductStatus.ACTIVE, "description": "Premium arabica coffee beans"},
-            {"name": "Energy Drink", "sku": "FOOD-002", "stock": 200, "price": 2.99, "category_id": 6, "status": ProductStatus.ACTIVE, "description": "Sugar-free energy drink"}
-        ]
-        
-        for product_data in sample_products:
-            product = Product(
-                id=self.next_product_id,
-                name=product_data["name"],
-                sku=product_data["sku"],
-                stock=product_data["stock"],
-                price=product_data["price"],
-                category_id=product_data["category_id"],
-                status=product_data["status"],
-                description=product_data["description"]
-            )
-            self.products[self.next_product_id] = product
+        for product_data in SAMPLE_PRODUCTS:
+            product = ProductRecord(id=self.next_product_id, **product_data)
+            self._add_product(product)
             self.next_product_id += 1
 
+    def _add_product(self, product: ProductRecord):
+        self.products[product.id] = product
+        if self._product_ids and self._product_ids[-1] > product.id:
+            insort(self._product_ids, product.id)
+        else:
+            self._product_ids.append(product.id)
+        self._index_product(product)
+        self._search_index.add(product)
+        self._recount_product(None, product)
+        if self._columns is not None:
+            self._columns.put(product)
+        self._touch_product(product)
+
+    def _remove_product(self, product_id: int):
+        product = self.products.pop(product_id)
+        self._unindex_product(product)
+        self._search_index.remove(product)
+        self._recount_product(product, None)
+        if self._columns is not None:
+            self._columns.remove(product_id)
+        if len(self._product_ids) > 2 * len(self.products) + 64:
+            # A new list, so readers walking the old one are not disturbed
+            self._product_ids = [pid for pid in self._product_ids if pid in self.products]
+        self._touch_product(product)
+
+    def _index_product(self, product: ProductRecord):
+        self._sku_index[product.sku] = product.id
+        _insert_id(self._category_index, product.category_id, product.id)
+        _insert_id(self._status_index, ProductStatus(product.status), product.id)
+        self._price_index.add(product.price, product.id)
+        self._stock_index.add(product.stock, product.id)
+        self._name_index.add(product.name, product.id)
+
+    def _unindex_product(self, product: ProductRecord):
+        if self._sku_index.get(product.sku) == product.id:
+            del self._sku_index[product.sku]
+        _discard_id(self._category_index, product.category_id, product.id)
+        _discard_id(self._status_index, ProductStatus(product.status), product.id)
+        self._price_index.remove(product.price, product.id)
+        self._stock_index.remove(product.stock, product.id)
+        self._name_index.remove(product.name, product.id)
+
+    def _reindex_product(self, previous: ProductRecord, product: ProductRecord):
+        # Called once ``product`` has replaced ``previous`` in self.products.
+        # Only the indexes over changed fields are touched, so a stock update
+        # moves one entry of the stock index and nothing else
+        if previous.sku != product.sku:
+            if self._sku_index.get(previous.sku) == product.id:
+                del self._sku_index[previous.sku]
+            self._sku_index[product.sku] = product.id
+        if previous.category_id != product.category_id:
+            _discard_id(self._category_index, previous.category_id, product.id)
+            _insert_id(self._category_index, product.category_id, product.id)
+        if previous.status != product.status:
+            _discard_id(self._status_index, ProductStatus(previous.status), product.id)
+            _insert_id(self._status_index, ProductStatus(product.status), product.id)
+        self._price_index.move(product.id, previous.price, product.price)
+        self._stock_index.move(product.id, previous.stock, product.stock)
+        self._name_index.move(product.id, previous.name, product.name)
+        self._search_index.update(previous, product)
+        self._recount_product(previous, product)
+        if self._columns is not None:
+            self._columns.put(product)
+        self._touch_product(product, previous.category_id)
+
+    # Versions are advanced last, once the change is visible to readers: a
+    # response built from older data must never be tagged with the new version
+    def _touch_product(self, product: ProductRecord, previous_category_id: Optional[int] = None):
+        version = self.version = self.version + 1
+        self._versions["products"] = version
+        # Kept after a delete as well, so a stale ETag can never match again
+        self._entity_versions["product"][product.id] = version
+        category_versions = self._entity_versions["category_products"]
+        category_versions[product.category_id] = version
+        if previous_category_id is not None:
+            category_versions[previous_category_id] = version
+
+    def _touch_category(self, category_id: int):
+        version = self.version = self.version + 1
+        self._versions["categories"] = version
+        self._entity_versions["category"][category_id] = version
+        # The category's product listing answers 404 once the category is gone
+        self._entity_versions["category_products"][category_id] = version
+
+    def get_version(self, key: Optional[str] = None, entity_id: Optional[int] = None) -> int:
+        """Store version at which ``key`` last changed; 0 if it never did.
+
+        ``key`` is a list ("products", "categories") or, with ``entity_id``, an
+        entity ("product", "category", or "category_products" for the products
+        of one category). Without a key, the version of the whole store.
+        """
+        if key is None:
+            return self.version
+        if entity_id is None:
+            return self._versions.get(key, 0)
+        return self._entity_versions[key].get(entity_id, 0)
+
+    def get_store_metrics(self) -> Dict[str, int]:
+        """Sizes of the store and its indexes, for the /metrics gauges"""
+        return {
+            "products": len(self.products),
+            "categories": len(self.categories),
+            "version": self.version,
+            "sku_index_entries": len(self._sku_index),
+            "price_index_entries": len(self._price_index),
+            "stock_index_entries": len(self._stock_index),
+            "name_index_entries": len(self._name_index),
+            "search_index_terms": self._search_index.term_count,
+            "search_index_documents": self._search_index.document_count,
+            "change_feed_subscribers": self.changes.subscriber_count,
+        }
+
+    def _recount_product(self, previous: Optional[ProductRecord], product: Optional[ProductRecord]):
+        """Take ``previous`` out of the running totals and count ``product`` in.
+
+        The totals are adjusted on copies that then replace the published
+        objects, so a stats read sees all of its figures from before the
+        change or all from after it.
+        """
+        totals = self._totals.copy()
+        changed: Dict[int, StockTotals] = {}
+        if previous is not None:
+            totals.remove(previous)
+            changed[previous.category_id] = self._category_totals[previous.category_id].copy()
+            changed[previous.category_id].remove(previous)
+        if product is not None:
+            totals.add(product)
+            category = changed.get(product.category_id)
+            if category is None:
+                current = self._category_totals.get(product.category_id)
+                category = changed[product.category_id] = StockTotals() if current is None else current.copy()
+            category.add(product)
+        self._totals = totals
+        for category_id, category in changed.items():
+            if category.product_count:
+                self._category_totals[category_id] = category
+            else:
+                del self._category_totals[category_id]
+
+    def _check_sku_available(self, sku: Optional[str], product_id: Optional[int] = None):
+        owner = self._sku_index.get(sku)
+        if owner is not None and owner != product_id:
+            raise DuplicateSkuError(sku)
+
     # Category CRUD operations
     def get_all_categories(self) -> List[ProductCategory]:
         return list(self.categories.values())
@@ -81,84 +409,446 @@ class ProductDatabase:
         return self.categories.get(category_id)
 
     def create_category(self, command: CreateCategoryCommand) -> ProductCategory:
-        category = ProductCategory(
-            id=self.next_category_id,
-            name=command.name,
-            description=command.description
-        )
-        self.categories[self.next_category_id] = category
-        self.next_category_id += 1
+        with self._lock:
+            category = ProductCategory(
+                id=self.next_category_id,
+                name=command.name,
+                description=command.description
+            )
+            self.categories[self.next_category_id] = category
+            self.next_category_id += 1
+            self._touch_category(category.id)
+            position = self._journal_write(encode_put_category(category))
+            self.changes.publish("create", "category", category.id, category.model_dump())
+        self._journal_sync(position)
         return category
 
     def update_category(self, category_id: int, command: UpdateCategoryCommand) -> Optional[ProductCategory]:
-        if category_id not in self.categories:
-            return None
-        
-        category = self.categories[category_id]
-        update_data = command.dict(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            setattr(category, field, value)
-        
+        with self._lock:
+            if category_id not in self.categories:
+                return None
+            
+            # A new object replaces the stored one, so readers never see a partial update
+            previous = self.categories[category_id]
+            category = previous.model_copy(update=command.changes())
+            self.categories[category_id] = category
+            self._touch_category(category_id)
+            position = self._journal_write(encode_put_category(category))
+            changes = {field: value for field, value in command.changes().items() if getattr(previous, field) != value}
+            if changes:
+                self.changes.publish("update", "category", category_id, changes)
+        self._journal_sync(position)
         return category
 
     def delete_category(self, category_id: int) -> bool:
-        if category_id not in self.categories:
-            return False
-        del self.categories[category_id]
+        with self._lock:
+            if category_id not in self.categories:
+                return False
+            del self.categories[category_id]
+            self._touch_category(category_id)
+            position = self._journal_write(encode_delete_category(category_id))
+            self.changes.publish("delete", "category", category_id)
+        self._journal_sync(position)
         return True
 
+    # Inventory statistics, read from the running totals
+    def get_inventory_stats(self, category_id: Optional[int] = None, min_price: Optional[float] = None,
+                            max_price: Optional[float] = None, status: Optional[ProductStatus] = None,
+                            min_stock: Optional[int] = None, max_stock: Optional[int] = None) -> InventoryStats:
+        """Counts, units in stock and stock value over the products matching every given condition.
+
+        Over all products or one category the running totals answer at once.
+        Narrower filters are aggregated by the columnar mirror when it is kept,
+        and otherwise over the matches the indexes find.
+        """
+        if min_price is None and max_price is None and status is None and min_stock is None and max_stock is None:
+            if category_id is None:
+                return self._totals.to_model()
+            return self._category_totals.get(category_id, StockTotals()).to_model(category_id)
+        if self._columns is not None:
+            # The mirror is updated in place, so this one vectorized pass holds
+            # the writer lock to keep a write from landing halfway through it
+            with self._lock:
+                columns = self._columns
+                totals = columns.totals(columns.mask(min_price, max_price, category_id, status, min_stock, max_stock))
+            return totals.to_model(category_id)
+        totals = StockTotals()
+        for product in self.find_products(min_price, max_price, category_id, status, min_stock, max_stock):
+            totals.add(product)
+        return totals.to_model(category_id)
+
     # Product CRUD operations
-    def get_all_products(self) -> List[Product]:
+    def get_all_products(self) -> List[ProductRecord]:
         return list(self.products.values())
 
-    def get_product_by_id(self, product_id: int) -> Optional[Product]:
+    def get_product_by_id(self, product_id: int) -> Optional[ProductRecord]:
         return self.products.get(product_id)
 
-    def get_products_by_category(self, category_id: int) -> List[Product]:
-        return [product for product in self.products.values() if product.category_id == category_id]
+    def get_product_by_sku(self, sku: str) -> Optional[ProductRecord]:
+        product = self.products.get(self._sku_index.get(sku))
+        # The SKU may have changed between the two lookups
+        return product if product is not None and product.sku == sku else None
+
+    def get_products_by_category(self, category_id: int) -> List[ProductRecord]:
+        products = self.products
+        matches = []
+        for product_id in iter_values_after(self._category_index.get(category_id, [])):
+            product = products.get(product_id)
+            if product is not None and product.category_id == category_id:
+                matches.append(product)
+        return matches
+
+    def get_products_page(self, limit: int, after: Optional[int] = None,
+                          category_id: Optional[int] = None, min_price: Optional[float] = None,
+                          max_price: Optional[float] = None, status: Optional[ProductStatus] = None,
+                          min_stock: Optional[int] = None, max_stock: Optional[int] = None
+                          ) -> Tuple[List[ProductRecord], Optional[int]]:
+        """Return up to ``limit`` products with an id greater than ``after`` that match every
+        given condition, in id order.
+
+        The second element is the id to resume from, or None on the last page.
+        """
+        ids = self._candidate_ids(min_price, max_price, category_id, status, min_stock, max_stock, page_size=limit)
+        page: List[ProductRecord] = []
+        for product_id in iter_values_after(ids, after):
+            product = self.products.get(product_id)
+            if product is None or not _matches(product, min_price, max_price, category_id, status,
+                                               min_stock, max_stock):
+                continue
+            if len(page) == limit:
+                return page, page[-1].id
+            page.append(product)
+        return page, None
+
+    def search_products(self, query: str, limit: int,
+                        after: Optional[Tuple[float, int]] = None) -> Tuple[List[ProductRecord], Optional[Tuple[float, int]]]:
+        """Return up to ``limit`` products matching every word of ``query``, most relevant first.
+
+        ``after`` and the second element are (score, id) positions as in get_products_page.
+        """
+        matches, next_after = self._search_index.search(query, limit, after)
+        # A product deleted since the index was read is left out
+        products = [self.products.get(product_id) for _, product_id in matches]
+        return [product for product in products if product is not None], next_after
+
+    def _candidate_ids(self, min_price: Optional[float], max_price: Optional[float], category_id: Optional[int],
+                       status: Optional[ProductStatus], min_stock: Optional[int], max_stock: Optional[int],
+                       max_count: Optional[int] = None, page_size: Optional[int] = None) -> Optional[List[int]]:
+        """Ascending ids of a superset of the products matching every given condition.
+
+        The ids come from whichever index narrows the conditions down the
+        most: a price or stock range is sized with binary searches, a
+        category or status list by its length. Ids taken from a range
+        index are in value order and get sorted; without conditions this is
+        the list of all ids. A list taken from an index is the live list, to
+        be read with sorted_lists.iter_values_after. Returns None, without collecting any
+        ids, when even the narrowest index holds more than ``max_count``.
+
+        For one page of ``page_size`` products, a range is only sorted while
+        that is cheaper than walking a list in id order and skipping the
+        products that fail the conditions.
+        """
+        lists = []
+        if category_id is not None:
+            lists.append(self._category_index.get(category_id, []))
+        if status is not None:
+            lists.append(self._status_index.get(ProductStatus(status), []))
+        ranges = []
+        if min_price is not None or max_price is not None:
+            ranges.append((self._price_index.count(min_price, max_price), self._price_index, min_price, max_price))
+        if min_stock is not None or max_stock is not None:
+            ranges.append((self._stock_index.count(min_stock, max_stock), self._stock_index, min_stock, max_stock))
+        shortest_list = min(lists, key=len, default=None)
+        narrowest_range = min(ranges, key=lambda candidate: candidate[0], default=None)
+        if narrowest_range is not None:
+            count, index, low, high = narrowest_range
+            # Sorting m range ids costs about m, walking id order visits about
+            # page_size * n / m ids to fill the page: sort when m is below sqrt(page_size * n)
+            broad = page_size is not None and count > math.isqrt(page_size * len(self.products))
+            if (shortest_list is None or count < len(shortest_list)) and not broad:
+                return None if max_count is not None and count > max_count else sorted(index.range_ids(low, high))
+        ids = self._product_ids if shortest_list is None else shortest_list
+        return None if max_count is not None and len(ids) > max_count else ids
+
+    def get_products_sorted(self, sort: str, limit: Optional[int] = None, after: Optional[Tuple[Any, int]] = None,
+                            descending: bool = False, category_id: Optional[int] = None,
+                            min_price: Optional[float] = None, max_price: Optional[float] = None,
+                            status: Optional[ProductStatus] = None, min_stock: Optional[int] = None,
+                            max_stock: Optional[int] = None) -> Tuple[List[ProductRecord], Optional[Tuple[Any, int]]]:
+        """Return up to ``limit`` (default all) products matching every given condition, ordered by
+        ``sort`` ("price", "stock" or "name") and then id, both reversed when ``descending``.
+
+        ``after`` and the second element are (value, id) positions as in get_products_page.
+        """
+        conditions = (min_price, max_price, category_id, status, min_stock, max_stock)
+        filtered = any(value is not None for value in conditions)
+        products = self.products
+        if filtered:
+            # Walking the ordered view visits about limit * n / m entries to find
+            # ``limit`` of m matches, sorting the candidates costs about m: sort
+            # when m is below sqrt(limit * n)
+            max_count = None if limit is None else math.isqrt(limit * len(products))
+            candidates = self._candidate_ids(*conditions, max_count=max_count)
+            if candidates is not None:
+                return self._sort_candidates(candidates, sort, limit, after, descending, conditions)
+        page: List[ProductRecord] = []
+        for value, product_id in self._sort_index(sort).iter_entries(after, reverse=descending):
+            product = products.get(product_id)
+            # Skips an entry whose product has been changed since the walk began
+            if product is None or getattr(product, sort) != value or (filtered and not _matches(product, *conditions)):
+                continue
+            if len(page) == limit:
+                return page, (getattr(page[-1], sort), page[-1].id)
+            page.append(product)
+        return page, None
+
+    def _sort_index(self, sort: str) -> RangeIndex:
+        return {"price": self._price_index, "stock": self._stock_index, "name": self._name_index}[sort]
+
+    def _sort_candidates(self, candidates: List[int], sort: str, limit: Optional[int],
+                         after: Optional[Tuple[Any, int]], descending: bool,
+                         conditions: tuple) -> Tuple[List[ProductRecord], Optional[Tuple[Any, int]]]:
+        keyed = []
+        for product_id in iter_values_after(candidates):
+            product = self.products.get(product_id)
+            if product is not None and _matches(product, *conditions):
+                key = (getattr(product, sort), product_id)
+                if after is None or (key < after if descending else key > after):
+                    keyed.append((key, product))
+        if limit is None:
+            keyed.sort(key=itemgetter(0), reverse=descending)
+            return [product for _, product in keyed], None
+        select = heapq.nlargest if descending else heapq.nsmallest
+        keyed = select(limit + 1, keyed, key=itemgetter(0))
+        page = [product for _, product in keyed[:limit]]
+        return page, (keyed[limit - 1][0] if len(keyed) > limit else None)
+
+    def find_products(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                      category_id: Optional[int] = None, status: Optional[ProductStatus] = None,
+                      min_stock: Optional[int] = None, max_stock: Optional[int] = None) -> List[ProductRecord]:
+        """Return the products matching every given condition, in id order"""
+        products = self.products
+        matches = []
+        for product_id in iter_values_after(
+                self._candidate_ids(min_price, max_price, category_id, status, min_stock, max_stock)):
+            product = products.get(product_id)
+            if product is not None and _matches(product, min_price, max_price, category_id, status,
+                                                min_stock, max_stock):
+                matches.append(product)
+        return matches
+
+    def create_product(self, command: CreateProductCommand) -> Optional[ProductRecord]:
+        with self._lock:
+            try:
+                product = self._create_product(command)
+            except InvalidCategoryError:
+                return None
+            position = self._journal_write(encode_put_product(product))
+        self._journal_sync(position)
+        return product
+
+    def update_product(self, product_id: int, command: UpdateProductCommand) -> Optional[ProductRecord]:
+        with self._lock:
+            try:
+                product = self._update_product(product_id, command)
+            except (ProductNotFoundError, InvalidCategoryError):
+                return None
+            position = self._journal_write(encode_put_product(product))
+        self._journal_sync(position)
+        return product
+
+    def delete_product(self, product_id: int) -> bool:
+        with self._lock:
+            if product_id not in self.products:
+                return False
+            self._remove_product(product_id)
+            position = self._journal_write(encode_delete_product(product_id))
+            self.changes.publish("delete", "product", product_id)
+        self._journal_sync(position)
+        return True
+
+    def adjust_stock(self, product_id: int, delta: int, fail_if_negative: bool = True) -> Optional[ProductRecord]:
+        """Add ``delta`` to a product's stock as one write, moving it between active and out of stock.
+
+        Returns None if the product does not exist. Raises InsufficientStockError
+        instead when ``fail_if_negative`` is set and the stock would drop below zero.
+        """
+        with self._lock:
+            try:
+                product = self._adjust_stock(product_id, delta, fail_if_negative)
+            except ProductNotFoundError:
+                return None
+            position = self._journal_write(encode_put_product(product))
+        self._journal_sync(position)
+        return product
+
+    # Batch operations. Each batch is applied under a single lock acquisition
+    # and journaled with a single write; an item that fails is reported in its
+    # slot of the result list and does not affect the other items.
+    def create_products(self, commands: List[CreateProductCommand]) -> List[Union[ProductRecord, Exception]]:
+        """Create several products; each result is the new product or the error that skipped it"""
+        results: List[Union[ProductRecord, Exception]] = []
+        with self._lock:
+            for command in commands:
+                try:
+                    results.append(self._create_product(command))
+                except (InvalidCategoryError, DuplicateSkuError) as exc:
+                    results.append(exc)
+            position = self._journal_write_many([encode_put_product(r) for r in results if isinstance(r, ProductRecord)])
+        self._journal_sync(position)
+        return results
 
-    def create_product(self, command: CreateProductCommand) -> Optional[Product]:
+    def update_products(self, items: List[Tuple[int, UpdateProductCommand]]) -> List[Union[ProductRecord, Exception]]:
+        """Update several products; each result is the updated product or the error that skipped it"""
+        results: List[Union[ProductRecord, Exception]] = []
+        with self._lock:
+            for product_id, command in items:
+                try:
+                    results.append(self._update_product(product_id, command))
+                except (ProductNotFoundError, InvalidCategoryError, DuplicateSkuError) as exc:
+                    results.append(exc)
+            position = self._journal_write_many([encode_put_product(r) for r in results if isinstance(r, ProductRecord)])
+        self._journal_sync(position)
+        return results
+
+    def delete_products(self, product_ids: List[int]) -> List[bool]:
+        """Delete several products; each result tells whether that id existed"""
+        results: List[bool] = []
+        with self._lock:
+            for product_id in product_ids:
+                found = product_id in self.products
+                if found:
+                    self._remove_product(product_id)
+                    self.changes.publish("delete", "product", product_id)
+                results.append(found)
+            position = self._journal_write_many([
+                encode_delete_product(product_id) for product_id, found in zip(product_ids, results) if found
+            ])
+        self._journal_sync(position)
+        return results
+
+    def adjust_stocks(self, items: List[Tuple[str, int, bool]]) -> List[Union[ProductRecord, Exception]]:
+        """Apply several (sku, delta, fail_if_negative) stock adjustments; each result is the adjusted
+        product or the error that skipped it"""
+        results: List[Union[ProductRecord, Exception]] = []
+        with self._lock:
+            for sku, delta, fail_if_negative in items:
+                try:
+                    product_id = self._sku_index.get(sku)
+                    if product_id is None:
+                        raise SkuNotFoundError(sku)
+                    results.append(self._adjust_stock(product_id, delta, fail_if_negative))
+                except (SkuNotFoundError, InsufficientStockError, StockOutOfRangeError) as exc:
+                    results.append(exc)
+            position = self._journal_write_many([encode_put_product(r) for r in results if isinstance(r, ProductRecord)])
+        self._journal_sync(position)
+        return results
+
+    def _create_product(self, command: CreateProductCommand) -> ProductRecord:
         # Check if category exists
         if command.category_id not in self.categories:
-            return None
+            raise InvalidCategoryError(command.category_id)
+        self._check_sku_available(command.sku)
         
-        product = Product(
-            id=self.next_product_id,
-            name=command.name,
-            sku=command.sku,
-            stock=command.stock,
-            price=command.price,
-            category_id=command.category_id,
-            status=command.status,
-            description=command.description
-        )
-        self.products[self.next_product_id] = product
+        product = ProductRecord.from_command(self.next_product_id, command)
+        self._add_product(product)
         self.next_product_id += 1
+        self.changes.publish("create", "product", product.id, product.to_dict())
         return product
 
-    def update_product(self, product_id: int, command: UpdateProductCommand) -> Optional[Product]:
+    def _update_product(self, product_id: int, command: UpdateProductCommand) -> ProductRecord:
         if product_id not in self.products:
-            return None
+            raise ProductNotFoundError(product_id)
         
         # Check if category exists if category_id is being updated
         if command.category_id is not None and command.category_id not in self.categories:
-            return None
-        
-        product = self.products[product_id]
-        update_data = command.dict(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            setattr(product, field, value)
+            raise InvalidCategoryError(command.category_id)
+        if command.sku is not None:
+            self._check_sku_available(command.sku, product_id)
         
+        # A new object replaces the stored one, so readers never see a partial update
+        previous = self.products[product_id]
+        product = previous.replace(**command.changes())
+        self.products[product_id] = product
+        self._reindex_product(previous, product)
+        self._publish_update(previous, product)
         return product
 
-    def delete_product(self, product_id: int) -> bool:
-        if product_id not in self.products:
-            return False
-        del self.products[product_id]
-        return True
+    def _adjust_stock(self, product_id: int, delta: int, fail_if_negative: bool) -> ProductRecord:
+        previous = self.products.get(product_id)
+        if previous is None:
+            raise ProductNotFoundError(product_id)
+        stock = previous.stock + delta
+        if fail_if_negative and stock < 0:
+            raise InsufficientStockError(product_id, previous.stock, delta)
+        if not INT64_MIN <= stock <= INT64_MAX:
+            raise StockOutOfRangeError(product_id)
+        product = previous.replace(stock=stock, status=status_for_stock(previous.status, stock))
+        self.products[product_id] = product
+        self._reindex_product(previous, product)
+        self._publish_update(previous, product)
+        return product
+
+    def _publish_update(self, previous: ProductRecord, product: ProductRecord):
+        changes = changed_fields(previous, product)
+        if changes:
+            self.changes.publish("update", "product", product.id, changes)
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic GC while millions of long-lived objects are allocated, so it does not
+    rescan them over and over while the store loads"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _insert_id(index: Dict, key, product_id: int):
+    insort(index.setdefault(key, []), product_id)
+
+
+def _discard_id(index: Dict, key, product_id: int):
+    ids = index.get(key)
+    if ids:
+        position = bisect_left(ids, product_id)
+        if position < len(ids) and ids[position] == product_id:
+            del ids[position]
+        if not ids:
+            del index[key]
+
+
+def _matches(product: ProductRecord, min_price: Optional[float] = None, max_price: Optional[float] = None,
+             category_id: Optional[int] = None, status: Optional[ProductStatus] = None,
+             min_stock: Optional[int] = None, max_stock: Optional[int] = None) -> bool:
+    return ((min_price is None or product.price >= min_price)
+            and (max_price is None or product.price <= max_price)
+            and (category_id is None or product.category_id == category_id)
+            and (status is None or product.status == status)
+            and (min_stock is None or product.stock >= min_stock)
+            and (max_stock is None or product.stock <= max_stock))
+
+
+def create_product_database(config: Settings = settings):
+    """Build the store selected by ``config.storage_backend``"""
+    seeding = dict(seed=config.seed, seed_products=config.seed_products,
+                   seed_categories=config.seed_categories, seed_random=config.seed_random)
+    if config.storage_backend == "sqlite":
+        from sqlite_database import SqliteProductDatabase
+        return SqliteProductDatabase(config.sqlite_path, **seeding)
+    if config.data_dir:
+        return ProductDatabase.open_durable(
+            config.data_dir, fsync_every=config.wal_fsync_every, snapshot_every=config.snapshot_every,
+            columnar=config.columnar_mirror, **seeding
+        )
+    db = ProductDatabase(seed_sample_data=False, columnar=config.columnar_mirror)
+    db.seed_catalog(config.seed, config.seed_products, config.seed_categories, config.seed_random)
+    return db
 
 
 # Global database instance
-product_db = ProductDatabase()
\ No newline at end of file
+product_db = create_product_database()
\ No newline at end of file
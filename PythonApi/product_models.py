@@ -1,8 +1,16 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, Dict, List, Optional
 from enum import Enum
 
 
+# Integers supplied by clients must fit the 64-bit columns of the storage engines
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
+Int64 = Annotated[int, Field(ge=INT64_MIN, le=INT64_MAX)]
+# NaN and infinite prices would poison the running stock value and break the price index's ordering
+Price = Annotated[float, Field(allow_inf_nan=False)]
+
+
 class ProductStatus(str, Enum):
     ACTIVE = "active"
     INACTIVE = "inactive"
@@ -10,6 +18,15 @@ class ProductStatus(str, Enum):
     OUT_OF_STOCK = "out_of_stock"
 
 
+def status_for_stock(status: ProductStatus, stock: int) -> ProductStatus:
+    """Status after a stock adjustment: active products with no stock left go out of stock and back"""
+    if status == ProductStatus.ACTIVE and stock <= 0:
+        return ProductStatus.OUT_OF_STOCK
+    if status == ProductStatus.OUT_OF_STOCK and stock > 0:
+        return ProductStatus.ACTIVE
+    return ProductStatus(status)
+
+
 class ProductCategory(BaseModel):
     id: int
     name: str
@@ -17,6 +34,9 @@ class ProductCategory(BaseModel):
 
 
 class Product(BaseModel):
+    # Also built from the stores' ProductRecord objects, read by attribute
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     sku: str
@@ -30,9 +50,9 @@ class Product(BaseModel):
 class CreateProductCommand(BaseModel):
     name: str
     sku: str
-    stock: int
-    price: float
-    category_id: int
+    stock: Int64
+    price: Price
+    category_id: Int64
     status: ProductStatus
     description: Optional[str] = None
 
@@ -40,12 +60,17 @@ class CreateProductCommand(BaseModel):
 class UpdateProductCommand(BaseModel):
     name: Optional[str] = None
     sku: Optional[str] = None
-    stock: Optional[int] = None
-    price: Optional[float] = None
-    category_id: Optional[int] = None
+    stock: Optional[Int64] = None
+    price: Optional[Price] = None
+    category_id: Optional[Int64] = None
     status: Optional[ProductStatus] = None
     description: Optional[str] = None
 
+    def changes(self) -> dict:
+        """Fields the client set; an explicit null only clears the optional description"""
+        return {field: value for field, value in self.dict(exclude_unset=True).items()
+                if value is not None or field == "description"}
+
 
 class CreateCategoryCommand(BaseModel):
     name: str
@@ -54,4 +79,116 @@ class CreateCategoryCommand(BaseModel):
 
 class UpdateCategoryCommand(BaseModel):
     name: Optional[str] = None
-    description: Optional[str] = None
\ No newline at end of file
+    description: Optional[str] = None
+
+    def changes(self) -> dict:
+        """Fields the client set; an explicit null only clears the optional description"""
+        return {field: value for field, value in self.dict(exclude_unset=True).items()
+                if value is not None or field == "description"}
+
+
+class UpdateProductBatchItem(BaseModel):
+    id: int
+    command: UpdateProductCommand
+
+
+class StockAdjustment(BaseModel):
+    # Signed change to the units in stock
+    delta: Int64
+    # Reject the adjustment rather than take the stock below zero
+    fail_if_negative: bool = True
+
+
+class StockAdjustmentBatchItem(BaseModel):
+    sku: str
+    delta: Int64
+    fail_if_negative: bool = True
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    success: bool
+    status_code: int
+    id: Optional[int] = None
+    product: Optional[Product] = None
+    detail: Optional[str] = None
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    rows: int
+    created: int
+    failed: int
+    errors: List[ImportRowError]
+    # True when more rows failed than are listed in errors
+    errors_truncated: bool = False
+
+
+class InventoryStats(BaseModel):
+    category_id: Optional[int] = None
+    product_count: int
+    total_stock: int
+    total_stock_value: float
+    status_counts: Dict[ProductStatus, int]
+
+
+class ResponseCacheStats(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+class ProductNotFoundError(LookupError):
+    """Raised when an operation targets a product id that does not exist"""
+
+    def __init__(self, product_id: int):
+        super().__init__("Product not found")
+        self.product_id = product_id
+
+
+class InvalidCategoryError(ValueError):
+    """Raised when a product would reference a category that does not exist"""
+
+    def __init__(self, category_id: int):
+        super().__init__("Invalid category ID")
+        self.category_id = category_id
+
+
+class SkuNotFoundError(LookupError):
+    """Raised when an operation names a SKU that no product has"""
+
+    def __init__(self, sku: str):
+        super().__init__(f"SKU '{sku}' not found")
+        self.sku = sku
+
+
+class InsufficientStockError(ValueError):
+    """Raised when a guarded stock adjustment would take the stock below zero"""
+
+    def __init__(self, product_id: int, stock: int, delta: int):
+        super().__init__(f"Insufficient stock: {stock} in stock, adjustment of {delta}")
+        self.product_id = product_id
+        self.stock = stock
+        self.delta = delta
+
+
+class StockOutOfRangeError(ValueError):
+    """Raised when a stock adjustment would leave the 64-bit range of the stock column"""
+
+    def __init__(self, product_id: int):
+        super().__init__("Stock adjustment out of range")
+        self.product_id = product_id
+
+
+class DuplicateSkuError(ValueError):
+    """Raised when a create or update would give two products the same SKU"""
+
+    def __init__(self, sku: str):
+        super().__init__(f"SKU '{sku}' already exists")
+        self.sku = sku
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Compact stored form of a product, kept apart from the pydantic API models.
+
+A pydantic ``Product`` carries a per-instance ``__dict__``, a set of the
+fields it was given and validation state, which comes to over a kilobyte per
+product. The stores keep ``ProductRecord`` objects instead: one ``__slots__``
+instance holding the same eight values. Records are built from validated
+commands, so they skip validation, and are turned into ``Product`` models
+only where a response is written.
+"""
+from typing import Optional
+
+from product_models import CreateProductCommand, Product, ProductStatus
+
+PRODUCT_FIELDS = ("id", "name", "sku", "stock", "price", "category_id", "status", "description")
+
+
+class ProductRecord:
+    """A stored product. Never changed once a store holds it: updates store a new record
+    built with ``replace``."""
+
+    __slots__ = PRODUCT_FIELDS
+
+    def __init__(self, id: int, name: str, sku: str, stock: int, price: float, category_id: int,
+                 status: ProductStatus, description: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.sku = sku
+        self.stock = stock
+        self.price = float(price)
+        self.category_id = category_id
+        self.status = ProductStatus(status)
+        self.description = description
+
+    @classmethod
+    def from_command(cls, product_id: int, command: CreateProductCommand) -> "ProductRecord":
+        return cls(product_id, command.name, command.sku, command.stock, command.price,
+                   command.category_id, command.status, command.description)
+
+    def replace(self, **changes) -> "ProductRecord":
+        """A copy of this record with ``changes`` applied"""
+        values = {field: getattr(self, field) for field in PRODUCT_FIELDS}
+        values.update(changes)
+        return ProductRecord(**values)
+
+    def to_dict(self) -> dict:
+        # Spelled out: this runs once per product in every fast JSON response
+        return {"id": self.id, "name": self.name, "sku": self.sku, "stock": self.stock, "price": self.price,
+                "category_id": self.category_id, "status": self.status, "description": self.description}
+
+    def to_model(self) -> Product:
+        return Product.model_validate(self)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ProductRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in PRODUCT_FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in PRODUCT_FIELDS)
+        return f"ProductRecord({fields})"
@@ -0,0 +1,406 @@
+"""Write-ahead log and snapshots that make the in-memory ProductDatabase durable.
+
+Every mutation is appended to the current log segment as a small binary
+record carrying the full post-change row (or the deleted id), so replaying a
+record twice is harmless. A snapshot rotates the log to a new segment, writes
+the whole store to ``snapshot-<segment>.bin`` and then removes the older
+segments and snapshots. Recovery loads the newest snapshot and replays every
+segment from that number on.
+
+Snapshots store products column by column (packed arrays plus one text blob)
+so a million-row snapshot loads with a handful of bulk reads.
+"""
+import logging
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from io import BytesIO
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from product_models import ProductCategory, ProductStatus
+from product_records import ProductRecord
+
+logger = logging.getLogger(__name__)
+
+OP_PUT_CATEGORY = 1
+OP_DELETE_CATEGORY = 2
+OP_PUT_PRODUCT = 3
+OP_DELETE_PRODUCT = 4
+
+SNAPSHOT_MAGIC = b"PRODSNAP"
+SNAPSHOT_VERSION = 1
+
+_FRAME = struct.Struct("<II")             # payload length, crc32 of payload
+_OP_ID = struct.Struct("<Bq")             # op, id
+_OP_PRODUCT = struct.Struct("<BqqdqB")    # op, id, stock, price, category_id, status
+_STR_LEN = struct.Struct("<I")
+_SNAPSHOT_HEADER = struct.Struct("<8sIqq")  # magic, version, next_category_id, next_product_id
+_SECTION = struct.Struct("<QI")             # section length, crc32 of section
+_NONE = 0xFFFFFFFF
+
+_STATUSES = list(ProductStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+
+_SEGMENT_FILE = re.compile(r"^wal-(\d{8})\.log$")
+_SNAPSHOT_FILE = re.compile(r"^snapshot-(\d{8})\.bin$")
+
+
+class CorruptLogError(RuntimeError):
+    """Raised when a snapshot or a sealed log segment fails its checksum"""
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    if value is None:
+        return _STR_LEN.pack(_NONE)
+    data = value.encode("utf-8")
+    return _STR_LEN.pack(len(data)) + data
+
+
+def _unpack_str(buffer: bytes, offset: int) -> Tuple[Optional[str], int]:
+    (length,) = _STR_LEN.unpack_from(buffer, offset)
+    offset += _STR_LEN.size
+    if length == _NONE:
+        return None, offset
+    return buffer[offset:offset + length].decode("utf-8"), offset + length
+
+
+def encode_put_product(product: ProductRecord) -> bytes:
+    return (
+        _OP_PRODUCT.pack(OP_PUT_PRODUCT, product.id, product.stock, product.price,
+                         product.category_id, _STATUS_CODES[product.status])
+        + _pack_str(product.name) + _pack_str(product.sku) + _pack_str(product.description)
+    )
+
+
+def encode_put_category(category: ProductCategory) -> bytes:
+    return _OP_ID.pack(OP_PUT_CATEGORY, category.id) + _pack_str(category.name) + _pack_str(category.description)
+
+
+def encode_delete_product(product_id: int) -> bytes:
+    return _OP_ID.pack(OP_DELETE_PRODUCT, product_id)
+
+
+def encode_delete_category(category_id: int) -> bytes:
+    return _OP_ID.pack(OP_DELETE_CATEGORY, category_id)
+
+
+def decode_record(payload: bytes):
+    """Decode a record into ``(op, value)``; value is a category or product record for puts
+    and an id for deletes"""
+    op = payload[0]
+    if op == OP_PUT_PRODUCT:
+        _, product_id, stock, price, category_id, status = _OP_PRODUCT.unpack_from(payload)
+        name, offset = _unpack_str(payload, _OP_PRODUCT.size)
+        sku, offset = _unpack_str(payload, offset)
+        description, _ = _unpack_str(payload, offset)
+        return op, ProductRecord(product_id, name, sku, stock, price, category_id, _STATUSES[status], description)
+    if op == OP_PUT_CATEGORY:
+        _, category_id = _OP_ID.unpack_from(payload)
+        name, offset = _unpack_str(payload, _OP_ID.size)
+        description, _ = _unpack_str(payload, offset)
+        return op, ProductCategory(id=category_id, name=name, description=description)
+    if op in (OP_DELETE_PRODUCT, OP_DELETE_CATEGORY):
+        return op, _OP_ID.unpack_from(payload)[1]
+    raise CorruptLogError(f"Unknown log record type {op}")
+
+
+def _frame(payload: bytes) -> bytes:
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_frames(stream: BinaryIO) -> Iterator[Tuple[bytes, int]]:
+    """Yield ``(payload, end_offset)`` for each intact frame, stopping at a torn or corrupt one"""
+    offset = 0
+    while True:
+        header = stream.read(_FRAME.size)
+        if len(header) < _FRAME.size:
+            return
+        length, crc = _FRAME.unpack(header)
+        payload = stream.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        offset += _FRAME.size + length
+        yield payload, offset
+
+
+def _write_section(stream: BinaryIO, data: bytes):
+    stream.write(_SECTION.pack(len(data), zlib.crc32(data)))
+    stream.write(data)
+
+
+def _read_section(stream: BinaryIO, path: str) -> bytes:
+    header = stream.read(_SECTION.size)
+    if len(header) == _SECTION.size:
+        length, crc = _SECTION.unpack(header)
+        data = stream.read(length)
+        if len(data) == length and zlib.crc32(data) == crc:
+            return data
+    raise CorruptLogError(f"{path} is truncated or corrupt")
+
+
+def _array_bytes(typecode: str, values) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _bytes_array(typecode: str, data: bytes) -> array:
+    packed = array(typecode)
+    packed.frombytes(data)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed
+
+
+def write_snapshot(stream: BinaryIO, categories: List[ProductCategory], products: List[ProductRecord],
+                   next_category_id: int, next_product_id: int):
+    """Write a columnar snapshot of the given records to ``stream``"""
+    stream.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, next_category_id, next_product_id))
+    _write_section(stream, b"".join(_frame(encode_put_category(category)) for category in categories))
+    texts: List[str] = []
+    offsets = [0]
+    position = 0
+    for product in products:
+        # A missing description is stored as an empty slice flagged in has_description
+        for text in (product.name, product.sku, product.description or ""):
+            texts.append(text)
+            position += len(text)
+            offsets.append(position)
+    _write_section(stream, _array_bytes("q", [p.id for p in products]))
+    _write_section(stream, _array_bytes("q", [p.stock for p in products]))
+    _write_section(stream, _array_bytes("d", [p.price for p in products]))
+    _write_section(stream, _array_bytes("q", [p.category_id for p in products]))
+    _write_section(stream, bytes(_STATUS_CODES[p.status] for p in products))
+    _write_section(stream, bytes(p.description is not None for p in products))
+    _write_section(stream, _array_bytes("q", offsets))
+    _write_section(stream, "".join(texts).encode("utf-8"))
+
+
+def read_snapshot(path: str) -> Tuple[List[ProductCategory], List[ProductRecord], int, int]:
+    """Read a snapshot written by write_snapshot; returns (categories, products, next ids)"""
+    with open(path, "rb") as stream:
+        header = stream.read(_SNAPSHOT_HEADER.size)
+        if len(header) < _SNAPSHOT_HEADER.size:
+            raise CorruptLogError(f"{path} is truncated or corrupt")
+        magic, version, next_category_id, next_product_id = _SNAPSHOT_HEADER.unpack(header)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise CorruptLogError(f"{path} is not a product snapshot")
+        category_frames = _read_section(stream, path)
+        ids, stocks, prices, category_ids = (
+            _bytes_array(typecode, _read_section(stream, path)) for typecode in "qqdq")
+        statuses = _read_section(stream, path)
+        has_description = _read_section(stream, path)
+        offsets = _bytes_array("q", _read_section(stream, path))
+        text = _read_section(stream, path).decode("utf-8")
+        if stream.read(1):
+            raise CorruptLogError(f"{path} has trailing data")
+
+    categories = []
+    with BytesIO(category_frames) as frames:
+        for payload, _ in _read_frames(frames):
+            categories.append(decode_record(payload)[1])
+    products = []
+    for row, product_id in enumerate(ids):
+        start = 3 * row
+        products.append(ProductRecord(
+            product_id,
+            text[offsets[start]:offsets[start + 1]],
+            text[offsets[start + 1]:offsets[start + 2]],
+            stocks[row],
+            prices[row],
+            category_ids[row],
+            _STATUSES[statuses[row]],
+            text[offsets[start + 2]:offsets[start + 3]] if has_description[row] else None
+        ))
+    return categories, products, next_category_id, next_product_id
+
+
+def _fsync_directory(directory: str):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class ProductJournal:
+    """Append-only log segments plus periodic snapshots for one data directory.
+
+    ``fsync_every`` batches fsync calls: records are handed to the OS on every
+    append, but only forced to disk once per ``fsync_every`` records (0 leaves
+    that to the OS). ``snapshot_every`` is the number of records after which
+    the store should take a new snapshot (0 disables automatic snapshots).
+
+    Appending and syncing are separate steps. The store appends while it
+    holds its write lock, which keeps the log in write order, and calls
+    ``sync_to`` after releasing it. Writers that arrive while an fsync runs
+    wait for the next one, and that one fsync covers all of their records
+    (group commit), so the disk no longer serializes the store's writers.
+    """
+
+    def __init__(self, directory: str, fsync_every: int = 1, snapshot_every: int = 100_000):
+        self.directory = directory
+        self.fsync_every = fsync_every
+        self.snapshot_every = snapshot_every
+        self._segment: Optional[BinaryIO] = None
+        self._segment_number = 0
+        self._records_in_segment = 0
+        # Records appended since the journal was opened, and how many of them are on disk
+        self._appended = 0
+        self._synced = 0
+        self._lock = threading.Lock()
+        # Held while an fsync runs and while segments are rotated or closed; taken before _lock
+        self._sync_lock = threading.Lock()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, kind: str, number: int) -> str:
+        extension = "log" if kind == "wal" else "bin"
+        return os.path.join(self.directory, f"{kind}-{number:08d}.{extension}")
+
+    def _numbers(self, pattern: re.Pattern) -> List[int]:
+        return sorted(int(m.group(1)) for m in map(pattern.match, os.listdir(self.directory)) if m)
+
+    # Recovery
+    def recover(self, load_snapshot, apply) -> bool:
+        """Load the newest snapshot and replay the log written after it.
+
+        ``load_snapshot(categories, products, next_category_id, next_product_id)``
+        receives the snapshot contents and ``apply(op, value)`` each log record.
+        Returns False when the directory held no previous state. Afterwards the
+        journal is open for appends.
+        """
+        snapshots = self._numbers(_SNAPSHOT_FILE)
+        start = snapshots[-1] if snapshots else 0
+        if snapshots:
+            load_snapshot(*read_snapshot(self._path("snapshot", start)))
+        segments = [number for number in self._numbers(_SEGMENT_FILE) if number >= start]
+        for number in segments:
+            self._replay_segment(self._path("wal", number), apply, is_last=number == segments[-1])
+        self._open_segment(segments[-1] if segments else start)
+        return bool(snapshots or segments)
+
+    def _replay_segment(self, path: str, apply, is_last: bool):
+        end = 0
+        with open(path, "rb") as stream:
+            for payload, end in _read_frames(stream):
+                apply(*decode_record(payload))
+        size = os.path.getsize(path)
+        if end != size:
+            if not is_last:
+                raise CorruptLogError(f"{path} is corrupt at offset {end}")
+            # A crash mid-append leaves a torn record at the tail; drop it so
+            # new records are not written after garbage
+            logger.warning("Truncating torn tail of %s at offset %d (was %d bytes)", path, end, size)
+            with open(path, "r+b") as stream:
+                stream.truncate(end)
+
+    # Appending
+    def _open_segment(self, number: int):
+        self._segment = open(self._path("wal", number), "ab")
+        self._segment_number = number
+        self._records_in_segment = 0
+        _fsync_directory(self.directory)
+
+    def append(self, payload: bytes) -> int:
+        return self.append_many([payload])
+
+    def append_many(self, payloads: List[bytes]) -> int:
+        """Hand several records to the OS with one write; returns the position to pass to sync_to"""
+        with self._lock:
+            self._segment.write(b"".join(_frame(payload) for payload in payloads))
+            self._segment.flush()
+            self._records_in_segment += len(payloads)
+            self._appended += len(payloads)
+            return self._appended
+
+    def sync_to(self, position: int):
+        """Force the records up to ``position`` to disk once ``fsync_every`` records are waiting"""
+        if not self.fsync_every or position - self._synced < self.fsync_every:
+            return
+        with self._sync_lock:
+            # An fsync that started after this record was appended has covered it
+            if self._synced >= position or self._segment is None:
+                return
+            with self._lock:
+                appended = self._appended
+            os.fsync(self._segment.fileno())
+            self._synced = appended
+
+    def sync(self):
+        with self._sync_lock, self._lock:
+            if self._segment is not None:
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+                self._synced = self._appended
+
+    @property
+    def snapshot_due(self) -> bool:
+        return (self.snapshot_every > 0 and self._records_in_segment >= self.snapshot_every
+                and not self.snapshot_running)
+
+    @property
+    def snapshot_running(self) -> bool:
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    # Snapshots
+    def snapshot(self, categories: List[ProductCategory], products: List[ProductRecord],
+                 next_category_id: int, next_product_id: int, background: bool = False):
+        """Rotate to a new segment and write a snapshot covering everything before it.
+
+        The caller passes copies of the record collections taken at rotation
+        time. Records changed after that are also in the new segment, and since
+        replaying a record is idempotent the result converges either way.
+        """
+        self.wait_for_snapshot()
+        with self._sync_lock, self._lock:
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+            self._segment.close()
+            self._synced = self._appended
+            self._open_segment(self._segment_number + 1)
+            number = self._segment_number
+        args = (number, categories, products, next_category_id, next_product_id)
+        if background:
+            self._snapshot_thread = threading.Thread(target=self._write_snapshot, args=args,
+                                                     name="product-snapshot", daemon=True)
+            self._snapshot_thread.start()
+        else:
+            self._write_snapshot(*args)
+
+    def _write_snapshot(self, number: int, categories, products, next_category_id: int, next_product_id: int):
+        path = self._path("snapshot", number)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as stream:
+            write_snapshot(stream, categories, products, next_category_id, next_product_id)
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary, path)
+        _fsync_directory(self.directory)
+        # The new snapshot supersedes every older snapshot and segment
+        for old in self._numbers(_SNAPSHOT_FILE):
+            if old < number:
+                os.remove(self._path("snapshot", old))
+        for old in self._numbers(_SEGMENT_FILE):
+            if old < number:
+                os.remove(self._path("wal", old))
+
+    def wait_for_snapshot(self):
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+
+    def close(self):
+        self.wait_for_snapshot()
+        with self._sync_lock, self._lock:
+            if self._segment is not None:
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+                self._segment.close()
+                self._segment = None
@@ -0,0 +1,152 @@
+"""Opt-in cProfile profiles of single requests, written as pstats files.
+
+``RequestProfiler.instrument`` wraps every API route twice. The wrapper
+around the route's ASGI app picks the requests to profile: those whose
+``X-Profile`` header equals the admin token, and a sampled share of all
+requests. The wrapper around the endpoint function runs cProfile while the
+handler runs, so the profile covers the handler and the store calls it
+makes. It runs on the handler's own thread: the event loop for async
+handlers and a worker thread for sync ones. The profile is written to the
+profile directory. A request picked by the admin token gets the file name
+back in an ``X-Profile-File`` header; a sampled request does not. Only
+the newest ``keep`` files are kept.
+
+A profile is not limited to its request. While an async handler awaits,
+the event loop runs other coroutines, and they are recorded too. From
+Python 3.12 cProfile hooks the whole process through sys.monitoring, so
+other threads' work shows up as well, and only one profiler can be active
+at a time. The profiler therefore runs one profile at a time in the
+process, and a request picked while another is profiled goes unprofiled.
+
+main only instruments the app when a directory and a token or sample rate
+are configured. Otherwise no wrapper is installed, and requests run as if
+this module did not exist.
+"""
+import cProfile
+import functools
+import inspect
+import itertools
+import os
+import random
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PROFILE_HEADER = b"x-profile"
+FILE_HEADER = b"x-profile-file"
+SUFFIX = ".pstats"
+
+# Set while a request picked for profiling is handled; the endpoint wrapper stores the file name in it
+_profiled_request: ContextVar[Optional[dict]] = ContextVar("profiled_request", default=None)
+
+
+class RequestProfiler:
+    """Profiles requests picked by admin header or sampling into ``directory``"""
+
+    def __init__(self, directory: str, token: Optional[str] = None, sample_rate: float = 0.0, keep: int = 100):
+        self.directory = directory
+        self._token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        # Serializes writing and pruning the profile files
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        # Held while a profile runs; cProfile cannot run two profiles at once (see the module docstring)
+        self._active = threading.Lock()
+
+    def _wanted(self, scope: Scope) -> Tuple[bool, bool]:
+        """(profile the request, by the admin token)"""
+        if self._token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    by_token = secrets.compare_digest(value, self._token)
+                    return by_token, by_token
+        return self.sample_rate > 0 and random.random() < self.sample_rate, False
+
+    def _wrap_app(self, app: ASGIApp) -> ASGIApp:
+        async def picked(scope: Scope, receive: Receive, send: Send):
+            wanted, by_token = self._wanted(scope) if scope["type"] == "http" else (False, False)
+            if not wanted:
+                await app(scope, receive, send)
+                return
+            request = {"file": None}
+
+            async def send_with_file(message):
+                # Only the admin learns the file name; sampled clients are not told they were profiled
+                if message["type"] == "http.response.start" and request["file"] and by_token:
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (FILE_HEADER, request["file"].encode())]}
+                await send(message)
+
+            reset = _profiled_request.set(request)
+            try:
+                await app(scope, receive, send_with_file)
+            finally:
+                _profiled_request.reset(reset)
+
+        return picked
+
+    def _start(self) -> Optional[cProfile.Profile]:
+        if _profiled_request.get() is None or not self._active.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool holds the process's profiler hook
+            self._active.release()
+            return None
+        return profiler
+
+    def _finish(self, profiler: cProfile.Profile, operation_id: str):
+        try:
+            profiler.disable()
+        finally:
+            self._active.release()
+        _profiled_request.get()["file"] = self._save(profiler, operation_id)
+
+    def _wrap_endpoint(self, operation_id: str, call: Callable) -> Callable:
+        if inspect.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def profiled(*args, **kwargs):
+                profiler = self._start()
+                if profiler is None:
+                    return await call(*args, **kwargs)
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    self._finish(profiler, operation_id)
+        else:
+            @functools.wraps(call)
+            def profiled(*args, **kwargs):
+                profiler = self._start()
+                if profiler is None:
+                    return call(*args, **kwargs)
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    self._finish(profiler, operation_id)
+        return profiled
+
+    def _save(self, profiler: cProfile.Profile, operation_id: str) -> str:
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self._sequence):06d}-{operation_id}{SUFFIX}"
+        with self._lock:
+            profiler.dump_stats(os.path.join(self.directory, name))
+            # Names start with the time they were written, so they sort oldest first
+            files = sorted(file for file in os.listdir(self.directory) if file.endswith(SUFFIX))
+            for old in files[:max(0, len(files) - self.keep)]:
+                os.remove(os.path.join(self.directory, old))
+        return name
+
+    def instrument(self, app):
+        """Profile the picked requests of every API route of ``app``; call it after the last route is added"""
+        for route in app.routes:
+            if isinstance(route, APIRoute):
+                route.app = self._wrap_app(route.app)
+                route.dependant.call = self._wrap_endpoint(route.operation_id or route.name, route.dependant.call)
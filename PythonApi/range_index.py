@@ -0,0 +1,162 @@
+import math
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from sorted_lists import values_after, values_before
+
+# Entries per block; blocks split when they grow to twice this size
+BLOCK_SIZE = 1000
+
+_entry_id = itemgetter(1)
+
+
+class RangeIndex:
+    """Product ids ordered by one field's value, and by id among equal values.
+
+    Entries are (value, id) pairs in a list of sorted blocks, with the last
+    entry of every block kept in a separate list for bisecting. Finding a
+    position is two binary searches, so a range of k entries costs
+    O(log n + k) and an insert or removal only shifts the entries of one
+    block rather than the whole index.
+
+    Reads take no lock while another thread writes. Entries are changed in
+    place within a block, but splitting or dropping a block builds new outer
+    lists and replaces the (blocks, maxes) pair in one assignment, so a
+    reader's block positions never shift. Walks copy a block at a time with
+    sorted_lists and resume from the last entry copied.
+    """
+
+    def __init__(self):
+        self._view: Tuple[List[List[Tuple[Any, int]]], List[Tuple[Any, int]]] = ([], [])
+        self._size = 0
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[Any, int]]) -> "RangeIndex":
+        """Build the index from (value, id) pairs in one sort"""
+        index = cls()
+        entries = sorted(pairs)
+        blocks = [entries[start:start + BLOCK_SIZE] for start in range(0, len(entries), BLOCK_SIZE)]
+        index._view = (blocks, [block[-1] for block in blocks])
+        index._size = len(entries)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value, product_id: int):
+        entry = (value, product_id)
+        blocks, maxes = self._view
+        if not blocks:
+            self._view = ([[entry]], [entry])
+            self._size = 1
+            return
+        position = min(bisect_left(maxes, entry), len(blocks) - 1)
+        block = blocks[position]
+        insort(block, entry)
+        maxes[position] = block[-1]
+        self._size += 1
+        if len(block) >= 2 * BLOCK_SIZE:
+            blocks, maxes = blocks.copy(), maxes.copy()
+            blocks[position:position + 1] = [block[:BLOCK_SIZE], block[BLOCK_SIZE:]]
+            maxes.insert(position, block[BLOCK_SIZE - 1])
+            self._view = (blocks, maxes)
+
+    def remove(self, value, product_id: int):
+        entry = (value, product_id)
+        blocks, maxes = self._view
+        position = bisect_left(maxes, entry)
+        if position == len(blocks):
+            return
+        block = blocks[position]
+        offset = bisect_left(block, entry)
+        if offset == len(block) or block[offset] != entry:
+            return
+        del block[offset]
+        self._size -= 1
+        if block:
+            maxes[position] = block[-1]
+        else:
+            self._view = (blocks[:position] + blocks[position + 1:], maxes[:position] + maxes[position + 1:])
+
+    def move(self, product_id: int, previous_value, value):
+        if previous_value != value:
+            self.remove(previous_value, product_id)
+            self.add(value, product_id)
+
+    def count(self, low=None, high=None) -> int:
+        """Number of entries with low <= value <= high; None is unbounded.
+
+        Positions are found with binary searches only, so while another
+        thread writes the count may be off by the entries being changed.
+        """
+        blocks, maxes = self._view
+        # (low,) sorts before every (low, id) and (high, inf) after every (high, id)
+        start_block, start_offset = 0, 0
+        if low is not None:
+            start_block = bisect_left(maxes, (low,))
+            if start_block < len(blocks):
+                start_offset = bisect_left(blocks[start_block], (low,))
+        end_block, end_offset = len(blocks), 0
+        if high is not None:
+            end_block = bisect_right(maxes, (high, math.inf))
+            if end_block < len(blocks):
+                end_offset = bisect_right(blocks[end_block], (high, math.inf))
+        if (start_block, start_offset) >= (end_block, end_offset):
+            return 0
+        return sum(map(len, blocks[start_block:end_block])) - start_offset + end_offset
+
+    def range_ids(self, low=None, high=None) -> List[int]:
+        """Ids of the entries with low <= value <= high, in value order"""
+        ids: List[int] = []
+        bound = None if high is None else (high, math.inf)
+        after = None if low is None else (low,)
+        while True:
+            chunk = self._chunk_after(after)
+            if not chunk:
+                return ids
+            if bound is not None and chunk[-1] > bound:
+                ids.extend(map(_entry_id, chunk[:bisect_right(chunk, bound)]))
+                return ids
+            ids.extend(map(_entry_id, chunk))
+            after = chunk[-1]
+
+    def iter_entries(self, after: Optional[Tuple[Any, int]] = None,
+                     reverse: bool = False) -> Iterator[Tuple[Any, int]]:
+        """(value, id) entries in order, or in reverse order, starting just past ``after``"""
+        while True:
+            if reverse:
+                chunk = self._chunk_before(after)
+                yield from reversed(chunk)
+            else:
+                chunk = self._chunk_after(after)
+                yield from chunk
+            if not chunk:
+                return
+            after = chunk[0] if reverse else chunk[-1]
+
+    def _chunk_after(self, after: Optional[tuple]) -> List[Tuple[Any, int]]:
+        """The entries greater than ``after`` in the first block holding any; [] past the end"""
+        blocks, maxes = self._view
+        position = 0 if after is None else bisect_right(maxes, after)
+        for index in range(position, len(blocks)):
+            block = blocks[index]
+            chunk = values_after(block, after, len(block))
+            if chunk:
+                return chunk
+        return []
+
+    def _chunk_before(self, before: Optional[tuple]) -> List[Tuple[Any, int]]:
+        """The entries less than ``before`` in the last block holding any; [] before the start"""
+        blocks, maxes = self._view
+        position = len(blocks) - 1 if before is None else min(bisect_left(maxes, before), len(blocks) - 1)
+        for index in range(position, -1, -1):
+            block = blocks[index]
+            chunk = values_before(block, before, len(block))
+            if chunk:
+                return chunk
+        return []
+
+    def entries(self) -> List[Tuple[Any, int]]:
+        """Every (value, id) entry in order"""
+        return list(self.iter_entries())
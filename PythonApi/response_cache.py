@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+# Default bound on the encoded bytes held
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResponseCache:
+    """Encoded JSON bodies of list responses, each tagged with the ETag it was built for.
+
+    A mutation advances the version of every key it touches, and with it the
+    ETag, so an entry whose tag no longer matches is stale: the lookup counts
+    a miss and replaces it with a freshly encoded body. Once the store version
+    moves, ``drop_stale`` also removes the stale entries nobody asks for again,
+    such as the listing of a deleted category. The bodies held are bounded by
+    ``max_bytes``; beyond it the least recently used entries are evicted.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # Least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._bytes = 0
+        # Store version the entries were last checked against by drop_stale
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key: Hashable, tag: str, build: Callable[[], bytes]) -> bytes:
+        """Return the body cached for ``key`` under ``tag``, building and storing it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == tag:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        # Built outside the lock; if two requests race, the last one stored wins
+        # and a stale winner is simply rebuilt on the next lookup
+        body = build()
+        with self._lock:
+            self.misses += 1
+            self._remove(key)
+            # A body larger than the whole cache would only evict everything else
+            if len(body) <= self.max_bytes:
+                self._entries[key] = (tag, body)
+                self._bytes += len(body)
+                while self._bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self.evictions += 1
+        return body
+
+    def drop_stale(self, version: int, current_tag: Callable[[Hashable], str]):
+        """Remove the entries whose tag is no longer ``current_tag(key)``, once per store ``version``"""
+        if version == self._version:
+            return
+        with self._lock:
+            self._version = version
+            entries = list(self._entries.items())
+        # Tags are read outside the lock, as they may come from the database
+        stale = [(key, entry) for key, entry in entries if entry[0] != current_tag(key)]
+        with self._lock:
+            for key, entry in stale:
+                # Unless a lookup replaced it meanwhile
+                if self._entries.get(key) is entry:
+                    self._remove(key)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -3,14 +3,20 @@
 import uvicorn
 import os
 
+from settings import settings
+
 if __name__ == "__main__":
     # Retrieve the PORT environment variable if it exists, otherwise default to 8000
     port = int(os.environ.get("PORT", 8000))
 
+    # The in-memory store lives inside a single process, so only the sqlite
+    # backend can share its data between several worker processes
+    workers = settings.workers if settings.storage_backend == "sqlite" else 1
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=port,
-        workers=1, # Can only be 1 since we are using an in-memory database
+        workers=workers,
         reload=False  # Set to False in production
     )
@@ -0,0 +1,40 @@
+from product_models import ProductStatus
+
+
+# Categories and products the store is seeded with on first start
+SAMPLE_CATEGORIES = [
+    {"name": "Electronics", "description": "Electronic devices and accessories"},
+    {"name": "Clothing", "description": "Apparel and fashion items"},
+    {"name": "Books", "description": "Books and educational materials"},
+    {"name": "Home & Garden", "description": "Home improvement and gardening supplies"},
+    {"name": "Sports & Outdoors", "description": "Sports equipment and outdoor gear"},
+    {"name": "Food & Beverage", "description": "Food items and beverages"}
+]
+
+SAMPLE_PRODUCTS = [
+    {"name": "Smartphone", "sku": "ELEC-001", "stock": 50, "price": 699.99, "category_id": 1, "status": ProductStatus.ACTIVE, "description": "Latest smartphone with advanced features"},
+    {"name": "Laptop", "sku": "ELEC-002", "stock": 25, "price": 1299.99, "category_id": 1, "status": ProductStatus.ACTIVE, "description": "High-performance laptop for work and gaming"},
+    {"name": "Wireless Headphones", "sku": "ELEC-003", "stock": 100, "price": 199.99, "category_id": 1, "status": ProductStatus.ACTIVE, "description": "Noise-canceling wireless headphones"},
+    {"name": "Smart Watch", "sku": "ELEC-004", "stock": 0, "price": 299.99, "category_id": 1, "status": ProductStatus.OUT_OF_STOCK, "description": "Fitness tracking smartwatch"},
+    
+    {"name": "T-Shirt", "sku": "CLOTH-001", "stock": 200, "price": 19.99, "category_id": 2, "status": ProductStatus.ACTIVE, "description": "Comfortable cotton t-shirt"},
+    {"name": "Jeans", "sku": "CLOTH-002", "stock": 75, "price": 59.99, "category_id": 2, "status": ProductStatus.ACTIVE, "description": "Classic blue jeans"},
+    {"name": "Sneakers", "sku": "CLOTH-003", "stock": 30, "price": 89.99, "category_id": 2, "status": ProductStatus.ACTIVE, "description": "Comfortable running sneakers"},
+    {"name": "Winter Jacket", "sku": "CLOTH-004", "stock": 15, "price": 149.99, "category_id": 2, "status": ProductStatus.INACTIVE, "description": "Warm winter jacket"},
+    
+    {"name": "Programming Book", "sku": "BOOK-001", "stock": 40, "price": 49.99, "category_id": 3, "status": ProductStatus.ACTIVE, "description": "Learn Python programming"},
+    {"name": "Novel", "sku": "BOOK-002", "stock": 60, "price": 14.99, "category_id": 3, "status": ProductStatus.ACTIVE, "description": "Bestselling fiction novel"},
+    {"name": "Cookbook", "sku": "BOOK-003", "stock": 35, "price": 29.99, "category_id": 3, "status": ProductStatus.ACTIVE, "description": "Healthy cooking recipes"},
+    {"name": "History Book", "sku": "BOOK-004", "stock": 20, "price": 39.99, "category_id": 3, "status": ProductStatus.DISCONTINUED, "description": "World history textbook"},
+    
+    {"name": "Garden Hose", "sku": "HOME-001", "stock": 25, "price": 39.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "50ft expandable garden hose"},
+    {"name": "Plant Pot", "sku": "HOME-002", "stock": 80, "price": 12.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "Ceramic plant pot with drainage"},
+    {"name": "Tool Set", "sku": "HOME-003", "stock": 15, "price": 79.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "Complete home repair tool set"},
+    {"name": "Lawn Mower", "sku": "HOME-004", "stock": 5, "price": 299.99, "category_id": 4, "status": ProductStatus.ACTIVE, "description": "Electric lawn mower"},
+    
+    {"name": "Basketball", "sku": "SPORT-001", "stock": 30, "price": 24.99, "category_id": 5, "status": ProductStatus.ACTIVE, "description": "Official size basketball"},
+    {"name": "Camping Tent", "sku": "SPORT-002", "stock": 12, "price": 149.99, "category_id": 5, "status": ProductStatus.ACTIVE, "description": "4-person camping tent"},
+    
+    {"name": "Coffee Beans", "sku": "FOOD-001", "stock": 100, "price": 15.99, "category_id": 6, "status": ProductStatus.ACTIVE, "description": "Premium arabica coffee beans"},
+    {"name": "Energy Drink", "sku": "FOOD-002", "stock": 200, "price": 2.99, "category_id": 6, "status": ProductStatus.ACTIVE, "description": "Sugar-free energy drink"}
+]
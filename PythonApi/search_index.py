@@ -0,0 +1,249 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from product_records import ProductRecord
+from sorted_lists import iter_values_after, values_after
+
+# Words are runs of letters and digits; matching is case-insensitive
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# A query term counts this many times more in the name than in the description
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+# Postings taken from one query term before moving on to the next
+SCAN_CHUNK = 256
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+
+def term_weights(product: ProductRecord) -> Dict[str, int]:
+    """Weighted term frequencies of a product's name and description"""
+    weights: Dict[str, int] = {}
+    for token in tokenize(product.name):
+        weights[token] = weights.get(token, 0) + NAME_WEIGHT
+    for token in tokenize(product.description):
+        weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+    return weights
+
+
+class _Term:
+    __slots__ = ("documents", "impacts", "idf", "weights", "bucket", "last")
+
+    def __init__(self, documents: Dict[int, int], impacts: Dict[int, List[int]], idf: float):
+        self.documents = documents
+        self.impacts = impacts
+        self.idf = idf
+        # Bucket weights, highest first, and the last id returned from the current one
+        self.weights = sorted(impacts, reverse=True)
+        self.bucket = 0
+        self.last: Optional[int] = None
+
+    def next_chunk(self) -> List[int]:
+        """The next ids in impact order, or [] once every posting was returned"""
+        while self.bucket < len(self.weights):
+            chunk = values_after(self.impacts.get(self.weights[self.bucket], []), self.last, SCAN_CHUNK)
+            if chunk:
+                self.last = chunk[-1]
+                return chunk
+            self.bucket += 1
+            self.last = None
+        return []
+
+    @property
+    def exhausted(self) -> bool:
+        return self.bucket >= len(self.weights)
+
+    @property
+    def bound(self) -> float:
+        """Highest score contribution of any posting not returned yet"""
+        # A concurrent delete can empty the last bucket of any term, not only the rarest
+        if self.bucket >= len(self.weights):
+            return 0.0
+        return self.weights[self.bucket] * self.idf
+
+
+class SearchIndex:
+    """Inverted index over product names and descriptions.
+
+    Each token maps to the products containing it with their weighted term
+    frequency, and to the same postings grouped by weight ("impacts"), each
+    group in ascending id order. A query matches the products containing
+    every query token, scored by the sum of weight * idf, best first and then
+    by id.
+
+    Postings are read in impact order, so a single-term page is sliced
+    straight out of the groups. For several terms the lists are scanned
+    round-robin, scoring each product seen with dictionary probes, until the
+    page is full and no unseen product could outscore it (the threshold
+    algorithm); a common term therefore costs little more than a rare one.
+
+    Searches run without a lock while another thread writes: buckets are read
+    with sorted_lists, resuming from the last id rather than a position, and a
+    posting only counts while its weight matches the postings map.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._impacts: Dict[str, Dict[int, List[int]]] = {}
+        self.document_count = 0
+
+    @classmethod
+    def from_products(cls, products: List[ProductRecord]) -> "SearchIndex":
+        """Build the index in one pass; products are taken in id order, so every bucket is appended to"""
+        index = cls()
+        postings, impacts = index._postings, index._impacts
+        for product in sorted(products, key=lambda p: p.id):
+            product_id = product.id
+            for token, weight in term_weights(product).items():
+                documents = postings.get(token)
+                if documents is None:
+                    documents = postings[token] = {}
+                    buckets = impacts[token] = {}
+                else:
+                    buckets = impacts[token]
+                documents[product_id] = weight
+                ids = buckets.get(weight)
+                if ids is None:
+                    buckets[weight] = [product_id]
+                else:
+                    ids.append(product_id)
+        index.document_count = len(products)
+        return index
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
+
+    def add(self, product: ProductRecord):
+        for token, weight in term_weights(product).items():
+            documents = self._postings.get(token)
+            if documents is None:
+                documents = self._postings[token] = {}
+                self._impacts[token] = {}
+            documents[product.id] = weight
+            ids = self._impacts[token].setdefault(weight, [])
+            # Ids are handed out in ascending order, so this is nearly always an append
+            if ids and ids[-1] > product.id:
+                insort(ids, product.id)
+            else:
+                ids.append(product.id)
+        self.document_count += 1
+
+    def remove(self, product: ProductRecord):
+        for token in term_weights(product):
+            documents = self._postings.get(token)
+            weight = documents.pop(product.id, None) if documents is not None else None
+            if weight is None:
+                continue
+            impacts = self._impacts[token]
+            ids = impacts[weight]
+            index = bisect_left(ids, product.id)
+            if index < len(ids) and ids[index] == product.id:
+                del ids[index]
+            if not ids:
+                del impacts[weight]
+            if not documents:
+                del self._postings[token]
+                del self._impacts[token]
+        self.document_count -= 1
+
+    def update(self, previous: ProductRecord, product: ProductRecord):
+        if previous.name != product.name or previous.description != product.description:
+            self.remove(previous)
+            self.add(product)
+
+    def search(self, query: str, limit: int,
+               after: Optional[Tuple[float, int]] = None) -> Tuple[List[Tuple[float, int]], Optional[Tuple[float, int]]]:
+        """Return up to ``limit`` (score, product id) matches for ``query`` ranked after ``after``.
+
+        The second element is the position to resume from, or None on the last page.
+        """
+        terms = self._terms(query)
+        if not terms:
+            return [], None
+        if len(terms) == 1:
+            page = self._search_term(terms[0], limit + 1, after)
+        else:
+            page = self._search_terms(terms, limit + 1, after)
+        if len(page) > limit:
+            del page[limit:]
+            return page, page[-1]
+        return page, None
+
+    def _terms(self, query: str) -> List[_Term]:
+        terms = []
+        for token in sorted(set(tokenize(query))):
+            documents = self._postings.get(token)
+            impacts = self._impacts.get(token)
+            if not documents or impacts is None:
+                return []
+            terms.append(_Term(documents, impacts, math.log(1 + self.document_count / len(documents))))
+        # Rarest first: probes for the other terms fail fastest that way
+        terms.sort(key=lambda term: len(term.documents))
+        return terms
+
+    @staticmethod
+    def _search_term(term: _Term, count: int, after: Optional[Tuple[float, int]]) -> List[Tuple[float, int]]:
+        page: List[Tuple[float, int]] = []
+        for weight in term.weights:
+            score = weight * term.idf
+            last = None
+            if after is not None:
+                if score > after[0]:
+                    continue
+                if score == after[0]:
+                    last = after[1]
+            for product_id in iter_values_after(term.impacts.get(weight, []), last):
+                # A product whose text changed since the bucket list was taken is met in its new bucket
+                if term.documents.get(product_id) == weight:
+                    page.append((score, product_id))
+                    if len(page) == count:
+                        return page
+        return page
+
+    @staticmethod
+    def _search_terms(terms: List[_Term], count: int, after: Optional[Tuple[float, int]]) -> List[Tuple[float, int]]:
+        # Min-heap of the best matches so far with the worst on top; ties on
+        # score rank by ascending id, hence the negated id
+        best: List[Tuple[float, int]] = []
+        seen = set()
+        rarest = terms[0]
+        while True:
+            for term in terms:
+                # Scanning a list only lowers its bound until its last bucket is
+                # reached; after that its matches are all met through the rarest list
+                if term is not rarest and term.bucket >= len(term.weights) - 1:
+                    continue
+                for product_id in term.next_chunk():
+                    if product_id in seen:
+                        continue
+                    seen.add(product_id)
+                    # Summed in the same term order for every product, so equal
+                    # weights give bit-identical scores for cursor comparisons
+                    score = 0.0
+                    for scored in terms:
+                        weight = scored.documents.get(product_id)
+                        if weight is None:
+                            break
+                        score += weight * scored.idf
+                    else:
+                        if after is not None and (score > after[0] or (score == after[0] and product_id <= after[1])):
+                            continue
+                        entry = (score, -product_id)
+                        if len(best) < count:
+                            heapq.heappush(best, entry)
+                        elif entry > best[0]:
+                            heapq.heapreplace(best, entry)
+            # Every match contains every term, so once the rarest list is used up all matches were seen
+            if rarest.exhausted or all(term.exhausted for term in terms):
+                break
+            # An unseen product scores at most the sum of the current bounds
+            if len(best) == count and best[0][0] > sum(term.bound for term in terms):
+                break
+        return [(score, -negated_id) for score, negated_id in sorted(best, reverse=True)]
@@ -0,0 +1,49 @@
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Runtime configuration, read from INVENTORY_* environment variables or a .env file"""
+    model_config = SettingsConfigDict(env_prefix="INVENTORY_", env_file=".env", extra="ignore")
+
+    # "memory" keeps everything in process; "sqlite" shares one database file between workers
+    storage_backend: Literal["memory", "sqlite"] = "memory"
+    sqlite_path: str = "inventory.db"
+    # Directory for the in-memory backend's write-ahead log and snapshots; unset keeps it volatile
+    data_dir: Optional[str] = None
+    # fsync the log once per this many records (1 = every write, 0 = leave it to the OS)
+    wal_fsync_every: int = 1
+    # Take a snapshot and truncate the log after this many records (0 = never automatically)
+    snapshot_every: int = 100_000
+    # Keep a NumPy columnar mirror of the in-memory products for vectorized filters and aggregates
+    columnar_mirror: bool = False
+    # Encode product responses with orjson instead of re-validating them against response_model
+    fast_json: bool = False
+    # Bytes of encoded list bodies the response cache holds before evicting the least recently used
+    response_cache_bytes: int = 64 * 1024 * 1024
+    # Catalog an empty store starts with: nothing, the sample data, or a generated catalog of
+    # seed_products products over seed_categories categories, the same for the same seed_random
+    seed: Literal["none", "sample", "synthetic"] = "sample"
+    seed_products: int = 100_000
+    seed_categories: int = 100
+    seed_random: int = 42
+    # Serve /swagger and /redoc; production deployments can turn them off
+    docs: bool = True
+    # Serve this prebuilt OpenAPI document (see generate_api_specification.py) instead of
+    # building the schema from the routes on the first request for it
+    openapi_file: Optional[str] = None
+    # Record per-operation request metrics and serve them with store gauges on /metrics
+    metrics: bool = True
+    # Per-request cProfile profiles, written to profile_dir for requests whose X-Profile header
+    # equals profile_token and for a profile_sample_rate share of all requests; the newest
+    # profile_keep files are kept. Without a directory and a token or rate nothing is profiled
+    profile_dir: Optional[str] = None
+    profile_token: Optional[str] = None
+    profile_sample_rate: float = 0.0
+    profile_keep: int = 100
+    # Number of uvicorn worker processes; only honoured by the sqlite backend
+    workers: int = 1
+
+
+settings = Settings()
@@ -0,0 +1,62 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator, List, Optional, Sequence
+
+# Values copied out of a list per step of iter_values_after
+READ_CHUNK = 256
+
+
+def values_after(values: Sequence, after: Optional[Any], count: int) -> List:
+    """Up to ``count`` values of the ascending list ``values`` that are greater than ``after``.
+
+    Another thread may insert into or delete from ``values`` in place while
+    this runs. The position is found with a binary search and the values are
+    copied in one slice, each atomic on its own. The slice starts one entry
+    early: that entry must not be greater than ``after``, or a deletion
+    shifted the list between the two steps and the search is repeated. A
+    result shorter than ``count`` therefore means the list has no more values.
+    """
+    while True:
+        start = 0 if after is None else max(bisect_right(values, after) - 1, 0)
+        chunk = values[start:start + count + 1]
+        skip = 0 if after is None else bisect_right(chunk, after)
+        if start and not skip:
+            continue
+        # Values inserted in front of the position push the slice back; take another
+        # unless the page is full or the slice reached the end of the list
+        if len(chunk) - skip >= count or len(chunk) <= count:
+            return chunk[skip:skip + count]
+
+
+def values_before(values: Sequence, before: Optional[Any], count: int) -> List:
+    """Up to ``count`` values of the ascending list ``values`` that are less than ``before``,
+    the greatest ones, in ascending order.
+
+    The mirror image of values_after: the slice ends one entry late, and that
+    entry must not be less than ``before`` unless the slice reached the end
+    of the list. A result shorter than ``count`` means the list has no more
+    values below it.
+    """
+    while True:
+        end = len(values) if before is None else bisect_left(values, before) + 1
+        start = max(end - count - 1, 0)
+        chunk = values[start:end]
+        keep = len(chunk) if before is None else bisect_left(chunk, before)
+        if before is not None and keep == len(chunk) == end - start:
+            continue
+        if keep >= count or start == 0:
+            return chunk[max(keep - count, 0):keep]
+
+
+def iter_values_after(values: Sequence, after: Optional[Any] = None) -> Iterator:
+    """Values of the ascending list ``values`` greater than ``after``, in order.
+
+    Each step resumes from the last value returned rather than from a
+    position, so values inserted or deleted by other threads in the meantime
+    never make the walk skip or repeat a value that stayed in the list.
+    """
+    while True:
+        chunk = values_after(values, after, READ_CHUNK)
+        yield from chunk
+        if len(chunk) < READ_CHUNK:
+            return
+        after = chunk[-1]
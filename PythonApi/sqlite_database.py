@@ -0,0 +1,579 @@
+import math
+import os
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from product_models import (
+    ProductCategory, ProductStatus, CreateProductCommand, UpdateProductCommand,
+    CreateCategoryCommand, UpdateCategoryCommand, InventoryStats, DuplicateSkuError, InvalidCategoryError,
+    ProductNotFoundError, SkuNotFoundError, InsufficientStockError, StockOutOfRangeError, INT64_MIN, INT64_MAX,
+    status_for_stock
+)
+from inventory_stats import StockTotals
+from product_records import ProductRecord
+from search_index import tokenize
+from sample_data import SAMPLE_CATEGORIES, SAMPLE_PRODUCTS
+
+# Bumped whenever the schema below changes; stored in PRAGMA user_version
+SCHEMA_VERSION = 5
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        sku TEXT NOT NULL,
+        stock INTEGER NOT NULL,
+        price REAL NOT NULL,
+        category_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        description TEXT
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_products_sku ON products (sku)",
+    "CREATE INDEX IF NOT EXISTS ix_products_category ON products (category_id, id)",
+    # Range and status filters on the product list (schema v4)
+    "CREATE INDEX IF NOT EXISTS ix_products_price ON products (price)",
+    "CREATE INDEX IF NOT EXISTS ix_products_stock ON products (stock)",
+    "CREATE INDEX IF NOT EXISTS ix_products_status ON products (status, id)",
+    # Name order for sorted listings (schema v5); price and stock reuse the indexes above
+    "CREATE INDEX IF NOT EXISTS ix_products_name ON products (name)",
+    # Version counters behind the ETags (schema v2). Lists and the store-wide
+    # counter use entity_id 0; the 'epoch' row tells this file apart from any
+    # earlier file at the same path.
+    """CREATE TABLE IF NOT EXISTS versions (
+        key TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (key, entity_id)
+    ) WITHOUT ROWID""",
+    # Full-text index over name and description (schema v3), an external
+    # content table kept in step with products by the triggers below
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products', content_rowid='id', tokenize='unicode61 remove_diacritics 0'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+# Statements are kept as constants so every call reuses the connection's
+# prepared statement cache instead of compiling SQL per request.
+CATEGORY_COLUMNS = "id, name, description"
+PRODUCT_COLUMNS = "id, name, sku, stock, price, category_id, status, description"
+
+SELECT_CATEGORIES = f"SELECT {CATEGORY_COLUMNS} FROM categories ORDER BY id"
+SELECT_CATEGORY = f"SELECT {CATEGORY_COLUMNS} FROM categories WHERE id = ?"
+INSERT_CATEGORY = "INSERT INTO categories (name, description) VALUES (?, ?)"
+# Seeding a new file with a generated catalog keeps the generated ids
+SEED_CATEGORY = "INSERT INTO categories (id, name, description) VALUES (?, ?, ?)"
+UPDATE_CATEGORY = "UPDATE categories SET name = ?, description = ? WHERE id = ?"
+DELETE_CATEGORY = "DELETE FROM categories WHERE id = ?"
+
+SELECT_PRODUCTS = f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY id"
+SELECT_PRODUCT = f"SELECT {PRODUCT_COLUMNS} FROM products WHERE id = ?"
+SELECT_PRODUCT_BY_SKU = f"SELECT {PRODUCT_COLUMNS} FROM products WHERE sku = ?"
+SELECT_PRODUCT_ID_BY_SKU = "SELECT id FROM products WHERE sku = ?"
+SELECT_PRODUCTS_BY_CATEGORY = f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category_id = ? ORDER BY id"
+SELECT_PRODUCTS_PAGE = f"SELECT {PRODUCT_COLUMNS} FROM products WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_CATEGORY_PRODUCTS_PAGE = (
+    f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category_id = ? AND id > ? ORDER BY id LIMIT ?"
+)
+INSERT_PRODUCT = (
+    "INSERT INTO products (name, sku, stock, price, category_id, status, description) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SEED_PRODUCT = (
+    "INSERT INTO products (id, name, sku, stock, price, category_id, status, description) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+UPDATE_PRODUCT = (
+    "UPDATE products SET name = ?, sku = ?, stock = ?, price = ?, category_id = ?, status = ?, "
+    "description = ? WHERE id = ?"
+)
+UPDATE_PRODUCT_STOCK = "UPDATE products SET stock = ?, status = ? WHERE id = ?"
+DELETE_PRODUCT = "DELETE FROM products WHERE id = ? RETURNING category_id"
+INSERT_INITIAL_VERSIONS = "INSERT OR IGNORE INTO versions VALUES ('store', 0, 0), ('epoch', 0, ?)"
+SELECT_VERSION = "SELECT version FROM versions WHERE key = ? AND entity_id = ?"
+SELECT_STORE_COUNTS = "SELECT (SELECT COUNT(*) FROM products), (SELECT COUNT(*) FROM categories)"
+BUMP_STORE_VERSION = "UPDATE versions SET version = version + 1 WHERE key = 'store' AND entity_id = 0 RETURNING version"
+PUT_VERSION = (
+    "INSERT INTO versions VALUES (?, ?, ?) ON CONFLICT (key, entity_id) DO UPDATE SET version = excluded.version"
+)
+REBUILD_SEARCH_INDEX = "INSERT INTO products_fts (products_fts) VALUES ('rebuild')"
+# Ranked by BM25 with name matches weighted like the in-memory index, best
+# first and then by id; the score is negated so that higher is better
+SEARCH_PRODUCTS = (
+    f"SELECT {PRODUCT_COLUMNS}, score FROM ("
+    "SELECT rowid AS id, -bm25(products_fts, 3.0, 1.0) AS score FROM products_fts WHERE products_fts MATCH ?"
+    ") JOIN products USING (id) WHERE score < ? OR (score = ? AND id > ?) ORDER BY score DESC, id LIMIT ?"
+)
+# Formatted with a WHERE clause from _product_filter. SUM(stock) raises "integer overflow"
+# past int64, so the high and low 32 bits are summed apart; each sum fits for 2^31 rows
+SELECT_STATUS_TOTALS = (
+    "SELECT status, COUNT(*), SUM(stock >> 32), SUM(stock & 4294967295), TOTAL(price * stock) "
+    "FROM products{where} GROUP BY status"
+)
+
+# Columns GET /api/products can be sorted by
+SORT_COLUMNS = ("price", "stock", "name")
+
+
+def _is_int64(value: int) -> bool:
+    return INT64_MIN <= value <= INT64_MAX
+
+
+def _row_to_category(row) -> ProductCategory:
+    return ProductCategory(id=row[0], name=row[1], description=row[2])
+
+
+def _row_to_product(row) -> ProductRecord:
+    # Rows start with PRODUCT_COLUMNS; search rows carry the score after them
+    return ProductRecord(*row[:8])
+
+
+def _product_filter(min_price: Optional[float], max_price: Optional[float], category_id: Optional[int],
+                    status: Optional[ProductStatus], min_stock: Optional[int] = None,
+                    max_stock: Optional[int] = None) -> Tuple[str, list]:
+    # Only a fixed set of clauses is ever generated, so statements stay cacheable
+    clauses, params = [], []
+    if min_price is not None:
+        clauses.append("price >= ?")
+        params.append(min_price)
+    if max_price is not None:
+        clauses.append("price <= ?")
+        params.append(max_price)
+    if category_id is not None:
+        clauses.append("category_id = ?")
+        params.append(category_id if _is_int64(category_id) else None)
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(ProductStatus(status).value)
+    if min_stock is not None:
+        clauses.append("stock >= ?")
+        params.append(max(min(min_stock, INT64_MAX), INT64_MIN))
+    if max_stock is not None:
+        clauses.append("stock <= ?")
+        params.append(max(min(max_stock, INT64_MAX), INT64_MIN))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class SqliteProductDatabase:
+    """ProductDatabase backed by a SQLite file in WAL mode.
+
+    Every worker process (and every thread within it) opens its own connection
+    to the shared file, so uvicorn can run several workers against one catalog.
+    """
+
+    # Writes from other workers never pass through this process, so there is no change feed
+    changes = None
+    # Every call queries the file and may wait up to 30 s for another connection's write lock
+    blocking_reads = True
+    blocking_writes = True
+
+    def __init__(self, path: str, seed: str = "sample", seed_products: int = 100_000, seed_categories: int = 100,
+                 seed_random: int = 42):
+        self.path = path
+        self._local = threading.local()
+        # How a new file is seeded (see ProductDatabase.seed_catalog); an existing file is left as it is
+        self._seeding = (seed, seed_products, seed_categories, seed_random)
+        self._initialize_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            # First use in this thread, or the process was forked since
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent writers
+        # queue on busy_timeout instead of failing to upgrade a read lock
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _initialize_schema(self):
+        with self._transaction() as connection:
+            current_version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if current_version < SCHEMA_VERSION:
+                self._migrate(connection, current_version)
+            self.epoch = format(connection.execute(SELECT_VERSION, ("epoch", 0)).fetchone()[0], "08x")
+
+    def _migrate(self, connection: sqlite3.Connection, current_version: int):
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.execute(INSERT_INITIAL_VERSIONS, (secrets.randbits(32),))
+        if 0 < current_version < 3:
+            # Index the products written before the full-text table existed
+            connection.execute(REBUILD_SEARCH_INDEX)
+        if current_version == 0:
+            # Only the first worker to open a new file seeds it
+            self._seed(connection, *self._seeding)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _seed(self, connection: sqlite3.Connection, mode: str, products: int, categories: int, random_seed: int):
+        if mode == "sample":
+            connection.executemany(
+                INSERT_CATEGORY,
+                [(category["name"], category["description"]) for category in SAMPLE_CATEGORIES]
+            )
+            connection.executemany(INSERT_PRODUCT, [
+                (p["name"], p["sku"], p["stock"], p["price"], p["category_id"], p["status"].value, p["description"])
+                for p in SAMPLE_PRODUCTS
+            ])
+        elif mode == "synthetic":
+            from catalog_generator import generate_catalog
+            generated_categories, generated_products = generate_catalog(products, categories, seed=random_seed)
+            connection.executemany(
+                SEED_CATEGORY, [(c.id, c.name, c.description) for c in generated_categories]
+            )
+            # The full-text triggers index the rows as they go in
+            connection.executemany(SEED_PRODUCT, (
+                (p.id, p.name, p.sku, p.stock, p.price, p.category_id, p.status.value, p.description)
+                for p in generated_products
+            ))
+        elif mode != "none":
+            raise ValueError(f"Unknown seed mode: {mode!r}")
+
+    # Version counters, bumped inside the transaction of every mutation so all
+    # workers see the same values
+    def _touch(self, connection: sqlite3.Connection, keys: List[Tuple[str, int]]):
+        version = connection.execute(BUMP_STORE_VERSION).fetchall()[0][0]
+        connection.executemany(PUT_VERSION, [(key, entity_id, version) for key, entity_id in keys])
+
+    def _touch_product(self, connection: sqlite3.Connection, product_id: int, category_id: int,
+                       previous_category_id: Optional[int] = None):
+        keys = [("products", 0), ("product", product_id), ("category_products", category_id)]
+        if previous_category_id is not None and previous_category_id != category_id:
+            keys.append(("category_products", previous_category_id))
+        self._touch(connection, keys)
+
+    def _touch_category(self, connection: sqlite3.Connection, category_id: int):
+        self._touch(connection, [("categories", 0), ("category", category_id), ("category_products", category_id)])
+
+    def get_version(self, key: Optional[str] = None, entity_id: Optional[int] = None) -> int:
+        """Store version at which ``key`` last changed; 0 if it never did (see ProductDatabase.get_version)"""
+        if entity_id is not None and not _is_int64(entity_id):
+            return 0
+        row = self._connection().execute(SELECT_VERSION, (key or "store", entity_id or 0)).fetchone()
+        return row[0] if row else 0
+
+    def get_store_metrics(self) -> Dict[str, int]:
+        """Row counts and store version for the /metrics gauges; SQLite keeps the index sizes to itself"""
+        products, categories = self._connection().execute(SELECT_STORE_COUNTS).fetchone()
+        return {"products": products, "categories": categories, "version": self.get_version()}
+
+    def close(self):
+        """Close the calling thread's connection"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.pid = None
+            self._local.connection = None
+
+    # Category CRUD operations
+    def get_all_categories(self) -> List[ProductCategory]:
+        return [_row_to_category(row) for row in self._connection().execute(SELECT_CATEGORIES)]
+
+    def get_category_by_id(self, category_id: int) -> Optional[ProductCategory]:
+        if not _is_int64(category_id):
+            return None
+        row = self._connection().execute(SELECT_CATEGORY, (category_id,)).fetchone()
+        return _row_to_category(row) if row else None
+
+    def create_category(self, command: CreateCategoryCommand) -> ProductCategory:
+        with self._transaction() as connection:
+            cursor = connection.execute(INSERT_CATEGORY, (command.name, command.description))
+            self._touch_category(connection, cursor.lastrowid)
+        return ProductCategory(id=cursor.lastrowid, name=command.name, description=command.description)
+
+    def update_category(self, category_id: int, command: UpdateCategoryCommand) -> Optional[ProductCategory]:
+        if not _is_int64(category_id):
+            return None
+        with self._transaction() as connection:
+            row = connection.execute(SELECT_CATEGORY, (category_id,)).fetchone()
+            if not row:
+                return None
+            category = _row_to_category(row).model_copy(update=command.changes())
+            connection.execute(UPDATE_CATEGORY, (category.name, category.description, category_id))
+            self._touch_category(connection, category_id)
+        return category
+
+    def delete_category(self, category_id: int) -> bool:
+        if not _is_int64(category_id):
+            return False
+        with self._transaction() as connection:
+            if connection.execute(DELETE_CATEGORY, (category_id,)).rowcount == 0:
+                return False
+            self._touch_category(connection, category_id)
+        return True
+
+    # Inventory statistics. Each worker process has its own memory, so these
+    # are aggregated by SQLite (over ix_products_category for one category)
+    # rather than kept as running totals.
+    def get_inventory_stats(self, category_id: Optional[int] = None, min_price: Optional[float] = None,
+                            max_price: Optional[float] = None, status: Optional[ProductStatus] = None,
+                            min_stock: Optional[int] = None, max_stock: Optional[int] = None) -> InventoryStats:
+        where, params = _product_filter(min_price, max_price, category_id, status, min_stock, max_stock)
+        rows = self._connection().execute(SELECT_STATUS_TOTALS.format(where=where), params)
+        totals = StockTotals()
+        for status, count, stock_high, stock_low, value in rows:
+            totals.product_count += count
+            totals.total_stock += (stock_high << 32) + stock_low
+            totals.total_stock_value += value
+            totals.status_counts[ProductStatus(status)] = count
+        return totals.to_model(category_id)
+
+    # Product CRUD operations
+    def get_all_products(self) -> List[ProductRecord]:
+        return [_row_to_product(row) for row in self._connection().execute(SELECT_PRODUCTS)]
+
+    def get_product_by_id(self, product_id: int) -> Optional[ProductRecord]:
+        if not _is_int64(product_id):
+            return None
+        row = self._connection().execute(SELECT_PRODUCT, (product_id,)).fetchone()
+        return _row_to_product(row) if row else None
+
+    def get_product_by_sku(self, sku: str) -> Optional[ProductRecord]:
+        row = self._connection().execute(SELECT_PRODUCT_BY_SKU, (sku,)).fetchone()
+        return _row_to_product(row) if row else None
+
+    def get_products_by_category(self, category_id: int) -> List[ProductRecord]:
+        if not _is_int64(category_id):
+            return []
+        rows = self._connection().execute(SELECT_PRODUCTS_BY_CATEGORY, (category_id,))
+        return [_row_to_product(row) for row in rows]
+
+    def get_products_page(self, limit: int, after: Optional[int] = None,
+                          category_id: Optional[int] = None, min_price: Optional[float] = None,
+                          max_price: Optional[float] = None, status: Optional[ProductStatus] = None,
+                          min_stock: Optional[int] = None, max_stock: Optional[int] = None
+                          ) -> Tuple[List[ProductRecord], Optional[int]]:
+        """Return up to ``limit`` products with an id greater than ``after`` that match every
+        given condition, in id order.
+
+        The second element is the id to resume from, or None on the last page.
+        """
+        after = 0 if after is None else max(min(after, INT64_MAX), INT64_MIN)
+        connection = self._connection()
+        if any(value is not None for value in (min_price, max_price, status, min_stock, max_stock)):
+            where, params = _product_filter(min_price, max_price, category_id, status, min_stock, max_stock)
+            rows = connection.execute(
+                f"SELECT {PRODUCT_COLUMNS} FROM products{where} AND id > ? ORDER BY id LIMIT ?",
+                params + [after, limit + 1]
+            ).fetchall()
+        elif category_id is None:
+            rows = connection.execute(SELECT_PRODUCTS_PAGE, (after, limit + 1)).fetchall()
+        elif _is_int64(category_id):
+            rows = connection.execute(SELECT_CATEGORY_PRODUCTS_PAGE, (category_id, after, limit + 1)).fetchall()
+        else:
+            rows = []
+        page = [_row_to_product(row) for row in rows[:limit]]
+        return page, (page[-1].id if len(rows) > limit else None)
+
+    def search_products(self, query: str, limit: int,
+                        after: Optional[Tuple[float, int]] = None) -> Tuple[List[ProductRecord], Optional[Tuple[float, int]]]:
+        """Return up to ``limit`` products matching every word of ``query``, most relevant first.
+
+        ``after`` and the second element are (score, id) positions as in get_products_page.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [], None
+        # Quoted tokens are plain terms to FTS5, never query syntax
+        match = " ".join(f'"{token}"' for token in tokens)
+        after_score, after_id = (math.inf, 0) if after is None else after
+        after_id = max(min(after_id, INT64_MAX), INT64_MIN)
+        rows = self._connection().execute(
+            SEARCH_PRODUCTS, (match, after_score, after_score, after_id, limit + 1)
+        ).fetchall()
+        page = [_row_to_product(row) for row in rows[:limit]]
+        return page, ((rows[limit - 1][-1], page[-1].id) if len(rows) > limit else None)
+
+    def get_products_sorted(self, sort: str, limit: Optional[int] = None, after: Optional[Tuple[Any, int]] = None,
+                            descending: bool = False, category_id: Optional[int] = None,
+                            min_price: Optional[float] = None, max_price: Optional[float] = None,
+                            status: Optional[ProductStatus] = None, min_stock: Optional[int] = None,
+                            max_stock: Optional[int] = None) -> Tuple[List[ProductRecord], Optional[Tuple[Any, int]]]:
+        """Return up to ``limit`` (default all) products matching every given condition, ordered by
+        ``sort`` ("price", "stock" or "name") and then id, both reversed when ``descending``.
+
+        ``after`` and the second element are (value, id) positions as in get_products_page.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort field '{sort}'")
+        where, params = _product_filter(min_price, max_price, category_id, status, min_stock, max_stock)
+        if after is not None:
+            where += (" AND " if where else " WHERE ") + f"({sort}, id) {'<' if descending else '>'} (?, ?)"
+            value, after_id = after
+            if isinstance(value, int) and not _is_int64(value):
+                value = float(value)
+            params += [value, max(min(after_id, INT64_MAX), INT64_MIN)]
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {PRODUCT_COLUMNS} FROM products{where} ORDER BY {sort} {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self._connection().execute(sql, params).fetchall()
+        page = [_row_to_product(row) for row in rows[:limit]]
+        if limit is None or len(rows) <= limit:
+            return page, None
+        return page, (getattr(page[-1], sort), page[-1].id)
+
+    def find_products(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                      category_id: Optional[int] = None, status: Optional[ProductStatus] = None,
+                      min_stock: Optional[int] = None, max_stock: Optional[int] = None) -> List[ProductRecord]:
+        """Return the products matching every given condition, in id order"""
+        where, params = _product_filter(min_price, max_price, category_id, status, min_stock, max_stock)
+        rows = self._connection().execute(f"SELECT {PRODUCT_COLUMNS} FROM products{where} ORDER BY id", params)
+        return [_row_to_product(row) for row in rows]
+
+    def create_product(self, command: CreateProductCommand) -> Optional[ProductRecord]:
+        try:
+            with self._transaction() as connection:
+                return self._create_product(connection, command)
+        except InvalidCategoryError:
+            return None
+
+    def update_product(self, product_id: int, command: UpdateProductCommand) -> Optional[ProductRecord]:
+        try:
+            with self._transaction() as connection:
+                return self._update_product(connection, product_id, command)
+        except (ProductNotFoundError, InvalidCategoryError):
+            return None
+
+    def delete_product(self, product_id: int) -> bool:
+        with self._transaction() as connection:
+            return self._delete_product(connection, product_id)
+
+    def adjust_stock(self, product_id: int, delta: int, fail_if_negative: bool = True) -> Optional[ProductRecord]:
+        """Add ``delta`` to a product's stock (see ProductDatabase.adjust_stock)"""
+        try:
+            with self._transaction() as connection:
+                return self._adjust_stock(connection, product_id, delta, fail_if_negative)
+        except ProductNotFoundError:
+            return None
+
+    # Batch operations, each applied in a single transaction. An item that
+    # fails is reported in its slot of the result list and is not written.
+    def create_products(self, commands: List[CreateProductCommand]) -> List[Union[ProductRecord, Exception]]:
+        results: List[Union[ProductRecord, Exception]] = []
+        with self._transaction() as connection:
+            for command in commands:
+                try:
+                    results.append(self._create_product(connection, command))
+                except (InvalidCategoryError, DuplicateSkuError) as exc:
+                    results.append(exc)
+        return results
+
+    def update_products(self, items: List[Tuple[int, UpdateProductCommand]]) -> List[Union[ProductRecord, Exception]]:
+        results: List[Union[ProductRecord, Exception]] = []
+        with self._transaction() as connection:
+            for product_id, command in items:
+                try:
+                    results.append(self._update_product(connection, product_id, command))
+                except (ProductNotFoundError, InvalidCategoryError, DuplicateSkuError) as exc:
+                    results.append(exc)
+        return results
+
+    def delete_products(self, product_ids: List[int]) -> List[bool]:
+        with self._transaction() as connection:
+            return [self._delete_product(connection, product_id) for product_id in product_ids]
+
+    def adjust_stocks(self, items: List[Tuple[str, int, bool]]) -> List[Union[ProductRecord, Exception]]:
+        results: List[Union[ProductRecord, Exception]] = []
+        with self._transaction() as connection:
+            for sku, delta, fail_if_negative in items:
+                try:
+                    row = connection.execute(SELECT_PRODUCT_ID_BY_SKU, (sku,)).fetchone()
+                    if not row:
+                        raise SkuNotFoundError(sku)
+                    results.append(self._adjust_stock(connection, row[0], delta, fail_if_negative))
+                except (SkuNotFoundError, InsufficientStockError, StockOutOfRangeError) as exc:
+                    results.append(exc)
+        return results
+
+    def _create_product(self, connection: sqlite3.Connection, command: CreateProductCommand) -> ProductRecord:
+        if not connection.execute(SELECT_CATEGORY, (command.category_id,)).fetchone():
+            raise InvalidCategoryError(command.category_id)
+        if connection.execute(SELECT_PRODUCT_ID_BY_SKU, (command.sku,)).fetchone():
+            raise DuplicateSkuError(command.sku)
+        cursor = connection.execute(INSERT_PRODUCT, (
+            command.name, command.sku, command.stock, command.price,
+            command.category_id, command.status.value, command.description
+        ))
+        self._touch_product(connection, cursor.lastrowid, command.category_id)
+        return ProductRecord.from_command(cursor.lastrowid, command)
+
+    def _update_product(self, connection: sqlite3.Connection, product_id: int,
+                        command: UpdateProductCommand) -> ProductRecord:
+        row = connection.execute(SELECT_PRODUCT, (product_id,)).fetchone() if _is_int64(product_id) else None
+        if not row:
+            raise ProductNotFoundError(product_id)
+        if command.category_id is not None and not connection.execute(
+                SELECT_CATEGORY, (command.category_id,)).fetchone():
+            raise InvalidCategoryError(command.category_id)
+        if command.sku is not None:
+            owner = connection.execute(SELECT_PRODUCT_ID_BY_SKU, (command.sku,)).fetchone()
+            if owner and owner[0] != product_id:
+                raise DuplicateSkuError(command.sku)
+        product = _row_to_product(row).replace(**command.changes())
+        connection.execute(UPDATE_PRODUCT, (
+            product.name, product.sku, product.stock, product.price,
+            product.category_id, ProductStatus(product.status).value, product.description, product_id
+        ))
+        self._touch_product(connection, product_id, product.category_id, previous_category_id=row[5])
+        return product
+
+    def _adjust_stock(self, connection: sqlite3.Connection, product_id: int, delta: int,
+                      fail_if_negative: bool) -> ProductRecord:
+        # The read and the write share one BEGIN IMMEDIATE transaction, so no
+        # other worker can change the stock in between
+        row = connection.execute(SELECT_PRODUCT, (product_id,)).fetchone() if _is_int64(product_id) else None
+        if not row:
+            raise ProductNotFoundError(product_id)
+        previous = _row_to_product(row)
+        stock = previous.stock + delta
+        if fail_if_negative and stock < 0:
+            raise InsufficientStockError(product_id, previous.stock, delta)
+        if not _is_int64(stock):
+            raise StockOutOfRangeError(product_id)
+        product = previous.replace(stock=stock, status=status_for_stock(previous.status, stock))
+        connection.execute(UPDATE_PRODUCT_STOCK, (stock, product.status.value, product_id))
+        self._touch_product(connection, product_id, product.category_id)
+        return product
+
+    def _delete_product(self, connection: sqlite3.Connection, product_id: int) -> bool:
+        if not _is_int64(product_id):
+            return False
+        deleted = connection.execute(DELETE_PRODUCT, (product_id,)).fetchall()
+        if not deleted:
+            return False
+        self._touch_product(connection, product_id, deleted[0][0])
+        return True
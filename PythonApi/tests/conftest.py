@@ -1,13 +1,17 @@
 import pytest
 from fastapi.testclient import TestClient
+import main
 from main import app
 from product_database import ProductDatabase
 from product_models import ProductStatus
+from response_cache import ResponseCache
 
 
 @pytest.fixture
-def client():
-    """Create a test client for the FastAPI application"""
+def client(monkeypatch):
+    """Create a test client for the FastAPI application backed by a fresh database"""
+    monkeypatch.setattr(main, "product_db", ProductDatabase())
+    monkeypatch.setattr(main, "response_cache", ResponseCache())
     return TestClient(app)
 
 
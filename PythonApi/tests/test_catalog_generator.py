@@ -0,0 +1,87 @@
+from collections import Counter
+
+import pytest
+
+from catalog_generator import generate_catalog
+from product_database import ProductDatabase, create_product_database
+from product_models import CreateProductCommand, ProductStatus
+from settings import Settings
+from sqlite_database import SqliteProductDatabase
+
+
+class TestCatalogGenerator:
+    """Test suite for synthetic catalogs and the startup seeding modes"""
+
+    def test_same_seed_same_catalog(self):
+        """Test that a seed always gives the same catalog and another seed a different one"""
+        categories, products = generate_catalog(500, 10, seed=7)
+        assert (categories, products) == generate_catalog(500, 10, seed=7)
+        assert products != generate_catalog(500, 10, seed=8)[1]
+
+    def test_catalog_is_consistent(self):
+        """Test ids, unique SKUs, known categories and statuses that agree with stock"""
+        categories, products = generate_catalog(5_000, 20)
+        assert [c.id for c in categories] == list(range(1, 21))
+        assert [p.id for p in products] == list(range(1, 5_001))
+        assert len({p.sku for p in products}) == 5_000
+        assert {p.category_id for p in products} <= {c.id for c in categories}
+        for product in products:
+            assert product.stock >= 0 and product.price > 0
+            assert f"{product.price:.2f}".endswith(".99")
+            if product.status is ProductStatus.ACTIVE:
+                assert product.stock > 0
+            if product.status is ProductStatus.OUT_OF_STOCK:
+                assert product.stock == 0
+
+    def test_distributions_are_skewed(self):
+        """Test that category sizes are uneven and most products are active and described"""
+        _, products = generate_catalog(20_000, 50)
+        sizes = sorted(Counter(p.category_id for p in products).values(), reverse=True)
+        assert sizes[0] > 10 * sizes[-1]
+        statuses = Counter(p.status for p in products)
+        assert 0.7 < statuses[ProductStatus.ACTIVE] / 20_000 < 0.95
+        assert statuses[ProductStatus.OUT_OF_STOCK] > 0 and statuses[ProductStatus.DISCONTINUED] > 0
+        assert 0.6 < sum(p.description is not None for p in products) / 20_000 < 0.8
+
+    def test_store_seeding_modes(self):
+        """Test that the store starts empty, with the sample data or with a working synthetic catalog"""
+        assert len(create_product_database(Settings(seed="none")).get_all_products()) == 0
+        assert len(create_product_database(Settings(seed="sample")).get_all_products()) == 20
+
+        db = create_product_database(Settings(seed="synthetic", seed_products=2_000, seed_categories=10))
+        products = db.get_all_products()
+        assert len(products) == 2_000 and len(db.get_all_categories()) == 10
+        assert db.get_product_by_sku(products[5].sku) == products[5]
+        assert db.search_products(products[5].name, 5)[0][0].id == products[5].id
+        assert db.get_inventory_stats().product_count == 2_000
+        assert db.version > 0
+        created = db.create_product(CreateProductCommand(
+            name="New", sku="NEW-1", stock=1, price=1.0, category_id=1, status=ProductStatus.ACTIVE
+        ))
+        assert created.id == 2_001
+
+    def test_load_catalog_needs_empty_store(self, fresh_db: ProductDatabase):
+        """Test that a catalog is never loaded over existing data, and unknown modes are refused"""
+        with pytest.raises(ValueError):
+            fresh_db.load_catalog(*generate_catalog(10, 2))
+        with pytest.raises(ValueError):
+            ProductDatabase(seed_sample_data=False).seed_catalog("everything")
+
+    def test_durable_store_is_seeded_once(self, tmp_path):
+        """Test that a new data directory is seeded and snapshotted, and a restart recovers it"""
+        db = ProductDatabase.open_durable(str(tmp_path), seed="synthetic", seed_products=300, seed_categories=5)
+        expected = db.get_all_products()
+        db.close()
+        reopened = ProductDatabase.open_durable(str(tmp_path), seed="none")
+        assert reopened.get_all_products() == expected
+        reopened.close()
+
+    def test_sqlite_seeded_with_synthetic_catalog(self, tmp_path):
+        """Test that a new SQLite file gets the same catalog, searchable through the FTS table"""
+        db = SqliteProductDatabase(str(tmp_path / "seed.db"), seed="synthetic", seed_products=300,
+                                   seed_categories=5)
+        _, products = generate_catalog(300, 5)
+        assert db.get_all_products() == products
+        assert db.search_products(products[0].name, 5)[0][0].id == 1
+        db.close()
+        assert SqliteProductDatabase(str(tmp_path / "empty.db"), seed="none").get_all_products() == []
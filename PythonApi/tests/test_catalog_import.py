@@ -0,0 +1,148 @@
+import pytest
+
+from catalog_import import InvalidImportError, ProductImporter
+from product_database import ProductDatabase
+
+CSV_UPLOAD = (
+    "﻿name,sku,stock,price,category_id,status,description\r\n"
+    "Kettle,IMP-001,5,29.5,4,active,\r\n"
+    'Mug,IMP-002,12,4.25,4,active,"Stoneware, ""large""\nsecond line"\r\n'
+    "Bad stock,IMP-003,many,1,4,active,\r\n"
+    "Lost,IMP-004,1,1,999,active,\r\n"
+    "Phone,ELEC-001,1,1,1,active,\r\n"
+    "Short,row\r\n"
+    "Café,IMP-007,3,2.5,6,inactive,Ünïcode\r\n"
+).encode("utf-8")
+
+
+def _import(db: ProductDatabase, data: bytes, format: str, step: int = 0, **kwargs):
+    importer = ProductImporter(db, format, **kwargs)
+    if step:
+        for start in range(0, len(data), step):
+            importer.feed(data[start:start + step])
+    else:
+        importer.feed(data)
+    return importer.finish()
+
+
+class TestProductImporter:
+    """Test suite for the streaming NDJSON/CSV importer"""
+
+    @pytest.mark.parametrize("step", [0, 1, 7])
+    def test_csv_import(self, fresh_db: ProductDatabase, step):
+        """Test a CSV upload, fed whole or in arbitrary byte slices"""
+        report = _import(fresh_db, CSV_UPLOAD, "csv", step=step)
+        assert (report.rows, report.created, report.failed) == (7, 3, 4)
+        assert [error.line for error in report.errors] == [5, 6, 7, 8]
+        assert "stock" in report.errors[0].detail
+        assert report.errors[1].detail == "Invalid category ID"
+        assert "already exists" in report.errors[2].detail
+        assert report.errors[3].detail == "Expected 7 columns, found 2"
+
+        mug = fresh_db.get_product_by_sku("IMP-002")
+        assert mug.description == 'Stoneware, "large"\nsecond line'
+        assert fresh_db.get_product_by_sku("IMP-001").description is None
+        assert fresh_db.get_product_by_sku("IMP-007").name == "Café"
+
+    def test_ndjson_import(self, fresh_db: ProductDatabase):
+        """Test an NDJSON upload with blank, malformed and invalid lines"""
+        data = (
+            b'{"name": "Lamp", "sku": "IMP-101", "stock": 2, "price": 15, "category_id": 4, "status": "active"}\n'
+            b"\n"
+            b"not json\n"
+            b"[1, 2]\n"
+            b'{"name": "No price", "sku": "IMP-104", "stock": 2, "category_id": 4, "status": "active"}\n'
+            b'{"name": "Bad \xff", "sku": "IMP-105"}\n'
+            b'{"name": "Rug", "sku": "IMP-106", "stock": 1, "price": 80, "category_id": 4, "status": "active"}'
+        )
+        report = _import(fresh_db, data, "ndjson", step=5)
+        assert (report.rows, report.created, report.failed) == (6, 2, 4)
+        assert [(error.line, error.detail) for error in report.errors] == [
+            (3, "Invalid JSON"), (4, "Expected a JSON object"), (5, "price: Field required"), (6, "Invalid UTF-8"),
+        ]
+        assert fresh_db.get_product_by_sku("IMP-106").price == 80
+
+    def test_chunks_and_progress(self, fresh_db: ProductDatabase):
+        """Test that rows are inserted chunk by chunk and errors beyond the cap are only counted"""
+        lines = [
+            f'{{"name": "Item {i}", "sku": "CHUNK-{i % 40}", "stock": 1, "price": 1, "category_id": 1, '
+            f'"status": "active"}}\n'
+            for i in range(100)
+        ]
+        progress = []
+        report = _import(fresh_db, "".join(lines).encode(), "ndjson", chunk_size=25, max_errors=10,
+                         on_progress=lambda r: progress.append((r.rows, r.created)))
+        assert progress == [(25, 25), (50, 40), (75, 40), (100, 40)]
+        assert (report.created, report.failed) == (40, 60)
+        assert len(report.errors) == 10
+        assert report.errors_truncated is True
+
+    def test_invalid_csv_header(self, fresh_db: ProductDatabase):
+        """Test that a CSV without the required columns is rejected before anything is imported"""
+        with pytest.raises(InvalidImportError):
+            _import(fresh_db, b"name,sku\nA,B\n", "csv")
+        assert len(fresh_db.get_all_products()) == 20
+
+    def test_unterminated_quote(self, fresh_db: ProductDatabase):
+        """Test that an unterminated quoted field is reported at the line it starts"""
+        report = _import(fresh_db, b'name,sku,stock,price,category_id,status\n"Open,IMP-1,1,1,1,active\n', "csv")
+        assert [(error.line, error.detail) for error in report.errors] == [(2, "Unterminated quoted field")]
+
+    @pytest.mark.parametrize("rows_after, detail", [
+        (5, "Unterminated quoted field"),
+        (2000, "Quoted field not closed within 100 lines"),
+    ])
+    def test_stray_quote_fails_only_its_row(self, fresh_db: ProductDatabase, rows_after, detail):
+        """Test that a stray quote fails its own row and the rows after it are still imported"""
+        lines = ["name,sku,stock,price,category_id,status\n", '12" Pipe,STRAY-0,1,1,1,active\n']
+        lines += [f"Pipe {i},STRAY-{i},1,1,1,active\n" for i in range(1, rows_after + 1)]
+        importer = ProductImporter(fresh_db, "csv")
+        for line in lines:
+            importer.feed(line.encode())
+            # A record stays bounded however far the open quote runs
+            assert len(importer._record) < importer.max_record_lines
+        report = importer.finish()
+        assert (report.rows, report.created, report.failed) == (rows_after + 1, rows_after, 1)
+        assert [(error.line, error.detail) for error in report.errors] == [(2, detail)]
+        assert fresh_db.get_product_by_sku(f"STRAY-{rows_after}") is not None
+
+    @pytest.mark.parametrize("step", [0, 1, 7])
+    def test_cr_line_endings(self, fresh_db: ProductDatabase, step):
+        """Test that lone CR ends a line like LF and CRLF, also when a CRLF is split between chunks"""
+        data = CSV_UPLOAD.replace(b"\r\n", b"\r")
+        report = _import(fresh_db, data, "csv", step=step)
+        assert (report.rows, report.created, report.failed) == (7, 3, 4)
+        assert [error.line for error in report.errors] == [5, 6, 7, 8]
+        assert fresh_db.get_product_by_sku("IMP-002").description == 'Stoneware, "large"\nsecond line'
+
+    def test_cr_only_upload_is_not_buffered(self, fresh_db: ProductDatabase):
+        """Test that a large CR-only upload is processed line by line as it arrives"""
+        lines = ["name,sku,stock,price,category_id,status\r"]
+        lines += [f"Item {i},CR-{i},1,1,1,active\r" for i in range(5000)]
+        data = "".join(lines).encode()
+        importer = ProductImporter(fresh_db, "csv")
+        for start in range(0, len(data), 4096):
+            importer.feed(data[start:start + 4096])
+            assert importer._buffered < 100
+        report = importer.finish()
+        assert (report.rows, report.created, report.failed) == (5000, 5000, 0)
+
+    @pytest.mark.parametrize("step", [0, 100])
+    def test_oversized_line_fails_its_row(self, fresh_db: ProductDatabase, step):
+        """Test that a line longer than the limit fails as one row and is never held whole"""
+        row = '{"name": "Ok %d", "sku": "LONG-%d", "stock": 1, "price": 1, "category_id": 1, "status": "active"}\n'
+        data = (row % (1, 1) + '{"name": "' + "x" * 5000 + '"}\n' + row % (3, 3)).encode()
+        report = _import(fresh_db, data, "ndjson", step=step, max_line_bytes=1024)
+        assert (report.rows, report.created, report.failed) == (3, 2, 1)
+        assert [(error.line, error.detail) for error in report.errors] == [(2, "Line is longer than 1024 bytes")]
+
+    def test_malformed_csv_fails_its_row(self, fresh_db: ProductDatabase):
+        """Test that a record the csv module rejects is a row error, not an unhandled exception"""
+        data = (
+            "name,sku,stock,price,category_id,status,description\n"
+            f'Huge,CSV-1,1,1,1,active,"{"x" * 200_000}"\n'
+            "Fine,CSV-2,1,1,1,active,\n"
+        ).encode()
+        report = _import(fresh_db, data, "csv")
+        assert (report.rows, report.created, report.failed) == (2, 1, 1)
+        assert report.errors[0].line == 2 and report.errors[0].detail.startswith("Invalid CSV: field larger")
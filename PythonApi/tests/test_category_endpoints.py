@@ -201,4 +201,66 @@ class TestCategoryEndpoints:
         cat1 = response1.json()
         cat2 = response2.json()
         assert cat1["id"] != cat2["id"]
-        assert cat1["name"] == cat2["name"]
\ No newline at end of file
+        assert cat1["name"] == cat2["name"]
+
+    def test_get_category_stats(self, client: TestClient):
+        """Test the per-category inventory statistics"""
+        response = client.get("/api/categories/1/stats")
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["category_id"] == 1
+        assert stats["product_count"] == 4
+        assert stats["total_stock"] == 175
+        assert stats["total_stock_value"] == 87498.25
+        assert stats["status_counts"] == {"active": 3, "inactive": 0, "discontinued": 0, "out_of_stock": 1}
+
+        client.put("/api/products/1", json={"stock": 0})
+        assert client.get("/api/categories/1/stats").json()["total_stock"] == 175 - 50
+
+    def test_get_category_stats_not_found(self, client: TestClient):
+        """Test statistics for a non-existent category"""
+        response = client.get("/api/categories/999/stats")
+        assert response.status_code == 404
+        assert "Category not found" in response.json()["detail"]
+
+    def test_get_inventory_stats(self, client: TestClient):
+        """Test the catalog-wide inventory statistics"""
+        stats = client.get("/api/stats").json()
+        assert stats["category_id"] is None
+        assert stats["product_count"] == 20
+        assert sum(stats["status_counts"].values()) == 20
+
+        client.delete("/api/products/1")
+        assert client.get("/api/stats").json()["product_count"] == 19
+
+    def test_get_filtered_inventory_stats(self, client: TestClient):
+        """Test that the catalog statistics take the product list's filters"""
+        params = {"max_price": 50, "status": "active"}
+        products = client.get("/api/products", params=params).json()
+        stats = client.get("/api/stats", params=params).json()
+        assert stats["product_count"] == len(products) > 0
+        assert stats["total_stock"] == sum(p["stock"] for p in products)
+        assert stats["total_stock_value"] == pytest.approx(sum(p["price"] * p["stock"] for p in products), abs=0.01)
+        assert stats["status_counts"]["active"] == len(products)
+        assert client.get("/api/stats", params={"min_price": "nan"}).status_code == 422
+
+    def test_category_products_etag(self, client: TestClient):
+        """Test that a category's product list is revalidated when its products move"""
+        etag_1 = client.get("/api/categories/1/products").headers["ETag"]
+        etag_2 = client.get("/api/categories/2/products").headers["ETag"]
+        etag_3 = client.get("/api/categories/3/products").headers["ETag"]
+
+        client.put("/api/products/1", json={"category_id": 2})
+        assert client.get("/api/categories/1/products", headers={"If-None-Match": etag_1}).status_code == 200
+        assert client.get("/api/categories/2/products", headers={"If-None-Match": etag_2}).status_code == 200
+        assert client.get("/api/categories/3/products", headers={"If-None-Match": etag_3}).status_code == 304
+
+        client.delete("/api/categories/3")
+        assert client.get("/api/categories/3/products", headers={"If-None-Match": etag_3}).status_code == 404
+
+    def test_categories_etag(self, client: TestClient, sample_category_data):
+        """Test that the category list is revalidated after a category is created"""
+        etag = client.get("/api/categories").headers["ETag"]
+        assert client.get("/api/categories", headers={"If-None-Match": etag}).status_code == 304
+        client.post("/api/categories", json=sample_category_data)
+        assert client.get("/api/categories", headers={"If-None-Match": etag}).status_code == 200
\ No newline at end of file
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+import time
+
+import main
+from change_feed import ChangeHub
+from product_database import ProductDatabase
+from product_models import CreateCategoryCommand, CreateProductCommand, UpdateCategoryCommand, UpdateProductCommand
+from sqlite_database import SqliteProductDatabase
+
+
+def _parse(stream: bytes) -> list:
+    """SSE messages as dicts of their fields, with the data decoded; keep-alive comments are skipped"""
+    messages = []
+    for block in stream.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            fields["data"] = json.loads(fields["data"])
+            messages.append(fields)
+    return messages
+
+
+async def _follow(hub: ChangeHub, write=None, last_event_id=None) -> list:
+    """Messages of one stream: those sent on connecting, then the events of ``write``, run on another thread"""
+    stream = hub.stream(last_event_id)
+    chunks = [await stream.__anext__()]
+    if write is not None:
+        await asyncio.to_thread(write)
+    hub.close()
+    async for chunk in stream:
+        chunks.append(chunk)
+    return _parse(b"".join(chunks))
+
+
+class TestChangeFeed:
+    """Test suite for the change feed of the in-memory store"""
+
+    def test_mutations_publish_in_write_order(self, fresh_db: ProductDatabase):
+        """Test that creates, updates and deletes are published with consecutive sequence numbers"""
+        def write():
+            product = fresh_db.create_product(CreateProductCommand(
+                name="Feed", sku="FEED-1", stock=2, price=5.0, category_id=1, status="active"
+            ))
+            fresh_db.update_product(product.id, UpdateProductCommand(price=6.0))
+            fresh_db.adjust_stock(product.id, -2)
+            fresh_db.delete_product(product.id)
+            category = fresh_db.create_category(CreateCategoryCommand(name="Feed"))
+            fresh_db.update_category(category.id, UpdateCategoryCommand(description="Followed"))
+            fresh_db.delete_category(category.id)
+
+        ready, *events = asyncio.run(_follow(fresh_db.changes, write))
+        assert ready["event"] == "ready" and ready["data"] == {"seq": 0}
+        assert [event["data"]["seq"] for event in events] == list(range(1, 8))
+        assert [(event["event"], event["data"]["entity"]) for event in events] == [
+            ("create", "product"), ("update", "product"), ("update", "product"), ("delete", "product"),
+            ("create", "category"), ("update", "category"), ("delete", "category"),
+        ]
+        assert events[0]["data"]["product"]["sku"] == "FEED-1"
+        assert events[1]["data"]["changes"] == {"price": 6.0}
+        assert events[2]["data"]["changes"] == {"stock": 0, "status": "out_of_stock"}
+        assert events[5]["data"]["changes"] == {"description": "Followed"}
+        assert events[6]["id"] == f"{fresh_db.changes.epoch}:7"
+
+    def test_seeding_and_no_op_updates_publish_nothing(self, fresh_db: ProductDatabase):
+        """Test that the sample data and an update that changes nothing leave the feed empty"""
+        price = fresh_db.get_product_by_id(1).price
+        fresh_db.update_product(1, UpdateProductCommand(price=price))
+        assert fresh_db.changes.sequence == 0
+
+    def test_resume_after_last_event_id(self):
+        """Test that a reconnecting client gets the events after its last one, then live events"""
+        hub = ChangeHub()
+        for product_id in range(1, 4):
+            hub.publish("delete", "product", product_id)
+
+        events = asyncio.run(_follow(hub, lambda: hub.publish("delete", "product", 4), f"{hub.epoch}:1"))
+        assert [event["data"]["id"] for event in events] == [2, 3, 4]
+
+    def test_reset_when_events_cannot_be_replayed(self):
+        """Test that an id from another process or older than the history starts with a reset"""
+        hub = ChangeHub(history=2)
+        for product_id in range(1, 6):
+            hub.publish("delete", "product", product_id)
+
+        for last_event_id in (f"{hub.epoch}:1", "0badc0de:3", "garbage"):
+            (reset,) = asyncio.run(_follow(hub, last_event_id=last_event_id))
+            assert reset["event"] == "reset"
+            assert reset["id"] == f"{hub.epoch}:5"
+        assert [event["data"]["id"] for event in asyncio.run(_follow(hub, last_event_id=f"{hub.epoch}:3"))] == [4, 5]
+
+    def test_slow_subscriber_is_dropped(self):
+        """Test that a subscriber whose buffer overflows gets an overflow event and is unsubscribed"""
+        hub = ChangeHub(buffer=3)
+
+        def write():
+            for product_id in range(10):
+                hub.publish("delete", "product", product_id)
+
+        ready, overflow = asyncio.run(_follow(hub, write))
+        assert overflow["event"] == "overflow"
+        assert hub.subscriber_count == 0
+
+    def test_fan_out_to_many_subscribers(self):
+        """Test that one publish from a writer thread reaches every subscriber on the loop"""
+        hub = ChangeHub()
+
+        async def follow_all():
+            streams = [hub.stream() for _ in range(1000)]
+            for stream in streams:
+                await stream.__anext__()
+            received = [asyncio.ensure_future(stream.__anext__()) for stream in streams]
+            await asyncio.to_thread(hub.publish, "delete", "product", 1)
+            chunks = await asyncio.gather(*received)
+            for stream in streams:
+                await stream.aclose()
+            return chunks
+
+        chunks = asyncio.run(follow_all())
+        assert len(set(chunks)) == 1 and _parse(chunks[0])[0]["data"]["id"] == 1
+        assert hub.subscriber_count == 0
+
+    def test_idle_streams_get_keep_alives(self):
+        """Test that the loop's keep-alive timer wakes an idle stream, and stops with the last subscriber"""
+        hub = ChangeHub(heartbeat=0.01)
+
+        async def follow():
+            stream = hub.stream()
+            await stream.__anext__()
+            keep_alive = await stream.__anext__()
+            (group,) = hub._loops.values()
+            await stream.aclose()
+            return keep_alive, group.timer.cancelled()
+
+        assert asyncio.run(follow()) == (b": keep-alive\n\n", True)
+
+    def test_endpoint_streams_events(self, client):
+        """Test that GET /api/changes sends the store's events as Server-Sent Events"""
+        hub = main.product_db.changes
+
+        def write():
+            while hub.subscriber_count == 0:
+                time.sleep(0.01)
+            main.product_db.delete_product(1)
+            hub.close()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        response = client.get("/api/changes")
+        writer.join()
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        ready, deleted = _parse(response.content)
+        assert ready["event"] == "ready"
+        assert (deleted["event"], deleted["data"]["id"]) == ("delete", 1)
+
+    def test_sqlite_store_has_no_feed(self, client, monkeypatch, tmp_path):
+        """Test that the endpoint answers 501 on the SQLite store"""
+        monkeypatch.setattr(main, "product_db", SqliteProductDatabase(str(tmp_path / "feed.db")))
+        assert client.get("/api/changes").status_code == 501
@@ -0,0 +1,202 @@
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+from product_database import ProductDatabase
+from product_models import (
+    InsufficientStockError, CreateCategoryCommand, CreateProductCommand, ProductStatus, UpdateCategoryCommand, UpdateProductCommand
+)
+
+STRESS_SECONDS = 1.0
+
+
+def _fields(stock: int) -> dict:
+    """Product fields that all follow from the stock, so a mix of two versions is detectable"""
+    return {"name": f"Item {stock}", "price": stock * 2.0, "description": f"item batch{stock % 7}"}
+
+
+def _consistent(product) -> bool:
+    return product.name == f"Item {product.stock}" and product.price == product.stock * 2.0
+
+
+@pytest.fixture
+def stress_db():
+    """A store with a stable category that writers never touch and a churn category that they do"""
+    db = ProductDatabase(seed_sample_data=False)
+    stable = db.create_category(CreateCategoryCommand(name="Stable")).id
+    churn = db.create_category(CreateCategoryCommand(name="Churn")).id
+    for i in range(300):
+        db.create_product(CreateProductCommand(
+            sku=f"STABLE-{i}", stock=i, category_id=stable, status=ProductStatus.ACTIVE, **_fields(i)
+        ))
+    for i in range(300):
+        db.create_product(CreateProductCommand(
+            sku=f"CHURN-{i}", stock=i, category_id=churn, status=ProductStatus.INACTIVE, **_fields(i)
+        ))
+    return db, stable, churn
+
+
+class TestConcurrentAccess:
+    """Test suite for lock-free reads while other threads write"""
+
+    def test_updates_replace_records(self, fresh_db: ProductDatabase):
+        """Test that an update stores a new object and leaves the one readers hold unchanged"""
+        product = fresh_db.get_product_by_id(1)
+        stock, name = product.stock, product.name
+        updated = fresh_db.update_product(1, UpdateProductCommand(stock=stock + 5, name="Renamed"))
+        assert updated is not product
+        assert (product.stock, product.name) == (stock, name)
+        assert fresh_db.get_product_by_id(1) is updated
+
+        category = fresh_db.get_category_by_id(1)
+        name = category.name
+        fresh_db.update_category(1, UpdateCategoryCommand(name="Renamed"))
+        assert category.name == name
+        assert fresh_db.get_category_by_id(1).name == "Renamed"
+
+    def test_concurrent_creates_get_distinct_ids(self):
+        """Test that ids handed out to creating threads are unique and contiguous"""
+        db = ProductDatabase(seed_sample_data=False)
+        category_id = db.create_category(CreateCategoryCommand(name="Parallel")).id
+        ids = []
+
+        def create(worker: int):
+            for i in range(200):
+                product = db.create_product(CreateProductCommand(
+                    sku=f"P-{worker}-{i}", stock=i, category_id=category_id, status=ProductStatus.ACTIVE, **_fields(i)
+                ))
+                ids.append(product.id)
+
+        threads = [threading.Thread(target=create, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(ids) == list(range(1, 801))
+        assert db.next_product_id == 801
+        assert [p.id for p in db.get_products_by_category(category_id)] == list(range(1, 801))
+
+    def test_hot_sku_never_oversells(self, fresh_db: ProductDatabase):
+        """Test that threads racing to take stock from one product sell exactly what it had"""
+        stock = fresh_db.get_product_by_id(2).stock
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        sold = [0] * 8
+
+        def buyer(slot: int):
+            while True:
+                try:
+                    fresh_db.adjust_stock(2, -1)
+                except InsufficientStockError:
+                    return
+                sold[slot] += 1
+
+        threads = [threading.Thread(target=buyer, args=(slot,)) for slot in range(len(sold))]
+        try:
+            for thread in threads:
+                thread.start()
+        finally:
+            for thread in threads:
+                thread.join()
+            sys.setswitchinterval(interval)
+        assert sum(sold) == stock
+        product = fresh_db.get_product_by_id(2)
+        assert (product.stock, product.status) == (0, ProductStatus.OUT_OF_STOCK)
+        assert fresh_db.get_inventory_stats(1).status_counts[ProductStatus.OUT_OF_STOCK] == 2
+
+    def test_reads_during_writes(self, stress_db):
+        """Stress test: readers see whole records and complete listings while writers churn the catalog"""
+        db, stable, churn = stress_db
+        stable_ids = [p.id for p in db.get_products_by_category(stable)]
+        stable_stock = sum(p.stock for p in db.get_products_by_category(stable))
+        # Switch threads far more often than the default 5 ms to interleave reads with writes
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        stop = threading.Event()
+        errors = []
+        reads = [0, 0]
+        writes = [0]
+
+        def writer(seed: int):
+            rng = random.Random(seed)
+            serial = 0
+            try:
+                while not stop.is_set():
+                    churned = db.get_products_by_category(churn)
+                    action = rng.random()
+                    if action < 0.3 or len(churned) < 50:
+                        serial += 1
+                        stock = rng.randint(0, 1000)
+                        db.create_product(CreateProductCommand(
+                            sku=f"NEW-{seed}-{serial}", stock=stock, category_id=churn,
+                            status=rng.choice(list(ProductStatus)), **_fields(stock)
+                        ))
+                    elif action < 0.5:
+                        db.delete_product(rng.choice(churned).id)
+                    else:
+                        stock = rng.randint(0, 1000)
+                        db.update_product(rng.choice(churned).id, UpdateProductCommand(
+                            stock=stock, status=rng.choice(list(ProductStatus)), **_fields(stock)
+                        ))
+                    writes[0] += 1
+            except Exception as exc:  # pragma: no cover - reported by the assertion below
+                errors.append(exc)
+
+        def check_listing(products, key):
+            keys = [key(p) for p in products]
+            assert keys == sorted(keys) and len(set(keys)) == len(keys), "listing out of order or repeated"
+            assert all(_consistent(p) for p in products), "torn record"
+            seen = {p.id for p in products}
+            assert seen.issuperset(stable_ids), "stable product missing"
+
+        def reader(slot: int):
+            try:
+                while not stop.is_set():
+                    product = db.get_product_by_id(random.choice(stable_ids))
+                    assert product is not None and _consistent(product)
+
+                    products, after = db.get_products_page(97)
+                    while after is not None:
+                        page, after = db.get_products_page(97, after)
+                        products.extend(page)
+                    check_listing(products, lambda p: p.id)
+
+                    products, after = db.get_products_sorted("price", 97)
+                    while after is not None:
+                        page, after = db.get_products_sorted("price", 97, after)
+                        products.extend(page)
+                    check_listing(products, lambda p: (p.price, p.id))
+
+                    assert [p.id for p in db.get_products_by_category(stable)] == stable_ids
+                    check_listing(db.find_products(status=ProductStatus.ACTIVE), lambda p: p.id)
+                    assert all(_consistent(p) for p in db.search_products("item", 50)[0])
+
+                    stats = db.get_inventory_stats()
+                    assert sum(stats.status_counts.values()) == stats.product_count
+                    stats = db.get_inventory_stats(stable)
+                    assert (stats.product_count, stats.total_stock) == (300, stable_stock)
+                    reads[slot] += 1
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(2)]
+        threads += [threading.Thread(target=reader, args=(slot,)) for slot in range(2)]
+        try:
+            for thread in threads:
+                thread.start()
+            time.sleep(STRESS_SECONDS)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            sys.setswitchinterval(interval)
+
+        assert not errors, errors[0]
+        assert writes[0] > 0 and min(reads) > 0
+        # The indexes still agree with the products once the writers are done
+        for status in ProductStatus:
+            expected = sorted(p.id for p in db.get_all_products() if p.status == status)
+            assert [p.id for p in db.find_products(status=status)] == expected
@@ -1,6 +1,10 @@
 import pytest
-from product_database import ProductDatabase
-from product_models import ProductStatus, CreateProductCommand, CreateCategoryCommand, UpdateProductCommand, UpdateCategoryCommand
+from product_database import DuplicateSkuError, ProductDatabase, _matches
+from product_models import (
+    ProductStatus, CreateProductCommand, CreateCategoryCommand, UpdateProductCommand, UpdateCategoryCommand,
+    InvalidCategoryError, ProductNotFoundError, InsufficientStockError, SkuNotFoundError, StockOutOfRangeError,
+    INT64_MAX
+)
 
 
 class TestProductDatabase:
@@ -167,4 +171,307 @@ class TestProductDatabase:
             assert product.sku is not None and product.sku != ""
             assert product.stock >= 0
             assert product.price >= 0
-            assert isinstance(product.status, ProductStatus)
\ No newline at end of file
+            assert isinstance(product.status, ProductStatus)
+
+    def test_get_products_page(self, fresh_db: ProductDatabase):
+        """Test keyset pagination over products ordered by id"""
+        first_page, next_after = fresh_db.get_products_page(limit=8)
+        assert [p.id for p in first_page] == list(range(1, 9))
+        assert next_after == 8
+
+        second_page, next_after = fresh_db.get_products_page(limit=8, after=next_after)
+        assert [p.id for p in second_page] == list(range(9, 17))
+
+        last_page, next_after = fresh_db.get_products_page(limit=8, after=next_after)
+        assert [p.id for p in last_page] == list(range(17, 21))
+        assert next_after is None
+
+    def test_get_products_page_stable_under_mutation(self, fresh_db: ProductDatabase):
+        """Test that a cursor keeps its position while products are added and removed"""
+        first_page, next_after = fresh_db.get_products_page(limit=5)
+        assert next_after == 5
+
+        # Delete an already-returned product and the next unseen one, then add a new one
+        fresh_db.delete_product(2)
+        fresh_db.delete_product(6)
+        created = fresh_db.create_product(CreateProductCommand(
+            name="Late Product", sku="LATE-001", stock=1, price=1.0,
+            category_id=1, status=ProductStatus.ACTIVE
+        ))
+
+        rest, next_after = fresh_db.get_products_page(limit=100, after=5)
+        rest_ids = [p.id for p in rest]
+        assert rest_ids == list(range(7, 21)) + [created.id]
+        assert next_after is None
+
+    def test_get_products_page_by_category(self, fresh_db: ProductDatabase):
+        """Test pagination restricted to a single category"""
+        page, next_after = fresh_db.get_products_page(limit=3, category_id=1)
+        assert [p.id for p in page] == [1, 2, 3]
+        page, next_after = fresh_db.get_products_page(limit=3, after=next_after, category_id=1)
+        assert [p.id for p in page] == [4]
+        assert next_after is None
+
+    def test_broad_range_pages_walk_id_order(self, fresh_db: ProductDatabase, monkeypatch):
+        """Test that pages of a range matching most products skip the range instead of sorting it"""
+        expected = [p.id for p in fresh_db.find_products(min_stock=1)]
+        assert len(expected) > 6
+
+        def range_ids(*args):
+            raise AssertionError("a broad range must not be collected and sorted for one page")
+
+        monkeypatch.setattr(fresh_db._stock_index, "range_ids", range_ids)
+        ids, next_after = [], None
+        while True:
+            page, next_after = fresh_db.get_products_page(limit=2, after=next_after, min_stock=1)
+            ids.extend(p.id for p in page)
+            if next_after is None:
+                break
+        assert ids == expected
+
+        # A range narrow enough is still read from the index
+        with pytest.raises(AssertionError):
+            fresh_db.get_products_page(limit=2, min_stock=10_000)
+
+    def test_category_index_tracks_mutations(self, fresh_db: ProductDatabase):
+        """Test that the category index follows creates, category moves and deletes"""
+        created = fresh_db.create_product(CreateProductCommand(
+            name="Indexed Product", sku="IDX-001", stock=1, price=1.0,
+            category_id=2, status=ProductStatus.ACTIVE
+        ))
+        assert created.id in [p.id for p in fresh_db.get_products_by_category(2)]
+
+        fresh_db.update_product(created.id, UpdateProductCommand(category_id=3))
+        assert created.id not in [p.id for p in fresh_db.get_products_by_category(2)]
+        category_3_ids = [p.id for p in fresh_db.get_products_by_category(3)]
+        assert category_3_ids == sorted(category_3_ids)
+        assert created.id in category_3_ids
+
+        fresh_db.delete_product(created.id)
+        assert created.id not in [p.id for p in fresh_db.get_products_by_category(3)]
+
+        # The index agrees with a full scan for every category
+        for category in fresh_db.get_all_categories():
+            expected = [p.id for p in fresh_db.get_all_products() if p.category_id == category.id]
+            assert [p.id for p in fresh_db.get_products_by_category(category.id)] == expected
+
+    def test_get_product_by_sku(self, fresh_db: ProductDatabase):
+        """Test looking products up through the SKU index"""
+        product = fresh_db.get_product_by_sku("BOOK-002")
+        assert product is not None
+        assert product.name == "Novel"
+        assert fresh_db.get_product_by_sku("NOPE-000") is None
+
+    def test_sku_uniqueness(self, fresh_db: ProductDatabase):
+        """Test that SKUs stay unique across creates and updates"""
+        duplicate = CreateProductCommand(
+            name="Duplicate", sku="ELEC-001", stock=1, price=1.0,
+            category_id=1, status=ProductStatus.ACTIVE
+        )
+        with pytest.raises(DuplicateSkuError):
+            fresh_db.create_product(duplicate)
+        assert len(fresh_db.get_all_products()) == 20
+
+        with pytest.raises(DuplicateSkuError):
+            fresh_db.update_product(2, UpdateProductCommand(sku="ELEC-001"))
+        assert fresh_db.get_product_by_id(2).sku == "ELEC-002"
+
+        # Re-saving a product with its own SKU is allowed
+        assert fresh_db.update_product(1, UpdateProductCommand(sku="ELEC-001", stock=3)) is not None
+
+    def test_sku_index_follows_renames_and_deletes(self, fresh_db: ProductDatabase):
+        """Test that renamed and deleted SKUs become available again"""
+        fresh_db.update_product(1, UpdateProductCommand(sku="ELEC-001-B"))
+        assert fresh_db.get_product_by_sku("ELEC-001") is None
+        assert fresh_db.get_product_by_sku("ELEC-001-B").id == 1
+
+        fresh_db.delete_product(2)
+        assert fresh_db.get_product_by_sku("ELEC-002") is None
+        recreated = fresh_db.create_product(CreateProductCommand(
+            name="Laptop", sku="ELEC-002", stock=1, price=1.0,
+            category_id=1, status=ProductStatus.ACTIVE
+        ))
+        assert fresh_db.get_product_by_sku("ELEC-002").id == recreated.id
+
+    def test_batch_create(self, fresh_db: ProductDatabase):
+        """Test that a batch create applies valid items and reports the rest"""
+        def command(sku, category_id=1):
+            return CreateProductCommand(
+                name=sku, sku=sku, stock=1, price=1.0, category_id=category_id, status=ProductStatus.ACTIVE
+            )
+
+        results = fresh_db.create_products([
+            command("BATCH-1"), command("ELEC-001"), command("BATCH-2", 999), command("BATCH-1"), command("BATCH-3")
+        ])
+        assert [r.id for r in results if not isinstance(r, Exception)] == [21, 22]
+        assert isinstance(results[1], DuplicateSkuError)
+        assert isinstance(results[2], InvalidCategoryError)
+        # Items see the effects of earlier items in the same batch
+        assert isinstance(results[3], DuplicateSkuError)
+        assert fresh_db.get_product_by_sku("BATCH-3").id == 22
+        assert fresh_db.get_product_by_sku("BATCH-2") is None
+
+    def test_batch_update_and_delete(self, fresh_db: ProductDatabase):
+        """Test that batch updates and deletes report per-item outcomes"""
+        results = fresh_db.update_products([
+            (1, UpdateProductCommand(stock=3)),
+            (999, UpdateProductCommand(stock=3)),
+            (2, UpdateProductCommand(category_id=999)),
+            (3, UpdateProductCommand(sku="ELEC-001")),
+        ])
+        assert results[0].stock == 3
+        assert isinstance(results[1], ProductNotFoundError)
+        assert isinstance(results[2], InvalidCategoryError)
+        assert isinstance(results[3], DuplicateSkuError)
+        assert fresh_db.get_product_by_id(2).category_id == 1
+
+        assert fresh_db.delete_products([1, 999, 1]) == [True, False, False]
+        assert fresh_db.get_product_by_id(1) is None
+        assert 1 not in [p.id for p in fresh_db.get_products_by_category(1)]
+
+    def test_adjust_stock(self, fresh_db: ProductDatabase):
+        """Test that a stock adjustment applies the delta and flips between active and out of stock"""
+        assert fresh_db.adjust_stock(1, -20).stock == 30
+        assert fresh_db.adjust_stock(1, -30).status == ProductStatus.OUT_OF_STOCK
+        restocked = fresh_db.adjust_stock(1, 5)
+        assert (restocked.stock, restocked.status) == (5, ProductStatus.ACTIVE)
+        assert 1 in [p.id for p in fresh_db.find_products(status=ProductStatus.ACTIVE, max_stock=5)]
+
+        with pytest.raises(InsufficientStockError):
+            fresh_db.adjust_stock(1, -6)
+        assert fresh_db.get_product_by_id(1).stock == 5
+        assert fresh_db.adjust_stock(1, -6, fail_if_negative=False).stock == -1
+        with pytest.raises(StockOutOfRangeError):
+            fresh_db.adjust_stock(3, INT64_MAX)
+        # Inactive products keep their status whatever the stock
+        assert fresh_db.adjust_stock(8, -15).status == ProductStatus.INACTIVE
+        assert fresh_db.adjust_stock(999, 1) is None
+
+    def test_adjust_stocks_by_sku(self, fresh_db: ProductDatabase):
+        """Test that a batch adjustment resolves SKUs and reports per-item errors"""
+        results = fresh_db.adjust_stocks([
+            ("ELEC-004", 3, True), ("NOPE-001", 1, True), ("ELEC-002", -26, True), ("ELEC-002", -25, True)
+        ])
+        assert (results[0].stock, results[0].status) == (3, ProductStatus.ACTIVE)
+        assert isinstance(results[1], SkuNotFoundError)
+        assert isinstance(results[2], InsufficientStockError)
+        assert results[3].status == ProductStatus.OUT_OF_STOCK
+        assert fresh_db.get_inventory_stats(1).total_stock == 50 + 0 + 100 + 3
+
+    def test_inventory_stats_track_mutations(self, fresh_db: ProductDatabase):
+        """Test that the running totals always equal a recount of the catalog"""
+        def recount(category_id=None):
+            products = [p for p in fresh_db.products.values() if category_id in (None, p.category_id)]
+            return {
+                "product_count": len(products),
+                "total_stock": sum(p.stock for p in products),
+                "total_stock_value": pytest.approx(sum(p.price * p.stock for p in products), abs=0.01),
+                "status_counts": {status: sum(p.status == status for p in products) for status in ProductStatus},
+            }
+
+        def check():
+            for category_id in (None, 1, 2, 7):
+                stats = fresh_db.get_inventory_stats(category_id).model_dump(exclude={"category_id"})
+                assert stats == recount(category_id)
+
+        check()
+        assert fresh_db.get_inventory_stats(1).product_count == 4
+        fresh_db.create_product(CreateProductCommand(
+            name="Cable", sku="STAT-1", stock=30, price=4.99, category_id=2, status=ProductStatus.INACTIVE
+        ))
+        fresh_db.update_product(1, UpdateProductCommand(stock=0, status=ProductStatus.OUT_OF_STOCK))
+        fresh_db.update_product(2, UpdateProductCommand(category_id=2, price=10.1))
+        fresh_db.delete_product(3)
+        fresh_db.delete_products([5, 6])
+        check()
+        assert fresh_db.get_inventory_stats(7).product_count == 0
+
+    def test_version_counters(self, fresh_db: ProductDatabase):
+        """Test that mutations advance the store version and the versions of the keys they touch"""
+        seeded = fresh_db.get_version()
+        assert fresh_db.get_version("product", 2) <= seeded
+
+        fresh_db.update_product(1, UpdateProductCommand(category_id=2))
+        version = fresh_db.get_version()
+        assert version == seeded + 1
+        assert fresh_db.get_version("product", 1) == version
+        assert fresh_db.get_version("products") == version
+        assert fresh_db.get_version("category_products", 1) == version
+        assert fresh_db.get_version("category_products", 2) == version
+        assert fresh_db.get_version("product", 2) < version
+        assert fresh_db.get_version("categories") < version
+
+        fresh_db.update_category(3, UpdateCategoryCommand(name="Library"))
+        assert fresh_db.get_version() == version + 1
+        assert fresh_db.get_version("category", 3) == version + 1
+        assert fresh_db.get_version("category_products", 3) == version + 1
+        assert fresh_db.get_version("products") == version
+
+        # A deleted product keeps advancing, so an ETag from before the delete never matches
+        fresh_db.delete_product(2)
+        assert fresh_db.get_version("product", 2) == fresh_db.get_version() == version + 2
+        assert fresh_db.get_version("product", 999) == 0
+
+    def test_filters_follow_mutations(self, fresh_db: ProductDatabase):
+        """Test that price, stock and status filters agree with a full scan as products change"""
+        filter_sets = [
+            {"min_price": 20.0, "max_price": 150.0},
+            {"max_price": 19.99},
+            {"min_stock": 50},
+            {"min_stock": 1, "max_stock": 30, "status": ProductStatus.ACTIVE},
+            {"status": ProductStatus.OUT_OF_STOCK},
+            {"category_id": 4, "max_price": 50.0},
+            {"min_price": 500.0, "max_price": 100.0},
+        ]
+
+        def check():
+            for filters in filter_sets:
+                expected = [p.id for p in sorted(fresh_db.get_all_products(), key=lambda p: p.id)
+                            if _matches(p, **filters)]
+                assert [p.id for p in fresh_db.find_products(**filters)] == expected
+                page, next_after = fresh_db.get_products_page(limit=3, **filters)
+                assert [p.id for p in page] == expected[:3]
+                assert next_after == (expected[2] if len(expected) > 3 else None)
+
+        check()
+        fresh_db.update_product(1, UpdateProductCommand(price=19.99, stock=0, status=ProductStatus.OUT_OF_STOCK))
+        fresh_db.update_product(2, UpdateProductCommand(stock=25))
+        fresh_db.delete_product(6)
+        fresh_db.create_product(CreateProductCommand(
+            name="Rake", sku="HOME-005", stock=40, price=24.5, category_id=4, status=ProductStatus.ACTIVE
+        ))
+        check()
+
+        # The bulk rebuild used on recovery produces the same indexes
+        price_index, stock_index = fresh_db._price_index, fresh_db._stock_index
+        status_index = {status: list(ids) for status, ids in fresh_db._status_index.items()}
+        fresh_db._rebuild_indexes()
+        assert fresh_db._price_index.entries() == price_index.entries()
+        assert fresh_db._stock_index.entries() == stock_index.entries()
+        assert fresh_db._status_index == status_index
+
+    @pytest.mark.parametrize("sort", ["price", "stock", "name"])
+    @pytest.mark.parametrize("descending", [False, True])
+    def test_get_products_sorted(self, fresh_db: ProductDatabase, sort, descending):
+        """Test sorted pages from the ordered views, with and without filters, as products change"""
+        fresh_db.update_product(3, UpdateProductCommand(price=14.99, stock=60, name="Novel"))
+        fresh_db.delete_product(8)
+        fresh_db.create_product(CreateProductCommand(
+            name="Atlas", sku="BOOK-005", stock=0, price=1299.99, category_id=3, status=ProductStatus.ACTIVE
+        ))
+
+        for filters in ({}, {"status": ProductStatus.ACTIVE}, {"max_price": 100.0, "min_stock": 20}):
+            expected = sorted((p for p in fresh_db.get_all_products() if _matches(p, **filters)),
+                              key=lambda p: (getattr(p, sort), p.id), reverse=descending)
+            products, next_after = fresh_db.get_products_sorted(sort, descending=descending, **filters)
+            assert [p.id for p in products] == [p.id for p in expected] and next_after is None
+
+            for limit in (1, 3, 100):
+                seen, after = [], None
+                while True:
+                    page, after = fresh_db.get_products_sorted(sort, limit, after, descending=descending, **filters)
+                    assert len(page) <= limit
+                    seen.extend(p.id for p in page)
+                    if after is None:
+                        break
+                assert seen == [p.id for p in expected]
\ No newline at end of file
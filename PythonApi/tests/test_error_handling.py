@@ -254,4 +254,24 @@ class TestErrorHandling:
         # Final state should reflect the last update
         final_response = client.get(f"/api/products/{product_id}")
         final_product = final_response.json()
-        assert final_product["stock"] == 15
\ No newline at end of file
+        assert final_product["stock"] == 15
+
+    @pytest.mark.parametrize("price", ["NaN", "Infinity", "-Infinity", '"nan"', '"inf"'])
+    def test_non_finite_prices_rejected(self, client: TestClient, price: str):
+        """Test that NaN and infinite prices are rejected before they reach the store or its totals"""
+        stats = client.get("/api/stats").json()
+        product = ('{"name": "Bad Price", "sku": "NAN-001", "stock": 0, "price": %s, '
+                   '"category_id": 1, "status": "active"}' % price)
+        headers = {"Content-Type": "application/json"}
+
+        assert client.post("/api/products", content=product, headers=headers).status_code == 422
+        assert client.put("/api/products/1", content='{"price": %s}' % price, headers=headers).status_code == 422
+        batch = client.post("/api/products/batch", content="[%s]" % product, headers=headers)
+        assert batch.status_code == 422
+        batch = client.put("/api/products/batch", content='[{"id": 1, "command": {"price": %s}}]' % price,
+                           headers=headers)
+        assert batch.status_code == 422
+        assert client.get("/api/products", params={"min_price": price.strip('"')}).status_code == 422
+
+        assert client.get("/api/stats").json() == stats
+        assert client.get("/api/categories/1/stats").status_code == 200
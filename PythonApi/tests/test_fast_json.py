@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import fast_json
+import main
+from main import app
+from product_database import ProductDatabase
+from product_records import ProductRecord
+from response_cache import ResponseCache
+
+URLS = [
+    "/api/products",
+    "/api/products?max_price=100",
+    "/api/products?limit=3&after=MQ",
+    "/api/products?sort=-price&limit=4",
+    "/api/products?sort=name&status=active",
+    "/api/products/search?q=wireless",
+    "/api/products/2",
+    "/api/products/by-sku/BOOK-002",
+    "/api/categories/1/products",
+    "/api/categories/2/products?limit=2",
+]
+
+
+def _client(monkeypatch, fast: bool) -> TestClient:
+    monkeypatch.setattr(main, "product_db", ProductDatabase())
+    monkeypatch.setattr(main, "response_cache", ResponseCache())
+    monkeypatch.setattr(main, "fast_json", fast_json if fast else None)
+    return TestClient(app)
+
+
+class TestFastJson:
+    """Test suite for the orjson response path"""
+
+    def test_dumps_matches_pydantic(self):
+        """Test that records encode to the same bytes as the Product model"""
+        record = ProductRecord(id=1, name="Ünïcode ✓ \"quoted\"", sku="A-1", stock=-3, price=1e16,
+                               category_id=2, status="discontinued", description=None)
+        assert fast_json.dumps(record) == record.to_model().model_dump_json().encode("utf-8")
+        assert fast_json.dumps([record]) == main.PRODUCT_LIST.dump_json([record.to_model()])
+
+    def test_responses_match_validated_path(self, monkeypatch):
+        """Test that every product route returns the same body and headers on both paths"""
+        validated = [_client(monkeypatch, fast=False).get(url) for url in URLS]
+        fast = [_client(monkeypatch, fast=True).get(url) for url in URLS]
+        for url, expected, response in zip(URLS, validated, fast):
+            assert response.status_code == expected.status_code == 200, url
+            assert response.content == expected.content, url
+            assert response.headers["content-type"] == "application/json"
+            for header in ("ETag", "X-Next-Cursor"):
+                assert (header in response.headers) == (header in expected.headers), url
+        assert "X-Next-Cursor" in fast[2].headers
+
+    @pytest.mark.parametrize("url", ["/api/products/999", "/api/products/by-sku/NOPE", "/api/products?limit=0"])
+    def test_errors_unchanged(self, monkeypatch, url):
+        """Test that missing products and invalid parameters are reported as before"""
+        expected = _client(monkeypatch, fast=False).get(url)
+        response = _client(monkeypatch, fast=True).get(url)
+        assert (response.status_code, response.json()) == (expected.status_code, expected.json())
+
+    def test_schema_still_declares_products(self):
+        """Test that the OpenAPI schema keeps the response models of the fast routes"""
+        schema = app.openapi()["paths"]["/api/products"]["get"]["responses"]["200"]["content"]["application/json"]
+        assert schema["schema"]["items"] == {"$ref": "#/components/schemas/Product"}
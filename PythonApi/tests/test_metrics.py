@@ -0,0 +1,124 @@
+import asyncio
+import re
+import threading
+
+import pytest
+
+from metrics import LATENCY_BUCKETS, RequestMetrics
+from product_database import ProductDatabase
+from sqlite_database import SqliteProductDatabase
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Value of the sample ``name`` with exactly ``labels`` in Prometheus text; 0 when it is absent,
+    as for an operation not requested yet"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(f"{name}{{{label_text}}}" if labels else name) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _call(app):
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    await app({"type": "http"}, receive, send)
+
+
+class TestMetrics:
+    """Test suite for per-operation request metrics and the /metrics endpoint"""
+
+    def test_requests_recorded_per_operation(self, client):
+        """Test counts, client errors and a consistent histogram for each operation id"""
+        client.get("/api/products?limit=5")
+        client.put("/api/products/1", json={"stock": 3})
+        # The recorder lives as long as the app, so compare against a scrape taken before
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        before = response.text
+        client.get("/api/products/1")
+        client.get("/api/products/1")
+        client.get("/api/products/99999")
+        client.put("/api/products/1", json={"stock": 4})
+        after = client.get("/metrics").text
+
+        def delta(name, **labels):
+            return _sample(after, name, **labels) - _sample(before, name, **labels)
+
+        assert delta("inventory_http_requests_total", operation_id="GetProduct") == 3
+        assert delta("inventory_http_errors_total", operation_id="GetProduct", kind="client") == 1
+        assert delta("inventory_http_requests_total", operation_id="UpdateProduct") == 1
+        assert delta("inventory_http_requests_total", operation_id="GetProducts") == 0
+        assert _sample(after, "inventory_http_requests_in_flight", operation_id="GetProduct") == 0
+        count = _sample(after, "inventory_http_request_duration_seconds_count", operation_id="GetProduct")
+        assert _sample(after, "inventory_http_request_duration_seconds_bucket", operation_id="GetProduct",
+                       le="+Inf") == count
+        assert _sample(after, "inventory_http_request_duration_seconds_sum", operation_id="GetProduct") > 0
+
+    def test_store_gauges(self, client):
+        """Test that the store and response cache figures follow the store"""
+        text = client.get("/metrics").text
+        assert _sample(text, "inventory_store_products") == 20
+        assert _sample(text, "inventory_store_sku_index_entries") == 20
+        assert _sample(text, "inventory_store_search_index_terms") > 0
+        client.post("/api/products", json={
+            "name": "Gauge", "sku": "GAUGE-1", "stock": 1, "price": 1.0, "category_id": 1, "status": "active"
+        })
+        client.get("/api/products")
+        text = client.get("/metrics").text
+        assert _sample(text, "inventory_store_products") == 21
+        assert _sample(text, "inventory_response_cache_lookups_total", result="miss") >= 1
+
+    def test_in_flight_and_server_errors(self):
+        """Test that a request counts as in flight while handled, and an exception as a server error"""
+        metrics = RequestMetrics()
+        seen = {}
+
+        async def slow(scope, receive, send):
+            stats = metrics.snapshot()["Slow"]
+            seen["in_flight"] = stats.started - stats.finished
+            await _ok(scope, receive, send)
+
+        async def broken(scope, receive, send):
+            raise RuntimeError("boom")
+
+        asyncio.run(_call(metrics.wrap("Slow", slow)))
+        with pytest.raises(RuntimeError):
+            asyncio.run(_call(metrics.wrap("Broken", broken)))
+        totals = metrics.snapshot()
+        assert seen["in_flight"] == 1
+        assert totals["Slow"].started == totals["Slow"].finished == 1
+        assert totals["Broken"].server_errors == 1 and totals["Broken"].finished == 1
+        assert len(totals["Slow"].buckets) == len(LATENCY_BUCKETS) + 1
+
+    def test_threads_record_into_their_own_shards(self):
+        """Test that requests recorded on many threads all show up in the totals"""
+        metrics = RequestMetrics()
+        app = metrics.wrap("Threaded", _ok)
+
+        def worker():
+            for _ in range(200):
+                asyncio.run(_call(app))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert metrics.snapshot()["Threaded"].finished == 800
+
+    def test_store_metrics_of_both_stores(self, fresh_db: ProductDatabase, tmp_path):
+        """Test that both stores report their product and category counts"""
+        memory = fresh_db.get_store_metrics()
+        sqlite = SqliteProductDatabase(str(tmp_path / "metrics.db")).get_store_metrics()
+        assert (memory["products"], memory["categories"]) == (sqlite["products"], sqlite["categories"]) == (20, 6)
+        assert memory["price_index_entries"] == 20
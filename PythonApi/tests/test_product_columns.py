@@ -0,0 +1,113 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from inventory_stats import StockTotals
+from product_columns import ProductColumns
+from product_database import ProductDatabase, _matches
+from product_models import ProductStatus, CreateProductCommand, UpdateProductCommand, CreateCategoryCommand
+
+FILTERS = [
+    {},
+    {"max_price": 20.0},
+    {"min_price": 50.0, "max_price": 500.0},
+    {"category_id": 1},
+    {"status": ProductStatus.ACTIVE},
+    {"category_id": 3, "status": ProductStatus.OUT_OF_STOCK},
+    {"category_id": 999},
+    {"min_stock": 1, "max_stock": 30},
+    {"max_price": 100.0, "max_stock": 0},
+]
+
+
+@pytest.fixture
+def columnar_db():
+    """Create a fresh database that keeps the columnar mirror"""
+    return ProductDatabase(columnar=True)
+
+
+def _scan_totals(db: ProductDatabase, **filters) -> StockTotals:
+    totals = StockTotals()
+    for product in db.products.values():
+        if _matches(product, **filters):
+            totals.add(product)
+    return totals
+
+
+def _assert_matches_scan(db: ProductDatabase):
+    columns = db._columns
+    for filters in FILTERS:
+        expected = _scan_totals(db, **filters)
+        totals = columns.totals(columns.mask(**filters))
+        assert (totals.product_count, totals.total_stock, totals.status_counts) == (
+            expected.product_count, expected.total_stock, expected.status_counts)
+        assert totals.total_stock_value == pytest.approx(expected.total_stock_value)
+        # A stock bound that matches everything still sends the store through the mirror
+        stats = db.get_inventory_stats(**{"min_stock": -2**63, **filters})
+        assert stats.product_count == expected.product_count
+        assert stats.total_stock_value == pytest.approx(expected.total_stock_value, abs=0.01)
+
+
+class TestProductColumns:
+    """Test suite for the NumPy columnar mirror"""
+
+    def test_queries_match_object_scan(self, columnar_db: ProductDatabase):
+        """Test that vectorized filters and aggregates agree with a plain scan"""
+        assert columnar_db._columns.size == 20
+        _assert_matches_scan(columnar_db)
+        assert [p.id for p in columnar_db.find_products(category_id=1)] == [1, 2, 3, 4]
+
+    def test_mirror_follows_mutations(self, columnar_db: ProductDatabase):
+        """Test that creates, updates and deletes keep the mirror in sync"""
+        category = columnar_db.create_category(CreateCategoryCommand(name="Cheap"))
+        for i in range(2000):
+            columnar_db.create_product(CreateProductCommand(
+                name=f"Item {i}", sku=f"COL-{i}", stock=i % 7, price=float(i % 40),
+                category_id=category.id, status=ProductStatus.ACTIVE
+            ))
+        columnar_db.update_product(1, UpdateProductCommand(price=5.0, category_id=category.id))
+        columnar_db.update_product(2, UpdateProductCommand(status=ProductStatus.DISCONTINUED, stock=0))
+        for product_id in range(3, 1500, 3):
+            columnar_db.delete_product(product_id)
+        columnar_db.delete_products([1500, 1501, 99999])
+
+        assert columnar_db._columns.size == len(columnar_db.products)
+        _assert_matches_scan(columnar_db)
+        assert 1 in [p.id for p in columnar_db.find_products(max_price=5.0, category_id=category.id)]
+
+    def test_mirror_is_rebuilt_on_recovery(self, tmp_path):
+        """Test that a durable database rebuilds the mirror from its snapshot and log"""
+        db = ProductDatabase.open_durable(str(tmp_path), columnar=True)
+        db.update_product(4, UpdateProductCommand(price=1.0))
+        db.delete_product(5)
+        db.close()
+
+        reopened = ProductDatabase.open_durable(str(tmp_path), columnar=True)
+        assert reopened._columns.size == 19
+        assert [p.id for p in reopened.find_products(max_price=1.0)] == [4]
+        _assert_matches_scan(reopened)
+        reopened.close()
+
+    def test_from_products(self, fresh_db: ProductDatabase):
+        """Test building the mirror in bulk"""
+        columns = ProductColumns.from_products(fresh_db.get_all_products())
+        assert columns.size == 20
+        assert columns.totals(columns.mask(category_id=2)).product_count == 4
+        columns.remove(5)
+        columns.remove(5)
+        assert columns.totals(columns.mask(category_id=2)).product_count == 3
+
+    def test_filtered_stats_with_and_without_mirror(self, columnar_db: ProductDatabase, fresh_db: ProductDatabase):
+        """Test that the mirror and the index scan give the same filtered statistics"""
+        for filters in FILTERS:
+            filters = {"max_stock": 2**63 - 1, **filters}
+            assert columnar_db.get_inventory_stats(**filters) == fresh_db.get_inventory_stats(**filters)
+
+    def test_huge_stock_sums_exactly(self, columnar_db: ProductDatabase):
+        """Test that stock totals beyond the int64 range are summed exactly"""
+        for i in range(3):
+            columnar_db.create_product(CreateProductCommand(
+                name=f"Bulk {i}", sku=f"BULK-{i}", stock=2**63 - 1, price=0.0, category_id=1,
+                status=ProductStatus.ACTIVE
+            ))
+        assert columnar_db.get_inventory_stats(min_stock=2**62).total_stock == 3 * (2**63 - 1)
@@ -1,6 +1,12 @@
+import csv
+import io
+import json
+
 import pytest
 from fastapi.testclient import TestClient
+import main
 from product_models import ProductStatus
+from response_cache import ResponseCache
 
 
 class TestProductEndpoints:
@@ -200,4 +206,411 @@ class TestProductEndpoints:
         }
         
         response = client.post("/api/products", json=invalid_data)
-        assert response.status_code == 422  # Validation error
\ No newline at end of file
+        assert response.status_code == 422  # Validation error
+
+    def test_get_products_paginated(self, client: TestClient):
+        """Test walking the product list page by page with cursors"""
+        all_ids = [p["id"] for p in client.get("/api/products").json()]
+
+        seen_ids = []
+        params = {"limit": 7}
+        while True:
+            response = client.get("/api/products", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 7
+            seen_ids.extend(p["id"] for p in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            params = {"limit": 7, "after": cursor}
+
+        assert seen_ids == sorted(all_ids)
+
+    def test_get_products_invalid_cursor(self, client: TestClient):
+        """Test that a malformed cursor is rejected"""
+        response = client.get("/api/products", params={"limit": 5, "after": "not-a-cursor"})
+        assert response.status_code == 400
+        assert "Invalid cursor" in response.json()["detail"]
+
+    def test_get_products_invalid_limit(self, client: TestClient):
+        """Test that out-of-range page sizes are rejected"""
+        assert client.get("/api/products", params={"limit": 0}).status_code == 422
+        assert client.get("/api/products", params={"limit": 100000}).status_code == 422
+
+    def test_get_products_by_category_paginated(self, client: TestClient):
+        """Test paginating the products of a single category"""
+        response = client.get("/api/categories/1/products", params={"limit": 2})
+        assert response.status_code == 200
+        first_page = response.json()
+        assert len(first_page) == 2
+        assert all(p["category_id"] == 1 for p in first_page)
+
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get("/api/categories/1/products", params={"limit": 2, "after": cursor})
+        second_page = response.json()
+        assert all(p["category_id"] == 1 for p in second_page)
+        assert second_page[0]["id"] > first_page[-1]["id"]
+
+    def test_get_product_by_sku(self, client: TestClient):
+        """Test looking up a product by SKU"""
+        response = client.get("/api/products/by-sku/ELEC-002")
+        assert response.status_code == 200
+        product = response.json()
+        assert product["sku"] == "ELEC-002"
+        assert product["name"] == "Laptop"
+
+    def test_get_product_by_sku_not_found(self, client: TestClient):
+        """Test looking up an unknown SKU"""
+        response = client.get("/api/products/by-sku/UNKNOWN-999")
+        assert response.status_code == 404
+        assert "Product not found" in response.json()["detail"]
+
+    def test_create_product_duplicate_sku(self, client: TestClient, sample_product_data):
+        """Test that creating a product with an existing SKU is rejected"""
+        duplicate_data = sample_product_data.copy()
+        duplicate_data["sku"] = "ELEC-001"
+
+        response = client.post("/api/products", json=duplicate_data)
+        assert response.status_code == 409
+        assert "already exists" in response.json()["detail"]
+
+    def test_update_product_duplicate_sku(self, client: TestClient):
+        """Test that updating a product to another product's SKU is rejected"""
+        response = client.put("/api/products/2", json={"sku": "ELEC-001"})
+        assert response.status_code == 409
+        assert client.get("/api/products/2").json()["sku"] == "ELEC-002"
+
+    def test_create_products_batch(self, client: TestClient, sample_product_data):
+        """Test that a batch create reports a status for every item"""
+        duplicate = {**sample_product_data, "sku": "ELEC-001"}
+        invalid = {**sample_product_data, "sku": "TEST-002", "category_id": 999}
+        response = client.post("/api/products/batch", json=[sample_product_data, duplicate, invalid])
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status_code"] for r in results] == [200, 409, 400]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert results[0]["success"] is True
+        assert results[0]["product"]["sku"] == "TEST-001"
+        assert client.get(f"/api/products/{results[0]['id']}").status_code == 200
+        assert results[1]["success"] is False
+        assert "already exists" in results[1]["detail"]
+
+    def test_update_products_batch(self, client: TestClient):
+        """Test that a batch update applies valid items and reports missing ones"""
+        response = client.put("/api/products/batch", json=[
+            {"id": 1, "command": {"stock": 42}},
+            {"id": 999, "command": {"stock": 42}},
+        ])
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status_code"] for r in results] == [200, 404]
+        assert results[1]["id"] == 999
+        assert client.get("/api/products/1").json()["stock"] == 42
+
+    def test_delete_products_batch(self, client: TestClient):
+        """Test that a batch delete reports which ids were removed"""
+        response = client.post("/api/products/batch/delete", json=[1, 2, 999])
+        assert response.status_code == 200
+        assert [(r["id"], r["status_code"]) for r in response.json()] == [(1, 200), (2, 200), (999, 404)]
+        assert client.get("/api/products/1").status_code == 404
+
+    def test_adjust_stock(self, client: TestClient):
+        """Test the single stock adjustment endpoint and its error codes"""
+        response = client.post("/api/products/2/stock/adjust", json={"delta": -25})
+        assert response.status_code == 200
+        assert (response.json()["stock"], response.json()["status"]) == (0, "out_of_stock")
+        response = client.post("/api/products/2/stock/adjust", json={"delta": -1})
+        assert response.status_code == 409
+        assert "Insufficient stock" in response.json()["detail"]
+        response = client.post("/api/products/2/stock/adjust", json={"delta": -1, "fail_if_negative": False})
+        assert response.json()["stock"] == -1
+        assert client.post("/api/products/3/stock/adjust", json={"delta": 2**63 - 1}).status_code == 400
+        assert client.post("/api/products/999/stock/adjust", json={"delta": 1}).status_code == 404
+        assert client.post("/api/products/2/stock/adjust", json={}).status_code == 422
+
+    def test_adjust_stock_batch(self, client: TestClient):
+        """Test that a batch stock adjustment reports a status for every SKU"""
+        response = client.post("/api/products/batch/stock/adjust", json=[
+            {"sku": "ELEC-004", "delta": 10},
+            {"sku": "NOPE-001", "delta": 1},
+            {"sku": "ELEC-001", "delta": -51},
+        ])
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status_code"] for r in results] == [200, 404, 409]
+        assert results[0]["product"]["status"] == "active"
+        assert results[2]["id"] == 1
+        assert client.get("/api/products/1").json()["stock"] == 50
+
+    def test_batch_validation_rejects_whole_request(self, client: TestClient, sample_product_data):
+        """Test that a malformed item or an oversized batch rejects the request before any write"""
+        response = client.post("/api/products/batch", json=[sample_product_data, {"name": "Missing fields"}])
+        assert response.status_code == 422
+        assert client.get("/api/products/by-sku/TEST-001").status_code == 404
+
+        response = client.post("/api/products/batch/delete", json=list(range(main.MAX_BATCH_SIZE + 1)))
+        assert response.status_code == 422
+
+    def test_etag_and_not_modified(self, client: TestClient):
+        """Test that a matching If-None-Match gets a 304 until the products change"""
+        response = client.get("/api/products")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "no-cache"
+
+        response = client.get("/api/products", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert client.get("/api/products", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+        # Category changes leave the product list's ETag alone
+        client.put("/api/categories/1", json={"name": "Gadgets"})
+        assert client.get("/api/products", headers={"If-None-Match": etag}).status_code == 304
+
+        client.put("/api/products/1", json={"stock": 1})
+        response = client.get("/api/products", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_product_etag_is_per_product(self, client: TestClient):
+        """Test that a product's ETag changes only when that product changes"""
+        etag_1 = client.get("/api/products/1").headers["ETag"]
+        etag_2 = client.get("/api/products/2").headers["ETag"]
+
+        client.put("/api/products/2", json={"stock": 3})
+        assert client.get("/api/products/1", headers={"If-None-Match": etag_1}).status_code == 304
+        assert client.get("/api/products/2", headers={"If-None-Match": etag_2}).status_code == 200
+
+        client.delete("/api/products/1")
+        assert client.get("/api/products/1", headers={"If-None-Match": etag_1}).status_code == 404
+
+    def test_if_none_match_star_needs_a_current_resource(self, client: TestClient):
+        """Test that If-None-Match: * gets a 304 only for resources that exist, and a 404 otherwise"""
+        for url in ("/api/products", "/api/products/2", "/api/products/by-sku/BOOK-002", "/api/categories/1",
+                    "/api/categories/1/products", "/api/categories/1/stats"):
+            assert client.get(url, headers={"If-None-Match": "*"}).status_code == 304
+        for url in ("/api/products/999", "/api/products/by-sku/NOPE-1", "/api/categories/999",
+                    "/api/categories/999/products", "/api/categories/999/stats"):
+            assert client.get(url, headers={"If-None-Match": "*"}).status_code == 404
+
+        # An id that never existed has version 0; its would-be ETag does not hide the 404 either
+        never_issued = f'"{main.product_db.epoch}-0"'
+        assert client.get("/api/products/999", headers={"If-None-Match": never_issued}).status_code == 404
+        products_etag = client.get("/api/products").headers["ETag"]
+        assert client.get("/api/products/by-sku/NOPE-1", headers={"If-None-Match": products_etag}).status_code == 404
+
+    def test_list_responses_are_cached(self, client: TestClient):
+        """Test that list bodies are served from the cache until a mutation touches them"""
+        first = client.get("/api/products")
+        second = client.get("/api/products")
+        assert second.content == first.content
+        assert second.json() == first.json()
+        assert len(first.json()) == 20
+        assert client.get("/api/stats/cache").json()["hits"] == 1
+
+        client.get("/api/categories/1/products")
+        client.put("/api/products/1", json={"stock": 7})
+        assert client.get("/api/products").json()[0]["stock"] == 7
+        assert client.get("/api/categories/1/products").json()[0]["stock"] == 7
+        stats = client.get("/api/stats/cache").json()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 4, 2)
+        assert stats["bytes"] > 0
+
+        # Category changes do not invalidate the product list
+        client.put("/api/categories/2", json={"name": "Apparel"})
+        client.get("/api/products")
+        assert client.get("/api/categories").json()[1]["name"] == "Apparel"
+        stats = client.get("/api/stats/cache").json()
+        assert (stats["hits"], stats["misses"]) == (2, 5)
+
+    def test_stale_cache_entries_are_dropped(self, client: TestClient):
+        """Test that entries made stale by a write are removed even if nobody requests them again"""
+        category_id = client.post("/api/categories", json={"name": "Short-lived"}).json()["id"]
+        client.get(f"/api/categories/{category_id}/products")
+        client.get("/api/categories")
+        client.get("/api/products")
+        assert client.get("/api/stats/cache").json()["entries"] == 3
+
+        client.delete(f"/api/categories/{category_id}")
+        client.get("/api/products")
+        stats = client.get("/api/stats/cache").json()
+        assert (stats["entries"], stats["hits"]) == (1, 1)
+        assert stats["bytes"] == len(client.get("/api/products").content)
+
+    def test_response_cache_evicts_least_recently_used(self):
+        """Test that the cache stays within its byte limit by evicting the least recently used bodies"""
+        cache = ResponseCache(max_bytes=10)
+        cache.get_or_build("a", "1", lambda: b"aaaa")
+        cache.get_or_build("b", "1", lambda: b"bbbb")
+        cache.get_or_build("a", "1", lambda: b"rebuilt")
+        cache.get_or_build("c", "1", lambda: b"cccc")
+        assert cache.get_or_build("a", "1", lambda: b"rebuilt") == b"aaaa"
+        assert cache.get_or_build("b", "1", lambda: b"bbbb") == b"bbbb"
+        assert cache.stats() == {"hits": 2, "misses": 4, "evictions": 2, "entries": 2, "bytes": 8}
+
+        # A body larger than the limit is returned but not kept
+        assert cache.get_or_build("d", "1", lambda: b"d" * 11) == b"d" * 11
+        assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 8
+
+    def test_export_ndjson(self, client: TestClient):
+        """Test that the NDJSON export streams every product in id order"""
+        main.product_db.delete_product(3)
+        response = client.get("/api/products/export?format=ndjson")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert response.headers["content-disposition"] == 'attachment; filename="products.ndjson"'
+        lines = response.text.splitlines()
+        assert [json.loads(line) for line in lines] == client.get("/api/products").json()
+        assert len(lines) == 19
+
+    def test_export_csv(self, client: TestClient):
+        """Test that the CSV export has a header row and one row per product"""
+        client.put("/api/products/1", json={"name": 'Phone, "Pro"', "description": None})
+        response = client.get("/api/products/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 20
+        assert rows[0]["name"] == 'Phone, "Pro"'
+        assert rows[0]["description"] == ""
+        assert rows[1] == {
+            "id": "2", "name": "Laptop", "sku": "ELEC-002", "stock": "25", "price": "1299.99",
+            "category_id": "1", "status": "active", "description": "High-performance laptop for work and gaming",
+        }
+
+    def test_export_invalid_format(self, client: TestClient):
+        """Test that an unknown export format is rejected"""
+        assert client.get("/api/products/export?format=xml").status_code == 422
+
+    def test_import_products(self, client: TestClient):
+        """Test that an uploaded CSV is imported with per-row errors"""
+        body = (
+            "name,sku,stock,price,category_id,status,description\n"
+            "Kettle,IMP-001,5,29.5,4,active,Electric\n"
+            "Phone,ELEC-001,1,1,1,active,\n"
+        )
+        response = client.post("/api/products/import?format=csv", content=body.encode(),
+                               headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200
+        report = response.json()
+        assert (report["rows"], report["created"], report["failed"]) == (2, 1, 1)
+        assert report["errors"] == [{"line": 3, "detail": "SKU 'ELEC-001' already exists"}]
+        assert client.get("/api/products/by-sku/IMP-001").json()["description"] == "Electric"
+
+    def test_import_round_trips_export(self, client: TestClient):
+        """Test that an NDJSON export can be imported into an empty catalog"""
+        export = client.get("/api/products/export").content
+        for product in client.get("/api/products").json():
+            client.delete(f"/api/products/{product['id']}")
+
+        report = client.post("/api/products/import", content=export).json()
+        assert (report["created"], report["failed"]) == (20, 0)
+        assert [p["sku"] for p in client.get("/api/products").json()][:2] == ["ELEC-001", "ELEC-002"]
+
+    def test_import_invalid_header(self, client: TestClient):
+        """Test that a CSV without the required columns is rejected"""
+        response = client.post("/api/products/import?format=csv", content=b"name\nA\n")
+        assert response.status_code == 400
+        assert "missing columns" in response.json()["detail"]
+
+    def test_import_cr_line_endings(self, client: TestClient):
+        """Test that a CSV with CR-only line endings is imported row by row"""
+        body = "name,sku,stock,price,category_id,status\rKettle,CR-001,5,29.5,4,active\rMug,CR-002,1,4,4,active\r"
+        response = client.post("/api/products/import?format=csv", content=body.encode(),
+                               headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200
+        assert (response.json()["created"], response.json()["failed"]) == (2, 0)
+
+    def test_search_products(self, client: TestClient):
+        """Test ranked search over names and descriptions with cursor pagination"""
+        response = client.get("/api/products/search", params={"q": "book"})
+        assert response.status_code == 200
+        assert [p["sku"] for p in response.json()] == ["BOOK-001", "BOOK-004"]
+        assert "ETag" in response.headers
+        assert "X-Next-Cursor" not in response.headers
+
+        response = client.get("/api/products/search", params={"q": "book", "limit": 1})
+        assert [p["sku"] for p in response.json()] == ["BOOK-001"]
+        response = client.get("/api/products/search",
+                              params={"q": "book", "limit": 1, "after": response.headers["X-Next-Cursor"]})
+        assert [p["sku"] for p in response.json()] == ["BOOK-004"]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_search_products_sees_writes(self, client: TestClient, sample_product_data):
+        """Test that created and deleted products show up in search immediately"""
+        created = client.post("/api/products", json=sample_product_data).json()
+        word = sample_product_data["name"].split()[0]
+        assert created["id"] in [p["id"] for p in client.get("/api/products/search", params={"q": word}).json()]
+        client.delete(f"/api/products/{created['id']}")
+        assert created["id"] not in [p["id"] for p in client.get("/api/products/search", params={"q": word}).json()]
+
+    def test_search_products_invalid_params(self, client: TestClient):
+        """Test that missing queries, bad limits and foreign cursors are rejected"""
+        assert client.get("/api/products/search").status_code == 422
+        assert client.get("/api/products/search", params={"q": ""}).status_code == 422
+        assert client.get("/api/products/search", params={"q": "x" * 201}).status_code == 422
+        assert client.get("/api/products/search", params={"q": "book", "limit": 0}).status_code == 422
+        id_cursor = client.get("/api/products", params={"limit": 1}).headers["X-Next-Cursor"]
+        response = client.get("/api/products/search", params={"q": "book", "after": id_cursor})
+        assert response.status_code == 400
+
+    def test_get_products_filtered(self, client: TestClient):
+        """Test price, stock and status filters on the product list, with and without pagination"""
+        response = client.get("/api/products", params={"min_price": 100, "max_price": 300})
+        assert response.status_code == 200
+        products = response.json()
+        assert products and all(100 <= p["price"] <= 300 for p in products)
+        assert [p["id"] for p in products] == sorted(p["id"] for p in products)
+
+        params = {"min_stock": 20, "max_stock": 60, "status": "active"}
+        expected = [p["id"] for p in client.get("/api/products", params=params).json()]
+        assert expected == [p["id"] for p in client.get("/api/products").json()
+                            if 20 <= p["stock"] <= 60 and p["status"] == "active"]
+
+        seen, page_params = [], {**params, "limit": 2}
+        while True:
+            response = client.get("/api/products", params=page_params)
+            seen.extend(p["id"] for p in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            page_params = {**params, "limit": 2, "after": cursor}
+        assert seen == expected
+
+    def test_get_products_filter_validation(self, client: TestClient):
+        """Test that malformed filter values are rejected"""
+        assert client.get("/api/products", params={"status": "sold"}).status_code == 422
+        assert client.get("/api/products", params={"min_stock": "many"}).status_code == 422
+        assert client.get("/api/products", params={"min_price": 10, "max_price": 5}).json() == []
+
+    def test_get_products_sorted(self, client: TestClient):
+        """Test server-side sorting, alone and combined with filters and cursor pagination"""
+        all_products = client.get("/api/products").json()
+        by_price_desc = sorted(all_products, key=lambda p: (p["price"], p["id"]), reverse=True)
+
+        response = client.get("/api/products", params={"sort": "-price"})
+        assert [p["id"] for p in response.json()] == [p["id"] for p in by_price_desc]
+        assert [p["id"] for p in client.get("/api/products", params={"sort": "-price", "limit": 3}).json()] == \
+            [p["id"] for p in by_price_desc[:3]]
+
+        params = {"sort": "name", "status": "active", "limit": 4}
+        expected = sorted((p for p in all_products if p["status"] == "active"), key=lambda p: (p["name"], p["id"]))
+        seen = []
+        while True:
+            response = client.get("/api/products", params=params)
+            seen.extend(p["id"] for p in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            params = {**params, "after": cursor}
+        assert seen == [p["id"] for p in expected]
+
+    def test_get_products_sorted_invalid(self, client: TestClient):
+        """Test that unknown sort fields and cursors from another ordering are rejected"""
+        assert client.get("/api/products", params={"sort": "sku"}).status_code == 422
+        name_cursor = client.get("/api/products", params={"sort": "name", "limit": 1}).headers["X-Next-Cursor"]
+        response = client.get("/api/products", params={"sort": "price", "limit": 1, "after": name_cursor})
+        assert response.status_code == 400
+        id_cursor = client.get("/api/products", params={"limit": 1}).headers["X-Next-Cursor"]
+        assert client.get("/api/products", params={"sort": "stock", "after": id_cursor}).status_code == 400
\ No newline at end of file
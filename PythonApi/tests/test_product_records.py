@@ -0,0 +1,43 @@
+from product_database import ProductDatabase
+from product_models import BatchItemResult, Product, ProductStatus, UpdateProductCommand
+from product_records import ProductRecord
+
+
+def _record(**changes) -> ProductRecord:
+    values = dict(id=7, name="Lamp", sku="LAMP-1", stock=3, price=20, category_id=2,
+                  status="active", description=None)
+    values.update(changes)
+    return ProductRecord(**values)
+
+
+class TestProductRecord:
+    """Test suite for the compact stored form of a product"""
+
+    def test_fields_are_normalized(self):
+        """Test that prices become floats and statuses enum members, as the pydantic model does"""
+        record = _record()
+        assert record.price == 20.0 and isinstance(record.price, float)
+        assert record.status is ProductStatus.ACTIVE
+        assert not hasattr(record, "__dict__")
+
+    def test_replace_returns_a_new_record(self):
+        """Test that replace leaves the original record unchanged"""
+        record = _record()
+        updated = record.replace(stock=9, status=ProductStatus.INACTIVE)
+        assert (updated.stock, updated.status, updated.name) == (9, ProductStatus.INACTIVE, "Lamp")
+        assert record.stock == 3
+        assert updated != record and record.replace() == record
+
+    def test_models_built_from_records(self):
+        """Test that the API models validate from records by attribute"""
+        record = _record(description="Desk lamp")
+        model = record.to_model()
+        assert isinstance(model, Product)
+        assert model.model_dump() == record.to_dict()
+        assert BatchItemResult(index=0, success=True, status_code=200, product=record).product == model
+
+    def test_store_keeps_records(self, fresh_db: ProductDatabase):
+        """Test that the store holds and returns records rather than pydantic models"""
+        assert all(type(p) is ProductRecord for p in fresh_db.get_all_products())
+        updated = fresh_db.update_product(1, UpdateProductCommand(price=5))
+        assert type(updated) is ProductRecord and updated.price == 5.0
@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+
+import pytest
+
+import product_wal
+from product_database import ProductDatabase
+from product_models import (
+    ProductCategory, ProductStatus, CreateProductCommand, UpdateProductCommand,
+    CreateCategoryCommand, UpdateCategoryCommand
+)
+from product_records import ProductRecord
+from product_wal import (
+    CorruptLogError, OP_PUT_PRODUCT, OP_PUT_CATEGORY, OP_DELETE_PRODUCT, decode_record,
+    encode_put_product, encode_put_category, encode_delete_product
+)
+
+
+def _new_product(sku: str, category_id: int = 1) -> CreateProductCommand:
+    return CreateProductCommand(
+        name=f"Product {sku}", sku=sku, stock=5, price=12.5,
+        category_id=category_id, status=ProductStatus.ACTIVE, description="Ünïcode ✓"
+    )
+
+
+def _state(db: ProductDatabase):
+    return (
+        [c.model_dump() for c in db.get_all_categories()],
+        [p.to_dict() for p in db.get_all_products()],
+        db.next_category_id,
+        db.next_product_id,
+    )
+
+
+def _files(directory) -> list:
+    return sorted(os.listdir(directory))
+
+
+class TestRecordEncoding:
+    """Test suite for the binary log record format"""
+
+    def test_product_round_trip(self):
+        """Test that product records decode to the same product"""
+        product = ProductRecord(id=7, name="Lamp", sku="LAMP-1", stock=-3, price=19.99, category_id=2,
+                                status=ProductStatus.DISCONTINUED, description=None)
+        op, decoded = decode_record(encode_put_product(product))
+        assert op == OP_PUT_PRODUCT
+        assert decoded == product
+
+    def test_category_and_delete_round_trip(self):
+        """Test that category and delete records decode correctly"""
+        category = ProductCategory(id=3, name="Garden", description="Outdoor things")
+        op, decoded = decode_record(encode_put_category(category))
+        assert op == OP_PUT_CATEGORY
+        assert decoded.model_dump() == category.model_dump()
+        assert decode_record(encode_delete_product(42)) == (OP_DELETE_PRODUCT, 42)
+
+
+class TestDurableDatabase:
+    """Test suite for write-ahead logging and snapshots of ProductDatabase"""
+
+    def test_new_directory_is_seeded(self, tmp_path):
+        """Test that an empty data directory starts from the sample data"""
+        db = ProductDatabase.open_durable(str(tmp_path))
+        assert len(db.get_all_products()) == 20
+        db.close()
+
+        reopened = ProductDatabase.open_durable(str(tmp_path))
+        assert len(reopened.get_all_products()) == 20
+        reopened.close()
+
+    def test_mutations_survive_restart(self, tmp_path):
+        """Test that every kind of mutation is replayed after a restart"""
+        db = ProductDatabase.open_durable(str(tmp_path))
+        category = db.create_category(CreateCategoryCommand(name="Durable"))
+        db.update_category(2, UpdateCategoryCommand(description="Renamed apparel"))
+        db.delete_category(6)
+        created = db.create_product(_new_product("DUR-001", category.id))
+        db.update_product(created.id, UpdateProductCommand(stock=99, sku="DUR-001-B"))
+        db.update_product(1, UpdateProductCommand(category_id=category.id))
+        db.delete_product(20)
+        expected = _state(db)
+        db.close()
+
+        reopened = ProductDatabase.open_durable(str(tmp_path))
+        assert _state(reopened) == expected
+        assert reopened.get_product_by_sku("DUR-001-B").stock == 99
+        assert [p.id for p in reopened.get_products_by_category(category.id)] == [1, created.id]
+        # Ids are not reused after a restart
+        assert reopened.create_product(_new_product("DUR-002")).id == created.id + 1
+        reopened.close()
+
+    def test_snapshot_truncates_log(self, tmp_path):
+        """Test that a snapshot replaces the older log segments"""
+        db = ProductDatabase.open_durable(str(tmp_path), snapshot_every=0)
+        for i in range(10):
+            db.create_product(_new_product(f"SNAP-{i}"))
+        assert "wal-00000001.log" in _files(tmp_path)
+        assert os.path.getsize(tmp_path / "wal-00000001.log") > 0
+
+        db.snapshot()
+        assert _files(tmp_path) == ["snapshot-00000002.bin", "wal-00000002.log"]
+        db.delete_product(21)
+        expected = _state(db)
+        db.close()
+
+        reopened = ProductDatabase.open_durable(str(tmp_path))
+        assert _state(reopened) == expected
+        reopened.close()
+
+    def test_automatic_background_snapshot(self, tmp_path):
+        """Test that a snapshot is taken once the log reaches snapshot_every records"""
+        db = ProductDatabase.open_durable(str(tmp_path), snapshot_every=5)
+        for i in range(5):
+            db.create_product(_new_product(f"AUTO-{i}"))
+        db._journal.wait_for_snapshot()
+        assert "snapshot-00000002.bin" in _files(tmp_path)
+        assert "wal-00000001.log" not in _files(tmp_path)
+        expected = _state(db)
+        db.close()
+
+        reopened = ProductDatabase.open_durable(str(tmp_path))
+        assert _state(reopened) == expected
+        reopened.close()
+
+    def test_torn_tail_is_discarded(self, tmp_path):
+        """Test that a half-written record at the end of the log is dropped on recovery"""
+        db = ProductDatabase.open_durable(str(tmp_path))
+        db.create_product(_new_product("TORN-001"))
+        expected = _state(db)
+        db.create_product(_new_product("TORN-002"))
+        db.close()
+
+        segment = tmp_path / "wal-00000001.log"
+        with open(segment, "r+b") as stream:
+            stream.truncate(os.path.getsize(segment) - 3)
+
+        reopened = ProductDatabase.open_durable(str(tmp_path))
+        assert _state(reopened) == expected
+        # New records go after the last intact one
+        reopened.create_product(_new_product("TORN-003"))
+        after_append = _state(reopened)
+        reopened.close()
+        again = ProductDatabase.open_durable(str(tmp_path))
+        assert _state(again) == after_append
+        again.close()
+
+    def test_corrupt_snapshot_is_reported(self, tmp_path):
+        """Test that a damaged snapshot fails loudly instead of loading partial data"""
+        ProductDatabase.open_durable(str(tmp_path)).close()
+        snapshot = tmp_path / "snapshot-00000001.bin"
+        data = bytearray(snapshot.read_bytes())
+        data[-1] ^= 0xFF
+        snapshot.write_bytes(bytes(data))
+
+        with pytest.raises(CorruptLogError):
+            ProductDatabase.open_durable(str(tmp_path))
+
+    def test_fsync_batching(self, tmp_path, monkeypatch):
+        """Test that fsync runs once per fsync_every appended records"""
+        db = ProductDatabase.open_durable(str(tmp_path), fsync_every=3, snapshot_every=0)
+        calls = []
+        monkeypatch.setattr(product_wal.os, "fsync", lambda fd: calls.append(fd))
+
+        db.create_product(_new_product("SYNC-1"))
+        db.create_product(_new_product("SYNC-2"))
+        assert calls == []
+        db.create_product(_new_product("SYNC-3"))
+        assert len(calls) == 1
+        db.close()
+
+    def test_fsync_runs_outside_the_store_lock(self, tmp_path, monkeypatch):
+        """Test that writers wait for the disk without holding the store's write lock"""
+        db = ProductDatabase.open_durable(str(tmp_path), fsync_every=1, snapshot_every=0)
+        lock_free = []
+
+        def check():
+            acquired = db._lock.acquire(blocking=False)
+            if acquired:
+                db._lock.release()
+            lock_free.append(acquired)
+
+        def fsync(fd):
+            # The store lock is reentrant, so ask from another thread whether it is free
+            checker = threading.Thread(target=check)
+            checker.start()
+            checker.join()
+
+        monkeypatch.setattr(product_wal.os, "fsync", fsync)
+        db.create_product(_new_product("UNLOCKED-1"))
+        db.delete_product(1)
+        assert lock_free == [True, True]
+        assert db.blocking_writes and not ProductDatabase().blocking_writes
+        db.close()
+
+    def test_concurrent_writers_share_fsyncs(self, tmp_path, monkeypatch):
+        """Test that writers arriving during an fsync are covered by one later fsync (group commit)"""
+        db = ProductDatabase.open_durable(str(tmp_path), fsync_every=1, snapshot_every=0)
+        calls = []
+
+        def slow_fsync(fd):
+            calls.append(fd)
+            time.sleep(0.005)
+
+        monkeypatch.setattr(product_wal.os, "fsync", slow_fsync)
+
+        def writer(worker: int):
+            for i in range(20):
+                db.create_product(_new_product(f"GROUP-{worker}-{i}"))
+
+        threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) < 160
+        assert db._journal._synced == db._journal._appended == 160
+        expected = _state(db)
+        db.close()
+
+        reopened = ProductDatabase.open_durable(str(tmp_path))
+        assert _state(reopened) == expected
+        reopened.close()
+
+    def test_batch_is_one_write_and_survives_restart(self, tmp_path, monkeypatch):
+        """Test that a batch is journaled with one fsync and replayed after a restart"""
+        db = ProductDatabase.open_durable(str(tmp_path), fsync_every=1, snapshot_every=0)
+        calls = []
+        monkeypatch.setattr(product_wal.os, "fsync", lambda fd: calls.append(fd))
+
+        created = db.create_products([_new_product(f"BATCH-{i}") for i in range(10)])
+        assert len(calls) == 1
+        db.update_products([(product.id, UpdateProductCommand(stock=1)) for product in created[:5]])
+        db.delete_products([product.id for product in created[5:]])
+        assert len(calls) == 3
+        expected = _state(db)
+        db.close()
+
+        reopened = ProductDatabase.open_durable(str(tmp_path))
+        assert _state(reopened) == expected
+        reopened.close()
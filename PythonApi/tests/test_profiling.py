@@ -0,0 +1,101 @@
+import cProfile
+import os
+import pstats
+
+import pytest
+from fastapi.routing import APIRoute
+
+from main import app
+from profiling import RequestProfiler
+
+
+@pytest.fixture
+def instrument(monkeypatch, tmp_path):
+    """Instrument the app with a RequestProfiler for one test, restoring the routes afterwards"""
+    def instrument(**options) -> RequestProfiler:
+        for route in app.routes:
+            if isinstance(route, APIRoute):
+                monkeypatch.setattr(route, "app", route.app)
+                monkeypatch.setattr(route.dependant, "call", route.dependant.call)
+        profiler = RequestProfiler(str(tmp_path / "profiles"), **options)
+        profiler.instrument(app)
+        return profiler
+    return instrument
+
+
+def _functions(path: str):
+    return {function for _, _, function in pstats.Stats(path).stats}
+
+
+class TestProfiling:
+    """Test suite for opt-in per-request profiles"""
+
+    def test_header_with_token_profiles_the_request(self, client, instrument):
+        """Test that the admin header writes a profile covering the handler and the store call"""
+        profiler = instrument(token="secret")
+        response = client.get("/api/products/1", headers={"X-Profile": "secret"})
+        assert response.status_code == 200
+        name = response.headers["X-Profile-File"]
+        assert name.endswith("-GetProduct.pstats")
+        functions = _functions(os.path.join(profiler.directory, name))
+        assert {"get_product", "get_product_by_id"} <= functions
+
+    def test_sync_handlers_profiled_on_their_thread(self, client, instrument):
+        """Test that a sync handler, run on a worker thread, is profiled there"""
+        profiler = instrument(token="secret")
+        response = client.get("/api/products/export", headers={"X-Profile": "secret"})
+        assert response.status_code == 200
+        functions = _functions(os.path.join(profiler.directory, response.headers["X-Profile-File"]))
+        assert "export_products" in functions
+
+    def test_requests_without_the_token_are_not_profiled(self, client, instrument):
+        """Test that a missing or wrong token leaves the request unprofiled"""
+        profiler = instrument(token="secret")
+        assert "X-Profile-File" not in client.get("/api/products/1").headers
+        assert "X-Profile-File" not in client.get("/api/products/1", headers={"X-Profile": "guess"}).headers
+        assert os.listdir(profiler.directory) == []
+
+    def test_sampling_and_retention(self, client, instrument):
+        """Test that a sample rate of 1 profiles every request and only the newest files are kept"""
+        profiler = instrument(sample_rate=1.0, keep=3)
+        for _ in range(5):
+            client.get("/api/categories")
+        # <date>-<time>-<sequence>-<operation_id>.pstats: the last three of five remain
+        assert [int(name.split("-")[2]) for name in sorted(os.listdir(profiler.directory))] == [2, 3, 4]
+
+    def test_sampled_requests_get_no_file_name(self, client, instrument):
+        """Test that only a request carrying the admin token learns the profile's file name"""
+        profiler = instrument(token="secret", sample_rate=1.0)
+        response = client.get("/api/categories")
+        assert response.status_code == 200
+        assert "X-Profile-File" not in response.headers
+        assert len(os.listdir(profiler.directory)) == 1
+
+    def test_one_profile_at_a_time(self, client, instrument):
+        """Test that a request picked while another profile runs is served unprofiled"""
+        profiler = instrument(token="secret")
+        with profiler._active:
+            response = client.get("/api/products/1", headers={"X-Profile": "secret"})
+        assert response.status_code == 200
+        assert "X-Profile-File" not in response.headers
+        assert "X-Profile-File" in client.get("/api/products/1", headers={"X-Profile": "secret"}).headers
+
+    def test_failed_start_does_not_disable_profiling(self, client, instrument, monkeypatch):
+        """Test that when the profiler hook is taken the request is served, and later requests are profiled"""
+        profiler = instrument(token="secret")
+
+        def hook_taken(self):
+            raise ValueError("Another profiling tool is already active")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(cProfile.Profile, "enable", hook_taken)
+            response = client.get("/api/products/1", headers={"X-Profile": "secret"})
+        assert response.status_code == 200 and "X-Profile-File" not in response.headers
+        assert not profiler._active.locked()
+        assert "X-Profile-File" in client.get("/api/products/1", headers={"X-Profile": "secret"}).headers
+
+    def test_off_by_default(self):
+        """Test that without profiling configured no route is wrapped"""
+        for route in app.routes:
+            if isinstance(route, APIRoute):
+                assert route.dependant.call is route.endpoint
@@ -0,0 +1,100 @@
+import random
+
+import range_index
+from range_index import RangeIndex
+
+
+class TestRangeIndex:
+    """Test suite for the sorted value -> id index behind the range filters"""
+
+    def test_range_ids(self):
+        """Test that ranges are inclusive, ordered by value and then id"""
+        index = RangeIndex.from_pairs([(5.0, 3), (1.0, 4), (5.0, 1), (9.5, 2)])
+        assert index.range_ids() == [4, 1, 3, 2]
+        assert index.range_ids(5.0, 5.0) == [1, 3]
+        assert index.range_ids(low=5.0) == [1, 3, 2]
+        assert index.range_ids(high=4.99) == [4]
+        assert index.range_ids(6.0, 2.0) == []
+        assert index.count(6.0, 2.0) == 0
+        assert index.count(1.0, 5.0) == 3
+
+    def test_add_remove_and_move(self):
+        """Test that incremental changes keep the entries sorted"""
+        index = RangeIndex()
+        for product_id, value in [(1, 10), (2, 5), (3, 10), (4, 7)]:
+            index.add(value, product_id)
+        assert index.entries() == [(5, 2), (7, 4), (10, 1), (10, 3)]
+
+        index.move(3, 10, 1)
+        index.move(4, 7, 7)
+        assert index.entries() == [(1, 3), (5, 2), (7, 4), (10, 1)]
+
+        index.remove(10, 1)
+        index.remove(10, 1)
+        index.remove(5, 4)
+        assert index.entries() == [(1, 3), (5, 2), (7, 4)]
+        assert len(index) == 3
+
+    def test_blocks_split_and_empty(self, monkeypatch):
+        """Test ranges across many blocks against a plain sorted list"""
+        monkeypatch.setattr(range_index, "BLOCK_SIZE", 4)
+        rng = random.Random(3)
+        index = RangeIndex.from_pairs((rng.randint(0, 50), product_id) for product_id in range(30))
+        entries = sorted(index.entries())
+        for product_id in range(30, 300):
+            value = rng.randint(0, 50)
+            index.add(value, product_id)
+            entries.append((value, product_id))
+        for value, product_id in rng.sample(entries, 200):
+            index.remove(value, product_id)
+            entries.remove((value, product_id))
+        entries.sort()
+
+        assert index.entries() == entries
+        assert len(index) == len(entries)
+        for _ in range(200):
+            low, high = rng.choice([None, rng.randint(-5, 55)]), rng.choice([None, rng.randint(-5, 55)])
+            expected = [product_id for value, product_id in entries
+                        if (low is None or value >= low) and (high is None or value <= high)]
+            assert index.range_ids(low, high) == expected
+            assert index.count(low, high) == len(expected)
+
+    def test_iter_entries(self, monkeypatch):
+        """Test ordered walks in both directions starting past a position"""
+        monkeypatch.setattr(range_index, "BLOCK_SIZE", 3)
+        rng = random.Random(5)
+        index = RangeIndex()
+        for product_id in range(60):
+            index.add(rng.randint(0, 15), product_id)
+        entries = index.entries()
+        assert list(index.iter_entries()) == entries
+        assert list(index.iter_entries(reverse=True)) == entries[::-1]
+        for _ in range(100):
+            after = (rng.randint(-1, 16), rng.randint(-1, 61))
+            assert list(index.iter_entries(after)) == [entry for entry in entries if entry > after]
+            assert list(index.iter_entries(after, reverse=True)) == [entry for entry in entries if entry < after][::-1]
+
+    def test_walks_survive_interleaved_writes(self, monkeypatch):
+        """Test that a walk interleaved with writes stays ordered and keeps every entry that stayed put"""
+        monkeypatch.setattr(range_index, "BLOCK_SIZE", 4)
+        rng = random.Random(9)
+        for reverse in (False, True):
+            index = RangeIndex()
+            for product_id in range(100):
+                index.add(rng.randint(0, 30), product_id)
+            stable = set(index.entries())
+            walk = index.iter_entries(reverse=reverse)
+            seen = [next(walk)]
+            next_id = 100
+            for entry in walk:
+                seen.append(entry)
+                # Split blocks with new entries and empty others between steps of the walk
+                for _ in range(3):
+                    index.add(rng.randint(0, 30), next_id)
+                    next_id += 1
+                victim = rng.choice(index.entries())
+                index.remove(*victim)
+                stable.discard(victim)
+            assert seen == sorted(seen, reverse=reverse)
+            assert len(set(seen)) == len(seen)
+            assert stable <= set(seen)
@@ -0,0 +1,135 @@
+import random
+
+import pytest
+
+import search_index
+from product_database import ProductDatabase
+from product_models import Product, ProductStatus, CreateProductCommand, UpdateProductCommand
+from search_index import SearchIndex, _Term, term_weights, tokenize
+
+
+def _product(product_id: int, name: str, description=None) -> Product:
+    return Product(id=product_id, name=name, sku=f"SKU-{product_id}", stock=1, price=1.0,
+                   category_id=1, status=ProductStatus.ACTIVE, description=description)
+
+
+def _search_all(db, query: str, limit: int):
+    """Walk every page of a search and return the product ids in result order"""
+    ids, after = [], None
+    while True:
+        page, after = db.search_products(query, limit, after)
+        ids.extend(p.id for p in page)
+        if after is None:
+            return ids
+
+
+class TestSearchIndex:
+    """Test suite for the full-text product search index"""
+
+    def test_tokenize(self):
+        """Test that text is split into lowercase words of letters and digits"""
+        assert tokenize("Wireless Headphones, 2-Pack!") == ["wireless", "headphones", "2", "pack"]
+        assert tokenize("snake_case ÉCLAIR") == ["snake", "case", "éclair"]
+        assert tokenize(None) == []
+
+    def test_name_outweighs_description(self, fresh_db: ProductDatabase):
+        """Test that a match in the name ranks above a match in the description"""
+        smartwatch = fresh_db.search_products("smartwatch", 10)[0]
+        assert [p.id for p in smartwatch] == [4]
+
+        fresh_db.create_product(CreateProductCommand(
+            name="Smartwatch Strap", sku="STRAP-001", stock=5, price=9.99,
+            category_id=1, status=ProductStatus.ACTIVE, description="Fits most watches"
+        ))
+        ranked = fresh_db.search_products("smartwatch", 10)[0]
+        assert [p.name for p in ranked] == ["Smartwatch Strap", "Smart Watch"]
+
+    def test_every_word_must_match(self, fresh_db: ProductDatabase):
+        """Test that a query matches only products containing all of its words"""
+        assert [p.id for p in fresh_db.search_products("BOOK", 10)[0]] == [9, 12]
+        assert [p.id for p in fresh_db.search_products("history book", 10)[0]] == [12]
+        assert fresh_db.search_products("history laptop", 10) == ([], None)
+        assert fresh_db.search_products("!!", 10) == ([], None)
+
+    def test_index_follows_mutations(self, fresh_db: ProductDatabase):
+        """Test that creates, renames and deletes are reflected in search results"""
+        created = fresh_db.create_product(CreateProductCommand(
+            name="Espresso Machine", sku="FOOD-003", stock=3, price=249.0,
+            category_id=6, status=ProductStatus.ACTIVE
+        ))
+        assert [p.id for p in fresh_db.search_products("espresso", 10)[0]] == [created.id]
+
+        fresh_db.update_product(created.id, UpdateProductCommand(name="Milk Frother"))
+        assert fresh_db.search_products("espresso", 10)[0] == []
+        assert [p.name for p in fresh_db.search_products("frother", 10)[0]] == ["Milk Frother"]
+
+        # A stock change leaves the index alone but results show the new values
+        fresh_db.update_product(created.id, UpdateProductCommand(stock=0))
+        assert fresh_db.search_products("frother", 10)[0][0].stock == 0
+
+        fresh_db.delete_product(created.id)
+        assert fresh_db.search_products("frother", 10)[0] == []
+        assert "frother" not in fresh_db._search_index._postings
+
+    def test_rebuild_matches_incremental_index(self, fresh_db: ProductDatabase):
+        """Test that the bulk rebuild after recovery produces the same index"""
+        fresh_db.update_product(3, UpdateProductCommand(description="Wireless over-ear headphones"))
+        fresh_db.delete_product(7)
+        incremental = fresh_db._search_index
+
+        fresh_db._rebuild_indexes()
+        assert fresh_db._search_index._postings == incremental._postings
+        assert fresh_db._search_index._impacts == incremental._impacts
+        assert fresh_db._search_index.document_count == incremental.document_count == 19
+
+    @pytest.mark.parametrize("chunk", [1, 3, 256])
+    def test_ranked_pages_match_exhaustive_scoring(self, monkeypatch, chunk):
+        """Test that early-terminating queries return exactly the full ranking, page by page"""
+        monkeypatch.setattr(search_index, "SCAN_CHUNK", chunk)
+        rng = random.Random(7)
+        words = [f"w{i}" for i in range(20)]
+        index = SearchIndex()
+        products = {}
+        for product_id in range(1, 1500):
+            product = _product(product_id, " ".join(rng.choices(words[:8], k=3)),
+                               " ".join(rng.choices(words, k=6)))
+            products[product_id] = product
+            index.add(product)
+        for product_id in rng.sample(sorted(products), 300):
+            index.remove(products.pop(product_id))
+
+        for _ in range(50):
+            query = " ".join(rng.sample(words, rng.randint(1, 3)))
+            tokens = set(tokenize(query))
+            expected = {pid for pid, p in products.items() if tokens <= term_weights(p).keys()}
+
+            matches, after = [], None
+            limit = rng.randint(1, 40)
+            while True:
+                page, after = index.search(query, limit, after)
+                matches.extend(page)
+                if after is None:
+                    break
+            assert sorted(pid for _, pid in matches) == sorted(expected)
+            assert matches == sorted(matches, key=lambda match: (-match[0], match[1]))
+
+    def test_term_emptied_by_a_delete(self, monkeypatch):
+        """Test that a term whose last bucket a concurrent delete emptied bounds its score by 0"""
+        monkeypatch.setattr(search_index, "SCAN_CHUNK", 1)
+        rarest = _Term({1: 2, 2: 1, 4: 1}, {2: [1], 1: [2, 4]}, 1.0)
+        # Product 5 was deleted after the bucket weights were read, leaving its bucket empty
+        common = _Term({1: 2, 2: 1, 3: 2}, {2: [1, 3], 1: []}, 0.5)
+        assert SearchIndex._search_terms([rarest, common], 2, None) == [(3.0, 1), (1.5, 2)]
+        assert common.exhausted and common.bound == 0.0
+
+    def test_pagination_is_stable(self, fresh_db: ProductDatabase):
+        """Test that walking pages returns each match once, in the single-page order"""
+        for i in range(30):
+            fresh_db.create_product(CreateProductCommand(
+                name=f"Desk Lamp {i}", sku=f"LAMP-{i:03d}", stock=1, price=10.0, category_id=4,
+                status=ProductStatus.ACTIVE, description="Desk lamp with a desk clamp" if i % 3 else None
+            ))
+        single_page = [p.id for p in fresh_db.search_products("desk lamp", 100)[0]]
+        assert len(single_page) == 30
+        assert _search_all(fresh_db, "desk lamp", 4) == single_page
+        assert _search_all(fresh_db, "lamp", 7) == [p.id for p in fresh_db.search_products("lamp", 100)[0]]
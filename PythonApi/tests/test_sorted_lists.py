@@ -0,0 +1,58 @@
+import bisect
+
+import sorted_lists
+from sorted_lists import iter_values_after, values_after, values_before
+
+
+def _racing(monkeypatch, name: str, values: list, changes: list):
+    """Apply one of ``changes`` to ``values`` right after each binary search over it"""
+    search = getattr(bisect, name)
+
+    def racing_search(searched, value):
+        position = search(searched, value)
+        if searched is values and changes:
+            changes.pop(0)()
+        return position
+
+    monkeypatch.setattr(sorted_lists, name, racing_search)
+
+
+class TestSortedLists:
+    """Test suite for reading sorted lists that other threads change in place"""
+
+    def test_values_after_and_before(self):
+        """Test pages of values on either side of a position"""
+        values = [2, 4, 6, 8, 10]
+        assert values_after(values, None, 2) == [2, 4]
+        assert values_after(values, 4, 2) == [6, 8]
+        assert values_after(values, 5, 10) == [6, 8, 10]
+        assert values_after(values, 10, 3) == []
+        assert values_before(values, None, 2) == [8, 10]
+        assert values_before(values, 8, 2) == [4, 6]
+        assert values_before(values, 7, 10) == [2, 4, 6]
+        assert values_before(values, 2, 3) == []
+        assert values_after([], None, 3) == values_before([], None, 3) == []
+
+    def test_iter_values_after(self, monkeypatch):
+        """Test a chunked walk against the plain list"""
+        monkeypatch.setattr(sorted_lists, "READ_CHUNK", 3)
+        values = list(range(1, 40, 2))
+        assert list(iter_values_after(values)) == values
+        assert list(iter_values_after(values, 10)) == [i for i in values if i > 10]
+
+    def test_values_after_races(self, monkeypatch):
+        """Test that changes landing between the binary search and the copy are detected"""
+        values = [1, 2, 3, 4, 5, 6]
+        _racing(monkeypatch, "bisect_right", values,
+                [lambda: values.remove(1), lambda: values.insert(0, 0), lambda: values.remove(2)])
+        # Every value above 3 that stays in the list is returned, once
+        assert values_after(values, 3, 2) == [4, 5]
+        assert values_after(values, 3, 10) == [4, 5, 6]
+
+    def test_values_before_races(self, monkeypatch):
+        """Test the same for the walk towards smaller values"""
+        values = [1, 2, 3, 4, 5, 6]
+        _racing(monkeypatch, "bisect_left", values,
+                [lambda: values.insert(0, 0), lambda: values.remove(0), lambda: values.insert(0, -1)])
+        assert values_before(values, 4, 2) == [2, 3]
+        assert values_before(values, 4, 10) == [-1, 1, 2, 3]
@@ -0,0 +1,310 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from product_models import (
+    ProductStatus, CreateProductCommand, CreateCategoryCommand, UpdateProductCommand,
+    UpdateCategoryCommand, DuplicateSkuError, InvalidCategoryError, ProductNotFoundError,
+    InsufficientStockError, SkuNotFoundError
+)
+from sqlite_database import SqliteProductDatabase
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Create a SQLite-backed database in a temporary file"""
+    db = SqliteProductDatabase(str(tmp_path / "inventory.db"))
+    yield db
+    db.close()
+
+
+class TestSqliteProductDatabase:
+    """Test suite for the SQLite storage engine"""
+
+    def test_initialization_seeds_once(self, sqlite_db: SqliteProductDatabase):
+        """Test that a new file is seeded and reopening it does not seed again"""
+        assert len(sqlite_db.get_all_categories()) == 6
+        assert len(sqlite_db.get_all_products()) == 20
+
+    def test_adjust_stock(self, sqlite_db: SqliteProductDatabase, fresh_db):
+        """Test that stock adjustments and their status flips match the in-memory store"""
+        for db in (sqlite_db, fresh_db):
+            assert db.adjust_stock(2, -25).status == ProductStatus.OUT_OF_STOCK
+            with pytest.raises(InsufficientStockError):
+                db.adjust_stock(2, -1)
+            assert db.adjust_stock(999, 1) is None
+            results = db.adjust_stocks([("ELEC-002", 4, True), ("NOPE-001", 1, True), ("ELEC-001", -51, True)])
+            assert (results[0].stock, results[0].status) == (4, ProductStatus.ACTIVE)
+            assert isinstance(results[1], SkuNotFoundError)
+            assert isinstance(results[2], InsufficientStockError)
+        assert sqlite_db.get_product_by_id(2) == fresh_db.get_product_by_id(2)
+        # Negative stock included; the float stock values differ by rounding order only
+        everything, expected = sqlite_db.get_inventory_stats(), fresh_db.get_inventory_stats()
+        assert (everything.total_stock, everything.status_counts) == (expected.total_stock, expected.status_counts)
+
+        reopened = SqliteProductDatabase(sqlite_db.path)
+        assert len(reopened.get_all_products()) == 20
+        reopened.close()
+
+    def test_wal_mode_and_indexes(self, sqlite_db: SqliteProductDatabase):
+        """Test that the database runs in WAL mode with the secondary indexes in place"""
+        connection = sqlite_db._connection()
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[1] for row in connection.execute("PRAGMA index_list(products)")}
+        assert {"ix_products_sku", "ix_products_category"} <= indexes
+
+    def test_product_crud_operations(self, sqlite_db: SqliteProductDatabase):
+        """Test product CRUD operations against SQLite"""
+        created = sqlite_db.create_product(CreateProductCommand(
+            name="Test Product", sku="TEST-001", stock=50, price=99.99,
+            category_id=1, status=ProductStatus.ACTIVE, description="A test product"
+        ))
+        assert created.id == 21
+        assert sqlite_db.get_product_by_id(created.id) == created
+        assert sqlite_db.get_product_by_sku("TEST-001") == created
+
+        updated = sqlite_db.update_product(created.id, UpdateProductCommand(stock=25, category_id=2))
+        assert updated.stock == 25
+        assert updated.category_id == 2
+        assert updated.sku == "TEST-001"
+        assert sqlite_db.get_product_by_id(created.id) == updated
+
+        assert sqlite_db.delete_product(created.id) is True
+        assert sqlite_db.get_product_by_id(created.id) is None
+        assert sqlite_db.delete_product(created.id) is False
+
+    def test_category_crud_operations(self, sqlite_db: SqliteProductDatabase):
+        """Test category CRUD operations against SQLite"""
+        created = sqlite_db.create_category(CreateCategoryCommand(name="Test Category"))
+        assert created.id == 7
+
+        updated = sqlite_db.update_category(created.id, UpdateCategoryCommand(description="Described"))
+        assert updated.name == "Test Category"
+        assert updated.description == "Described"
+
+        assert sqlite_db.delete_category(created.id) is True
+        assert sqlite_db.get_category_by_id(created.id) is None
+        assert sqlite_db.update_category(created.id, UpdateCategoryCommand(name="Gone")) is None
+
+    def test_invalid_category_and_duplicate_sku(self, sqlite_db: SqliteProductDatabase):
+        """Test that invalid categories and duplicate SKUs are rejected"""
+        command = CreateProductCommand(
+            name="Invalid", sku="NEW-001", stock=1, price=1.0,
+            category_id=999, status=ProductStatus.ACTIVE
+        )
+        assert sqlite_db.create_product(command) is None
+        with pytest.raises(DuplicateSkuError):
+            sqlite_db.create_product(command.model_copy(update={"category_id": 1, "sku": "ELEC-001"}))
+        with pytest.raises(DuplicateSkuError):
+            sqlite_db.update_product(2, UpdateProductCommand(sku="ELEC-001"))
+        assert sqlite_db.update_product(2, UpdateProductCommand(category_id=999)) is None
+        assert len(sqlite_db.get_all_products()) == 20
+
+    def test_pagination_and_category_lookup(self, sqlite_db: SqliteProductDatabase):
+        """Test keyset pages and category lookups match the in-memory store"""
+        page, next_after = sqlite_db.get_products_page(limit=8)
+        assert [p.id for p in page] == list(range(1, 9))
+        page, next_after = sqlite_db.get_products_page(limit=8, after=16)
+        assert [p.id for p in page] == list(range(17, 21))
+        assert next_after is None
+
+        page, next_after = sqlite_db.get_products_page(limit=3, category_id=1)
+        assert [p.id for p in page] == [1, 2, 3]
+        assert next_after == 3
+        assert [p.id for p in sqlite_db.get_products_by_category(1)] == [1, 2, 3, 4]
+
+    def test_connections_are_per_thread(self, sqlite_db: SqliteProductDatabase):
+        """Test that each thread gets its own connection and sees committed writes"""
+        connections = []
+
+        def worker(index: int):
+            connections.append(sqlite_db._connection())
+            sqlite_db.create_product(CreateProductCommand(
+                name=f"Threaded {index}", sku=f"THREAD-{index}", stock=1, price=1.0,
+                category_id=1, status=ProductStatus.ACTIVE
+            ))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(connection) for connection in connections}) == 4
+        assert len(sqlite_db.get_all_products()) == 24
+
+    def test_api_runs_on_sqlite(self, sqlite_db: SqliteProductDatabase, monkeypatch):
+        """Test the HTTP API end to end with the SQLite backend plugged in"""
+        monkeypatch.setattr(main, "product_db", sqlite_db)
+        client = TestClient(app)
+
+        response = client.post("/api/products", json={
+            "name": "Api Product", "sku": "API-001", "stock": 3, "price": 9.5,
+            "category_id": 2, "status": "active"
+        })
+        assert response.status_code == 200
+        product_id = response.json()["id"]
+
+        assert client.get(f"/api/products/{product_id}").json()["sku"] == "API-001"
+        assert client.get("/api/products/by-sku/API-001").json()["id"] == product_id
+        assert client.put(f"/api/products/{product_id}", json={"sku": "ELEC-001"}).status_code == 409
+        assert client.get("/api/products/99999999999999999999").status_code == 404
+        assert client.delete(f"/api/products/{product_id}").status_code == 200
+
+    def test_api_calls_run_off_the_event_loop(self, sqlite_db: SqliteProductDatabase, fresh_db, monkeypatch):
+        """Test that SQLite calls run in the threadpool, while the in-memory store answers on the loop"""
+        def calls_on_loop(db) -> list:
+            on_loop = []
+            for name in ("get_version", "get_product_by_id", "get_inventory_stats", "create_category"):
+                def recording(*args, method=getattr(db, name), **kwargs):
+                    try:
+                        asyncio.get_running_loop()
+                        on_loop.append(True)
+                    except RuntimeError:
+                        on_loop.append(False)
+                    return method(*args, **kwargs)
+                monkeypatch.setattr(db, name, recording)
+            monkeypatch.setattr(main, "product_db", db)
+            client = TestClient(app)
+            assert client.get("/api/products/1").status_code == 200
+            assert client.get("/api/stats", params={"max_price": 50}).status_code == 200
+            assert client.post("/api/categories", json={"name": "Threaded"}).status_code == 200
+            return on_loop
+
+        assert calls_on_loop(sqlite_db) == [False] * 5
+        assert calls_on_loop(fresh_db) == [True] * 5
+
+    def test_batch_operations(self, sqlite_db: SqliteProductDatabase):
+        """Test that batch operations report per-item errors and apply the rest"""
+        def command(sku, category_id=1):
+            return CreateProductCommand(
+                name=sku, sku=sku, stock=1, price=1.0, category_id=category_id, status=ProductStatus.ACTIVE
+            )
+
+        results = sqlite_db.create_products([command("BATCH-A"), command("ELEC-001"), command("BATCH-C", 999)])
+        assert results[0].id == 21
+        assert isinstance(results[1], DuplicateSkuError)
+        assert isinstance(results[2], InvalidCategoryError)
+
+        results = sqlite_db.update_products([(21, UpdateProductCommand(stock=7)), (999, UpdateProductCommand(stock=7))])
+        assert results[0].stock == 7
+        assert isinstance(results[1], ProductNotFoundError)
+        assert sqlite_db.get_product_by_id(21).stock == 7
+
+        assert sqlite_db.delete_products([21, 21, 999]) == [True, False, False]
+        assert len(sqlite_db.get_all_products()) == 20
+
+    def test_find_products_and_filtered_stats(self, sqlite_db: SqliteProductDatabase, fresh_db):
+        """Test that filters and aggregates match the in-memory store"""
+        for filters in ({}, {"max_price": 20.0}, {"category_id": 1, "status": ProductStatus.ACTIVE}, {"category_id": 2**70},
+                        {"min_stock": 30, "max_stock": 100}, {"max_stock": 2**70, "status": ProductStatus.ACTIVE}):
+            assert [p.id for p in sqlite_db.find_products(**filters)] == [p.id for p in fresh_db.find_products(**filters)]
+            assert sqlite_db.get_inventory_stats(**filters) == fresh_db.get_inventory_stats(**filters)
+            page, next_after = sqlite_db.get_products_page(limit=2, after=3, **filters)
+            assert (page, next_after) == fresh_db.get_products_page(limit=2, after=3, **filters)
+
+    def test_get_products_sorted(self, sqlite_db: SqliteProductDatabase, fresh_db):
+        """Test that sorted listings and their cursors match the in-memory ordered views"""
+        for sort in ("price", "stock", "name"):
+            for descending in (False, True):
+                for filters in ({}, {"category_id": 1}, {"min_price": 20.0, "status": ProductStatus.ACTIVE}):
+                    expected = fresh_db.get_products_sorted(sort, descending=descending, **filters)
+                    assert sqlite_db.get_products_sorted(sort, descending=descending, **filters) == expected
+                    page, after = sqlite_db.get_products_sorted(sort, 2, descending=descending, **filters)
+                    assert (page, after) == fresh_db.get_products_sorted(sort, 2, descending=descending, **filters)
+                    if after is not None:
+                        assert sqlite_db.get_products_sorted(sort, 2, after, descending, **filters) == \
+                            fresh_db.get_products_sorted(sort, 2, after, descending, **filters)
+
+    def test_inventory_stats(self, sqlite_db: SqliteProductDatabase, fresh_db):
+        """Test that aggregated statistics match the in-memory running totals"""
+        for category_id in (None, 1, 3, 999, 2**70):
+            assert sqlite_db.get_inventory_stats(category_id) == fresh_db.get_inventory_stats(category_id)
+
+    def test_inventory_stats_beyond_int64(self, sqlite_db: SqliteProductDatabase, fresh_db):
+        """Test that a stock total past the int64 range is added up exactly, as in memory"""
+        for db in (sqlite_db, fresh_db):
+            for sku, stock in (("HUGE-1", 2**63 - 1), ("HUGE-2", 2**63 - 2), ("OWED-1", -2**63)):
+                db.create_product(CreateProductCommand(
+                    name=sku, sku=sku, stock=stock, price=1.0, category_id=1, status=ProductStatus.ACTIVE
+                ))
+        stats = sqlite_db.get_inventory_stats(min_stock=0)
+        assert stats.total_stock == fresh_db.get_inventory_stats(min_stock=0).total_stock
+        assert stats.total_stock > 2**64 - 4
+        # Negative stock included; the float stock values differ by rounding order only
+        everything, expected = sqlite_db.get_inventory_stats(), fresh_db.get_inventory_stats()
+        assert (everything.total_stock, everything.status_counts) == (expected.total_stock, expected.status_counts)
+
+    def test_search_products(self, sqlite_db: SqliteProductDatabase):
+        """Test full-text search through the FTS5 table kept in step by triggers"""
+        assert [p.sku for p in sqlite_db.search_products("book", 10)[0]] == ["BOOK-001", "BOOK-004"]
+        assert [p.sku for p in sqlite_db.search_products("HISTORY book", 10)[0]] == ["BOOK-004"]
+        assert sqlite_db.search_products('" OR *', 10) == ([], None)
+
+        page, after = sqlite_db.search_products("book", 1)
+        assert [p.sku for p in page] == ["BOOK-001"]
+        assert [p.sku for p in sqlite_db.search_products("book", 1, after)[0]] == ["BOOK-004"]
+
+        created = sqlite_db.create_product(CreateProductCommand(
+            name="Espresso Machine", sku="FOOD-003", stock=3, price=249.0,
+            category_id=6, status=ProductStatus.ACTIVE
+        ))
+        assert [p.id for p in sqlite_db.search_products("espresso", 10)[0]] == [created.id]
+        sqlite_db.update_product(created.id, UpdateProductCommand(name="Milk Frother"))
+        assert sqlite_db.search_products("espresso", 10)[0] == []
+        sqlite_db.delete_product(created.id)
+        assert sqlite_db.search_products("frother", 10)[0] == []
+
+    def test_search_index_built_on_upgrade(self, tmp_path):
+        """Test that upgrading a schema v2 file indexes its existing products"""
+        path = str(tmp_path / "v2.db")
+        db = SqliteProductDatabase(path)
+        connection = db._connection()
+        for trigger in ("insert", "delete", "update"):
+            connection.execute(f"DROP TRIGGER products_fts_{trigger}")
+        connection.execute("DROP TABLE products_fts")
+        connection.execute("PRAGMA user_version = 2")
+        db.close()
+
+        upgraded = SqliteProductDatabase(path)
+        assert [p.sku for p in upgraded.search_products("jeans", 10)[0]] == ["CLOTH-002"]
+        upgraded.close()
+
+    def test_version_counters(self, sqlite_db: SqliteProductDatabase):
+        """Test that versions are stored in the file and shared by every connection"""
+        assert sqlite_db.get_version() == 0
+        sqlite_db.update_product(1, UpdateProductCommand(category_id=2))
+        sqlite_db.create_category(CreateCategoryCommand(name="New"))
+        sqlite_db.delete_product(3)
+
+        other = SqliteProductDatabase(sqlite_db.path)
+        assert other.epoch == sqlite_db.epoch
+        assert other.get_version() == 3
+        assert other.get_version("product", 1) == 1
+        assert other.get_version("category_products", 2) == 1
+        assert other.get_version("categories") == 2
+        assert other.get_version("product", 3) == 3
+        assert other.get_version("category_products", 1) == 3
+        assert other.get_version("product", 2**70) == 0
+        other.close()
+
+    def test_schema_upgrade_keeps_data(self, tmp_path):
+        """Test that a schema v1 file gains version counters without being reseeded"""
+        path = str(tmp_path / "old.db")
+        db = SqliteProductDatabase(path)
+        db.delete_product(1)
+        connection = db._connection()
+        connection.execute("DROP TABLE versions")
+        connection.execute("PRAGMA user_version = 1")
+        db.close()
+
+        upgraded = SqliteProductDatabase(path)
+        assert len(upgraded.get_all_products()) == 19
+        assert upgraded.get_version() == 0
+        upgraded.delete_product(2)
+        assert upgraded.get_version("product", 2) == 1
+        upgraded.close()
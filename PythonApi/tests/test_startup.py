@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+from fastapi.openapi.utils import get_openapi
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "openapi.json")
+
+# Child process started with the production settings; prints what it was served
+PRODUCTION_CHILD = """
+import json
+from fastapi.testclient import TestClient
+import main
+client = TestClient(main.app)
+root = client.get("/", follow_redirects=False)
+print(json.dumps({
+    "swagger": client.get("/swagger").status_code,
+    "redoc": client.get("/redoc").status_code,
+    "root": root.headers["location"],
+    "openapi": client.get("/openapi.json").json(),
+}))
+"""
+
+
+class TestStartup:
+    """Test suite for the prebuilt OpenAPI document and the docs switch"""
+
+    def test_committed_spec_is_current(self):
+        """Test that openapi.json matches the schema built from the routes, so it is safe to serve"""
+        with open(SPEC_PATH, encoding="utf-8") as file:
+            committed = json.load(file)
+        built = get_openapi(title=app.title, version=app.version, openapi_version=app.openapi_version,
+                            description=app.description, routes=app.routes)
+        assert committed == built, "openapi.json is stale: regenerate it with generate_api_specification.py"
+
+    def test_prebuilt_spec_is_served(self, monkeypatch, tmp_path):
+        """Test that the prebuilt document is read once and served as it is"""
+        path = tmp_path / "openapi.json"
+        path.write_text(json.dumps({"openapi": "3.1.0", "info": {"title": "Prebuilt", "version": "1"}, "paths": {}}))
+        monkeypatch.setattr(app, "openapi_schema", None)
+        monkeypatch.setattr(app, "openapi", main._prebuilt_openapi(str(path)))
+        client = TestClient(app)
+        assert client.get("/openapi.json").json()["info"]["title"] == "Prebuilt"
+        path.unlink()
+        assert client.get("/openapi.json").json()["info"]["title"] == "Prebuilt"
+
+    def test_production_settings(self):
+        """Test that INVENTORY_DOCS=false drops the docs and / points at the prebuilt schema"""
+        env = {**os.environ, "INVENTORY_DOCS": "false", "INVENTORY_OPENAPI_FILE": SPEC_PATH,
+               "INVENTORY_STORAGE_BACKEND": "memory", "INVENTORY_SEED": "none"}
+        env.pop("INVENTORY_DATA_DIR", None)
+        output = subprocess.run([sys.executable, "-c", PRODUCTION_CHILD], env=env, capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(SPEC_PATH))
+        served = json.loads(output.stdout.strip().splitlines()[-1])
+        assert served["swagger"] == 404 and served["redoc"] == 404
+        assert served["root"] == "/openapi.json"
+        with open(SPEC_PATH, encoding="utf-8") as file:
+            assert served["openapi"] == json.load(file)